@@ -0,0 +1,329 @@
+"""
+API HTTP local de consultas de KPIs
+
+Expone en JSON los mismos porcentajes y estadísticas que el dashboard para
+uno o varios exports (un archivo o un directorio), sin pasar por Streamlit.
+
+Uso:
+    python api.py datos/encuesta.xlsx
+    python api.py datos/ --puerto 8502
+
+Endpoints (GET):
+    /metrics (métricas del proceso de la API en formato de Prometheus)
+    /datasets
+    /porcentajes?dataset=...&pregunta=...&agrupacion=promocion&promocion=...&modulo=...
+    /estadisticas?dataset=...&columna=...&agrupacion=modulo
+
+Cada respuesta lleva un ETag derivado del contenido del archivo y de los
+parámetros: con If-None-Match se responde 304 sin recalcular. Las
+respuestas se guardan en una caché LRU en memoria.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from config.settings import API_HOST, API_PUERTO, API_CACHE_RESPUESTAS, API_EXTENSIONES
+from utils.ingesta import calcular_clave, iniciar_ingesta
+from utils.cache_datasets import obtener_dataset
+from utils.consultas import ErrorConsulta, describir_dataset, consultar_porcentajes, consultar_estadisticas
+from utils.metricas import contar, observar, enviar_metricas
+
+# Consultas disponibles: ruta -> (función, parámetro con la columna)
+CONSULTAS = {
+    '/porcentajes': (consultar_porcentajes, 'pregunta'),
+    '/estadisticas': (consultar_estadisticas, 'columna')
+}
+
+# Archivo o directorio servido y nombre -> ruta de cada archivo
+_ORIGEN = {'ruta': None}
+_ARCHIVOS = {}
+# ruta -> ((mtime, tamaño), clave del contenido)
+_CLAVES = {}
+# ETag -> cuerpo JSON, en orden LRU
+_RESPUESTAS = OrderedDict()
+_BLOQUEO = threading.Lock()
+
+
+class ErrorNoEncontrado(LookupError):
+    """Dataset o endpoint inexistente"""
+
+
+def registrar_origen(ruta):
+    """
+    Registra los archivos a servir a partir de un archivo o un directorio
+
+    Args:
+        ruta: Ruta de un export o de un directorio de exports
+
+    Returns:
+        dict: {nombre del dataset: ruta del archivo}
+    """
+    if os.path.isdir(ruta):
+        rutas = [
+            os.path.join(ruta, nombre) for nombre in sorted(os.listdir(ruta))
+            if nombre.lower().endswith(API_EXTENSIONES) and not nombre.startswith('~$')
+        ]
+    else:
+        rutas = [ruta]
+
+    with _BLOQUEO:
+        _ORIGEN['ruta'] = ruta
+        _ARCHIVOS.clear()
+        _ARCHIVOS.update({os.path.splitext(os.path.basename(r))[0]: r for r in rutas})
+        return dict(_ARCHIVOS)
+
+
+def obtener_clave(nombre):
+    """
+    Devuelve la clave (hash del contenido) del archivo de un dataset. Solo
+    se vuelve a leer el archivo si cambió su fecha o su tamaño
+
+    Args:
+        nombre: Nombre del dataset
+
+    Returns:
+        str: Clave del contenido
+    """
+    with _BLOQUEO:
+        ruta = _ARCHIVOS.get(nombre)
+    if ruta is None:
+        raise ErrorNoEncontrado(f"Dataset no encontrado: '{nombre}'")
+
+    estado = os.stat(ruta)
+    firma = (estado.st_mtime_ns, estado.st_size)
+
+    with _BLOQUEO:
+        guardada = _CLAVES.get(ruta)
+    if guardada is not None and guardada[0] == firma:
+        return guardada[1]
+
+    with open(ruta, 'rb') as archivo:
+        clave = calcular_clave(archivo.read())
+    with _BLOQUEO:
+        _CLAVES[ruta] = (firma, clave)
+    return clave
+
+
+def obtener_dataset_api(nombre, clave):
+    """
+    Carga (o reutiliza de la caché compartida) el dataset de un archivo
+
+    Args:
+        nombre: Nombre del dataset
+        clave: Clave del contenido devuelta por obtener_clave
+
+    Returns:
+        dict: Dataset (ver utils.dataset.crear_dataset)
+    """
+    dataset = obtener_dataset(clave)
+    if dataset is not None:
+        return dataset
+
+    with _BLOQUEO:
+        ruta = _ARCHIVOS[nombre]
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+
+    # Las peticiones simultáneas sobre el mismo archivo comparten la carga
+    trabajo = iniciar_ingesta(contenido, os.path.basename(ruta), clave)
+    trabajo.esperar()
+
+    if trabajo.estado != 'terminado':
+        raise ErrorConsulta(trabajo.error or f"No se pudo cargar '{nombre}'")
+    return trabajo.resultado
+
+
+def calcular_etag(clave, ruta, parametros):
+    """
+    ETag de una respuesta: depende solo del contenido del archivo y de la consulta
+
+    Args:
+        clave: Clave del contenido del dataset
+        ruta: Ruta de la petición
+        parametros: dict {parámetro: lista de valores}
+
+    Returns:
+        str: ETag entre comillas
+    """
+    normalizados = json.dumps(
+        [clave, ruta, sorted((nombre, sorted(valores)) for nombre, valores in parametros.items())],
+        ensure_ascii=False
+    )
+    return '"' + hashlib.sha256(normalizados.encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def responder(ruta, parametros):
+    """
+    Resuelve una petición GET
+
+    Args:
+        ruta: Ruta de la petición
+        parametros: dict {parámetro: lista de valores}
+
+    Returns:
+        tuple: (ETag o None, función que genera el cuerpo JSON en bytes)
+    """
+    if ruta == '/datasets':
+        # El catálogo puede cambiar (archivos nuevos): se relee el
+        # directorio y no se usa ETag ni caché
+        nombres = list(registrar_origen(_ORIGEN['ruta']))
+        return None, lambda: _json({
+            nombre: describir_dataset(obtener_dataset_api(nombre, obtener_clave(nombre)))
+            for nombre in nombres
+        })
+
+    if ruta not in CONSULTAS:
+        raise ErrorNoEncontrado(f"Ruta no encontrada: '{ruta}'")
+
+    funcion, parametro_columna = CONSULTAS[ruta]
+    nombre = _unico(parametros, 'dataset')
+    columna = _unico(parametros, parametro_columna)
+    clave = obtener_clave(nombre)
+
+    def _generar():
+        dataset = obtener_dataset_api(nombre, clave)
+        registros = funcion(
+            dataset,
+            columna,
+            agrupacion=_unico(parametros, 'agrupacion', 'promocion'),
+            filtro_promocion=parametros.get('promocion'),
+            filtro_modulo=parametros.get('modulo')
+        )
+        return _json({'dataset': nombre, parametro_columna: columna, 'resultado': registros})
+
+    return calcular_etag(clave, ruta, parametros), _generar
+
+
+def obtener_respuesta(etag, generar):
+    """
+    Devuelve el cuerpo cacheado para un ETag o lo genera y lo guarda
+
+    Args:
+        etag: ETag de la respuesta (None = no cachear)
+        generar: Función que genera el cuerpo
+
+    Returns:
+        bytes: Cuerpo JSON
+    """
+    if etag is None:
+        return generar()
+
+    with _BLOQUEO:
+        cuerpo = _RESPUESTAS.get(etag)
+        if cuerpo is not None:
+            _RESPUESTAS.move_to_end(etag)
+            contar('dashboard_cache_consultas_total', cache='respuestas', resultado='acierto')
+            return cuerpo
+    contar('dashboard_cache_consultas_total', cache='respuestas', resultado='fallo')
+
+    cuerpo = generar()
+
+    with _BLOQUEO:
+        _RESPUESTAS[etag] = cuerpo
+        while len(_RESPUESTAS) > API_CACHE_RESPUESTAS:
+            _RESPUESTAS.popitem(last=False)
+            contar('dashboard_cache_expulsiones_total', cache='respuestas')
+    return cuerpo
+
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    """Atiende las peticiones GET (un hilo por conexión)"""
+
+    server_version = "DashboardKPIs/1.0"
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        parametros = parse_qs(partes.query)
+        ruta = partes.path.rstrip('/') or '/'
+
+        if ruta == '/metrics':
+            enviar_metricas(self)
+            return
+
+        inicio = time.perf_counter()
+        try:
+            etag, generar = responder(ruta, parametros)
+
+            if etag is not None and etag in _etags(self.headers.get('If-None-Match')):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self._medir(ruta, 304, inicio)
+                return
+
+            self._enviar(200, obtener_respuesta(etag, generar), etag)
+            self._medir(ruta, 200, inicio)
+        except ErrorNoEncontrado as e:
+            self._enviar(404, _json({'error': str(e)}))
+            # Las rutas inexistentes no crean series nuevas
+            self._medir(ruta if ruta in CONSULTAS or ruta == '/datasets' else 'otra', 404, inicio)
+        except ErrorConsulta as e:
+            self._enviar(400, _json({'error': str(e)}))
+            self._medir(ruta, 400, inicio)
+        except Exception as e:
+            self._enviar(500, _json({'error': f"Error interno: {str(e)}"}))
+            self._medir(ruta, 500, inicio)
+
+    def _medir(self, ruta, estado, inicio):
+        contar('api_peticiones_total', ruta=ruta, codigo=str(estado))
+        observar('api_peticion_segundos', time.perf_counter() - inicio, ruta=ruta)
+
+    def _enviar(self, estado, cuerpo, etag=None):
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        if etag is not None:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+
+def _unico(parametros, nombre, por_defecto=None):
+    valores = parametros.get(nombre)
+    if not valores:
+        if por_defecto is None:
+            raise ErrorConsulta(f"Falta el parámetro '{nombre}'")
+        return por_defecto
+    return valores[0]
+
+
+def _etags(cabecera):
+    if not cabecera:
+        return set()
+    return {etag.strip().removeprefix('W/') for etag in cabecera.split(',')}
+
+
+def _json(datos):
+    return json.dumps(datos, ensure_ascii=False).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP de consultas de KPIs")
+    parser.add_argument('ruta', help="Export (.xlsx, .csv, .parquet, .json...) o directorio de exports")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--puerto', type=int, default=API_PUERTO)
+    argumentos = parser.parse_args()
+
+    archivos = registrar_origen(argumentos.ruta)
+    if not archivos:
+        parser.error(f"No hay archivos {', '.join(API_EXTENSIONES)} en '{argumentos.ruta}'")
+
+    servidor = ThreadingHTTPServer((argumentos.host, argumentos.puerto), ManejadorAPI)
+    servidor.daemon_threads = True
+    print(f"Sirviendo {len(archivos)} dataset(s) en http://{argumentos.host}:{argumentos.puerto}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,53 +1,155 @@
 """
 Dashboard de KPIs - Aplicación Principal
 """
+import io
+import time
 import streamlit as st
-from config.settings import PAGE_CONFIG, COLUMNAS
-from utils.data_processor import (
-    cargar_y_limpiar_datos, 
-    validar_columnas, 
-    crear_columnas_agrupacion,
-    aplicar_filtros
-)
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from config.settings import PAGE_CONFIG
+from utils.ingesta import calcular_clave, iniciar_ingesta, obtener_trabajo
+from utils.cache_datasets import obtener_dataset, guardar_dataset
+from utils.volcado import registrar_sesion, obtener_dataset_sesion, guardar_dataset_sesion
+from utils.metricas import iniciar_exportacion, contar, medir, observar
+from utils.carpeta import iniciar_vigilancia
 from components.sidebar import (
     mostrar_carga_archivo,
+    mostrar_modo_incremental,
+    mostrar_carga_referencia,
+    mostrar_resultado_incremental,
+    mostrar_progreso_ingesta,
+    mostrar_progreso_provisional,
+    mostrar_tiempos_volcado,
     mostrar_info_archivo,
     mostrar_promociones,
     mostrar_modulos,
-    mostrar_filtros
+    mostrar_etiquetas_unificadas,
+    mostrar_filtros,
+    mostrar_exportar_informes
 )
-from components.tab_kpis import mostrar_tab_kpis
-from components.tab_promocion import mostrar_tab_promocion
-from components.tab_modulo import mostrar_tab_modulo
-from components.tab_datos import mostrar_tab_datos
-from components.tab_agrupados import mostrar_tab_agrupados
 
 
+# Exports de la carpeta del servidor (CARPETA_DATOS): se precargan desde la
+# primera ejecución del proceso, sin esperar a que alguien elija ese origen
+iniciar_vigilancia()
+
+# Métricas de operación (ver utils/metricas.py): el servidor o el archivo
+# se inician una vez por proceso
+iniciar_exportacion()
+contar('dashboard_reruns_total')
+inicio_rerun = time.perf_counter()
+
 # Configuración de la página
 st.set_page_config(**PAGE_CONFIG)
 
 # Título
 st.title("📊 Dashboard de KPIs")
 
+# Datos de la sesión (se vuelcan a disco si la sesión queda inactiva)
+sesion = registrar_sesion(get_script_run_ctx().session_id)
+
 # Sidebar - Carga de archivo
 uploaded_file = mostrar_carga_archivo()
+modo_incremental = mostrar_modo_incremental()
+archivo_referencia = mostrar_carga_referencia()
 
 if uploaded_file is not None:
-    # Cargar y procesar datos
-    df = cargar_y_limpiar_datos(uploaded_file)
+    # Imports diferidos: pandas solo se carga cuando hay un archivo, así la
+    # pantalla inicial no paga su coste (ver benchmarks/arranque.py)
+    from utils.data_processor import cargar_delta, crear_columnas_agrupacion
+    from utils.dataset import actualizar_dataset
+    from utils.etiquetas import normalizar_grupos
+    from utils.vista import crear_vista
     
-    # Validar columnas
-    es_valido, mensaje_error, tiene_modulo = validar_columnas(df)
+    # Los exports de la carpeta del servidor ya traen la clave de su contenido
+    origen = getattr(uploaded_file, 'clave', None) or calcular_clave(uploaded_file.getvalue())
+    dataset = obtener_dataset_sesion(sesion)
+    provisional = False
     
-    if not es_valido:
-        st.error(mensaje_error)
-        st.stop()
+    # Solo se procesa el archivo si es distinto del ya cargado
+    if dataset is None or dataset['origen'] != origen:
+        if st.session_state.get('ingesta_cancelada') == origen:
+            st.info("✖️ Carga cancelada. Sube otro archivo o vuelve a intentarlo.")
+            if st.button("🔄 Reintentar carga"):
+                # Sin la clave de la ingesta, el siguiente rerun llama a
+                # iniciar_ingesta, que reinicia los trabajos cancelados
+                del st.session_state['ingesta_cancelada']
+                st.session_state.pop('ingesta_clave', None)
+                st.rerun()
+            st.stop()
+        
+        df_delta = None
+        dataset_cacheado = obtener_dataset(origen)
+        
+        if dataset_cacheado is None and modo_incremental and dataset is not None:
+            # Cargar solo las filas con Token nuevo
+            with medir('dashboard_etapa_segundos', etapa='delta'):
+                df_delta = cargar_delta(io.BytesIO(uploaded_file.getvalue()), dataset['tokens'], uploaded_file.name)
+            
+            if df_delta is None or not set(df_delta.columns) <= set(dataset['df'].columns):
+                st.sidebar.warning("⚠️ El archivo no es compatible con la carga incremental: se carga completo")
+                df_delta = None
+        
+        if dataset_cacheado is not None:
+            # Este mismo archivo ya se procesó (en esta u otra sesión)
+            dataset = dataset_cacheado
+        elif df_delta is not None:
+            # Las variantes de las filas nuevas se unifican con las etiquetas ya cargadas
+            df_delta, etiquetas = normalizar_grupos(df_delta, dataset['tiene_modulo'], dataset['conteos'])
+            df_delta, _, _ = crear_columnas_agrupacion(df_delta, dataset['tiene_modulo'])
+            dataset = actualizar_dataset(dataset, df_delta, origen, etiquetas)
+            guardar_dataset(origen, dataset)
+            mostrar_resultado_incremental(len(df_delta), len(dataset['df']))
+        else:
+            # Cargar y procesar datos en segundo plano; las subidas repetidas
+            # del mismo archivo se unen al trabajo en curso
+            trabajo = None
+            if st.session_state.get('ingesta_clave') == origen:
+                trabajo = obtener_trabajo(origen)
+            if trabajo is None:
+                trabajo = iniciar_ingesta(uploaded_file.getvalue(), uploaded_file.name, origen)
+                st.session_state['ingesta_clave'] = origen
+            
+            # Los exports grandes tienen resultados provisionales (muestra
+            # estratificada) mientras se calcula el dataset completo
+            provisional = trabajo.activo and trabajo.provisional is not None
+            
+            if trabajo.activo and not provisional:
+                st.info(f"⏳ Procesando '{uploaded_file.name}'... El resumen aparecerá en la barra lateral.")
+                with st.sidebar:
+                    mostrar_progreso_ingesta(trabajo)
+                st.stop()
+            
+            if provisional:
+                with st.sidebar:
+                    mostrar_progreso_provisional(trabajo)
+                dataset = trabajo.provisional
+            else:
+                if trabajo.estado == 'cancelado':
+                    st.session_state['ingesta_cancelada'] = origen
+                    st.rerun()
+                
+                if trabajo.estado == 'error':
+                    st.error(trabajo.error)
+                    st.stop()
+                
+                dataset = trabajo.resultado
+        
+        # El provisional no se guarda: el siguiente rerun vuelve a por el completo
+        if not provisional:
+            guardar_dataset_sesion(sesion, dataset)
+    
+    df = dataset['df']
+    tiene_modulo = dataset['tiene_modulo']
+    columnas_excluir = dataset['columnas_excluir']
+    particiones = dataset['particiones']
     
-    # Crear columnas de agrupación
-    df, columnas_agrupacion, columnas_excluir = crear_columnas_agrupacion(df, tiene_modulo)
+    # Los tiempos de recarga solo se muestran en la interacción que la provocó
+    mostrar_tiempos_volcado(sesion['tiempos'])
+    sesion['tiempos'].pop('recarga_s', None)
     
-    # Mostrar información en sidebar
-    mostrar_info_archivo(uploaded_file, df)
+    # Mostrar información en sidebar (con resultados provisionales, df es la muestra)
+    if not provisional:
+        mostrar_info_archivo(uploaded_file, df)
     
     if tiene_modulo:
         st.sidebar.success("✅ Agrupando por Promoción y Módulo")
@@ -57,68 +159,160 @@ if uploaded_file is not None:
 
 
     # Mostrar promociones y módulos
-    promociones = mostrar_promociones(df)
-    modulos = mostrar_modulos(df) if tiene_modulo else None
+    promociones = mostrar_promociones(df, dataset['conteos']['promocion'])
+    modulos = mostrar_modulos(df, dataset['conteos']['modulo']) if tiene_modulo else None
+    mostrar_etiquetas_unificadas(dataset.get('etiquetas'))
     
         # Filtros
     filtro_promocion, filtro_modulo = mostrar_filtros(promociones, modulos, tiene_modulo)
     
-    # Aplicar filtros
-    df_filtrado = aplicar_filtros(df, filtro_promocion, filtro_modulo, tiene_modulo)
+    # Exportación de informes HTML (solo con los resultados exactos)
+    if not provisional:
+        mostrar_exportar_informes(dataset, promociones, filtro_promocion, filtro_modulo)
     
-    # Crear tabs
-    if tiene_modulo:
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    # Aplicar filtros: solo se calculan las filas; cada pestaña copia las
+    # columnas que usa con el estado actual de sus widgets
+    vista = crear_vista(df, filtro_promocion, filtro_modulo, tiene_modulo)
+    
+    # Export de referencia para la pestaña de cambios (se procesa como
+    # cualquier otro archivo y queda en la caché de datasets)
+    dataset_referencia = None
+    if archivo_referencia is not None and not provisional:
+        # La clave se calcula (y la carga se inicia) una vez por archivo
+        # subido; en los reruns siguientes se busca en la caché o el trabajo
+        referencia = st.session_state.get('referencia')
+        if referencia is None or referencia[0] != archivo_referencia.file_id:
+            referencia = (archivo_referencia.file_id, calcular_clave(archivo_referencia.getvalue()))
+            st.session_state['referencia'] = referencia
+            trabajo_referencia = iniciar_ingesta(archivo_referencia.getvalue(), archivo_referencia.name, referencia[1])
+        else:
+            dataset_referencia = obtener_dataset(referencia[1])
+            trabajo_referencia = obtener_trabajo(referencia[1]) if dataset_referencia is None else None
+            if dataset_referencia is None and trabajo_referencia is None:
+                trabajo_referencia = iniciar_ingesta(archivo_referencia.getvalue(), archivo_referencia.name,
+                                                     referencia[1])
+        
+        if trabajo_referencia is not None:
+            with st.spinner(f"⏳ Procesando el export de referencia '{archivo_referencia.name}'..."):
+                trabajo_referencia.esperar()
+            if trabajo_referencia.estado == 'terminado':
+                dataset_referencia = trabajo_referencia.resultado
+            else:
+                st.sidebar.error(trabajo_referencia.error or "❌ No se pudo cargar el export de referencia")
+    
+    # Las pestañas (y Plotly) se importan cuando ya hay datos que mostrar
+    from components.tab_kpis import mostrar_tab_kpis
+    from components.tab_promocion import mostrar_tab_promocion
+    from components.tab_modulo import mostrar_tab_modulo
+    from components.tab_datos import mostrar_tab_datos
+    from components.tab_agrupados import mostrar_tab_agrupados
+    from components.tab_tendencias import mostrar_tab_tendencias
+    from components.tab_comentarios import mostrar_tab_comentarios
+    from components.tab_cambios import mostrar_tab_cambios
+    
+    # Crear tabs. Las secciones con widgets propios son st.fragment: al
+    # cambiar uno solo se vuelve a ejecutar su sección, no toda la app
+    if provisional:
+        # Solo las pestañas que la muestra estima bien (porcentajes y
+        # estadísticas por grupo); el resto aparece con los datos completos
+        muestra = dataset['provisional']
+        st.warning(f"⏳ Resultados provisionales: muestra estratificada de {muestra['muestra']} de "
+                   f"{muestra['total']} respuestas. Se sustituirán solos por los exactos en cuanto "
+                   f"termine el cálculo completo.")
+        
+        pestanas = st.tabs(
+            ["📈 KPIs Principales", "📊 Análisis por Promoción"]
+            + (["📚 Análisis por Módulo"] if tiene_modulo else [])
+        )
+        
+        with pestanas[0]:
+            mostrar_tab_kpis(dataset, filtro_promocion, filtro_modulo)
+        
+        with pestanas[1]:
+            mostrar_tab_promocion(vista, columnas_excluir)
+        
+        if tiene_modulo:
+            with pestanas[2]:
+                mostrar_tab_modulo(vista, columnas_excluir)
+    elif tiene_modulo:
+        tab1, tab2, tab3, tab6, tab7, tab8, tab4, tab5 = st.tabs([
             "📈 KPIs Principales", 
             "📊 Análisis por Promoción", 
             "📚 Análisis por Módulo",
+            "📅 Tendencias",
+            "💬 Comentarios",
+            "🆚 Cambios",
             "📋 Datos", 
             "🔢 Datos Agrupados"
         ])
         
         with tab1:
-            mostrar_tab_kpis(df_filtrado, tiene_modulo, columnas_excluir)
+            mostrar_tab_kpis(dataset, filtro_promocion, filtro_modulo)
         
         with tab2:
-            mostrar_tab_promocion(df_filtrado, columnas_excluir)
+            mostrar_tab_promocion(vista, columnas_excluir)
         
         with tab3:
-            mostrar_tab_modulo(df_filtrado, columnas_excluir)
+            mostrar_tab_modulo(vista, columnas_excluir)
+        
+        with tab6:
+            mostrar_tab_tendencias(df, particiones, tiene_modulo, columnas_excluir,
+                                   filtro_promocion, filtro_modulo)
+        
+        with tab7:
+            mostrar_tab_comentarios(dataset, vista, tiene_modulo)
+        
+        with tab8:
+            mostrar_tab_cambios(dataset, dataset_referencia, filtro_promocion, filtro_modulo)
         
         with tab4:
-            mostrar_tab_datos(df_filtrado)
+            mostrar_tab_datos(vista)
         
         with tab5:
-            mostrar_tab_agrupados(df_filtrado, tiene_modulo, columnas_excluir)
+            mostrar_tab_agrupados(dataset, vista, filtro_promocion, filtro_modulo)
     else:
-        tab1, tab2, tab4, tab5 = st.tabs([
+        tab1, tab2, tab6, tab7, tab8, tab4, tab5 = st.tabs([
             "📈 KPIs Principales", 
             "📊 Análisis por Promoción", 
+            "📅 Tendencias",
+            "💬 Comentarios",
+            "🆚 Cambios",
             "📋 Datos", 
             "🔢 Datos Agrupados"
         ])
         
         with tab1:
-            mostrar_tab_kpis(df_filtrado, tiene_modulo, columnas_excluir)
+            mostrar_tab_kpis(dataset, filtro_promocion, filtro_modulo)
         
         with tab2:
-            mostrar_tab_promocion(df_filtrado, columnas_excluir)
+            mostrar_tab_promocion(vista, columnas_excluir)
+        
+        with tab6:
+            mostrar_tab_tendencias(df, particiones, tiene_modulo, columnas_excluir,
+                                   filtro_promocion)
+        
+        with tab7:
+            mostrar_tab_comentarios(dataset, vista, tiene_modulo)
+        
+        with tab8:
+            mostrar_tab_cambios(dataset, dataset_referencia, filtro_promocion)
         
         with tab4:
-            mostrar_tab_datos(df_filtrado)
+            mostrar_tab_datos(vista)
         
         with tab5:
-            mostrar_tab_agrupados(df_filtrado, tiene_modulo, columnas_excluir)
+            mostrar_tab_agrupados(dataset, vista, filtro_promocion)
 
 else:
     # Mensaje inicial
-    st.info("👈 Por favor, sube un archivo Excel desde la barra lateral para comenzar")
+    st.info("👈 Por favor, sube un archivo (Excel, CSV, Parquet o JSON) desde la barra lateral para comenzar")
     
     st.markdown("""
     ### 📝 Instrucciones:
-    1. Sube tu archivo Excel usando el botón en la barra lateral
+    1. Sube tu archivo (Excel, CSV, Parquet o JSON) usando el botón en la barra lateral
     2. El sistema automáticamente:
-       - ✅ Eliminará las columnas "Submitted At" y "Token"
+       - ✅ Usará la columna "Token" para la carga incremental de exports acumulados
+       - ✅ Convertirá "Submitted At" en fecha y particionará los datos por semana
        - ✅ Usará la columna de promoción como índice
        - ✅ Agrupará por módulo (si existe)
        - ✅ **Calculará porcentajes DENTRO de cada promoción/módulo**
@@ -129,7 +323,12 @@ else:
     - ✅ Agrupación por Promoción y Módulo
     - ✅ KPIs calculados por grupo (Media y Mediana)
     - ✅ **Análisis de satisfacción en porcentajes POR PROMOCIÓN**
+    - ✅ Tendencias semanales con medias y porcentajes móviles
     - ✅ Gráficos interactivos
     - ✅ Filtrado dinámico
     - ✅ Descarga de resultados
-    """)
\ No newline at end of file
+    """)
+
+# Los reruns que se detienen antes (carga en curso, errores) no se miden
+observar('dashboard_rerun_segundos', time.perf_counter() - inicio_rerun,
+         pantalla='portada' if uploaded_file is None else 'provisional' if provisional else 'dashboard')
@@ -0,0 +1,174 @@
+"""
+Benchmark de arranque en frío
+
+Mide, en un intérprete nuevo por módulo, cuánto cuesta importar cada
+módulo del proyecto (además de Streamlit, que la app siempre importa) y
+qué librerías pesadas arrastra. Después renderiza la pantalla inicial de
+app.py (sin archivo) y comprueba que no carga pandas ni plotly.express y
+que cabe en el presupuesto de tiempo.
+
+Uso:
+    python benchmarks/arranque.py
+    python benchmarks/arranque.py --repeticiones 5 --presupuesto-ms 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS = [
+    'config.settings',
+    'utils.metricas',
+    'utils.cache_datasets',
+    'utils.ingesta',
+    'utils.carpeta',
+    'utils.volcado',
+    'utils.vista',
+    'utils.etiquetas',
+    'utils.muestreo',
+    'utils.data_processor',
+    'utils.lectores',
+    'utils.calculations',
+    'utils.agregados',
+    'utils.kpis',
+    'utils.bootstrap',
+    'utils.comparacion',
+    'utils.frecuentes',
+    'utils.comentarios',
+    'utils.diferencias',
+    'utils.dataset',
+    'utils.tendencias',
+    'utils.graficos',
+    'utils.informes',
+    'utils.exportacion',
+    'components.sidebar',
+    'components.resumen_preguntas',
+    'components.tab_kpis',
+    'components.tab_promocion',
+    'components.tab_modulo',
+    'components.tab_datos',
+    'components.tab_agrupados',
+    'components.tab_tendencias',
+    'components.tab_comentarios',
+    'components.tab_cambios',
+]
+
+# Librerías que la pantalla inicial no debe cargar
+PESADAS = ['pandas', 'numpy', 'plotly.express', 'scipy', 'pyarrow', 'openpyxl']
+
+_MEDIR_IMPORT = """
+import json, sys, time
+import streamlit
+t = time.perf_counter()
+import {modulo}
+ms = (time.perf_counter() - t) * 1000
+print(json.dumps({{'ms': ms, 'pesadas': [m for m in {pesadas!r} if m in sys.modules]}}))
+"""
+
+_MEDIR_PORTADA = """
+import json, sys, time
+t = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+base = set(sys.modules)
+t_app = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+ms = (time.perf_counter() - t_app) * 1000
+print(json.dumps({{
+    'ms': ms,
+    'ms_total': (time.perf_counter() - t) * 1000,
+    'errores': [str(e.value) for e in at.exception],
+    'pesadas': [m for m in {pesadas!r} if m in sys.modules and m not in base]
+}}))
+"""
+
+
+def ejecutar(codigo):
+    """Ejecuta código en un intérprete nuevo desde la raíz del proyecto y devuelve su JSON"""
+    salida = subprocess.run(
+        [sys.executable, '-c', codigo],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def medir_imports(repeticiones):
+    """
+    Mide el coste de importar cada módulo con Streamlit ya cargado
+
+    Args:
+        repeticiones: Intérpretes nuevos por módulo (se toma la mediana)
+
+    Returns:
+        list: [(módulo, ms, librerías pesadas cargadas)] ordenada de mayor a menor
+    """
+    resultados = []
+    for modulo in MODULOS:
+        medidas = [
+            ejecutar(_MEDIR_IMPORT.format(modulo=modulo, pesadas=PESADAS))
+            for _ in range(repeticiones)
+        ]
+        resultados.append((
+            modulo,
+            statistics.median(m['ms'] for m in medidas),
+            medidas[0]['pesadas']
+        ))
+    return sorted(resultados, key=lambda r: r[1], reverse=True)
+
+
+def medir_portada(repeticiones):
+    """
+    Renderiza la pantalla inicial de app.py en intérpretes nuevos
+
+    Args:
+        repeticiones: Número de arranques (se toma la mediana)
+
+    Returns:
+        dict: ms (mediana del render), errores y librerías pesadas cargadas
+    """
+    codigo = _MEDIR_PORTADA.format(app=os.path.join(RAIZ, 'app.py'), pesadas=PESADAS)
+    medidas = [ejecutar(codigo) for _ in range(repeticiones)]
+    return {
+        'ms': statistics.median(m['ms'] for m in medidas),
+        'errores': medidas[0]['errores'],
+        'pesadas': sorted(set().union(*(m['pesadas'] for m in medidas)))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--presupuesto-ms', type=float, default=1500,
+                        help="Tiempo máximo para renderizar la pantalla inicial")
+    argumentos = parser.parse_args()
+
+    print(f"Import por módulo (con Streamlit ya cargado, mediana de {argumentos.repeticiones}):")
+    for modulo, ms, pesadas in medir_imports(argumentos.repeticiones):
+        print(f"  {modulo:<32} {ms:8.1f} ms   {', '.join(pesadas) or '-'}")
+
+    portada = medir_portada(argumentos.repeticiones)
+    print(f"\nPantalla inicial (app.py sin archivo): {portada['ms']:.1f} ms "
+          f"(presupuesto: {argumentos.presupuesto_ms:.0f} ms)")
+    print(f"  Librerías pesadas cargadas: {', '.join(portada['pesadas']) or 'ninguna'}")
+
+    fallos = []
+    if portada['errores']:
+        fallos.append(f"errores al renderizar: {portada['errores']}")
+    if portada['pesadas']:
+        fallos.append(f"la pantalla inicial carga {', '.join(portada['pesadas'])}")
+    if portada['ms'] > argumentos.presupuesto_ms:
+        fallos.append("se supera el presupuesto de tiempo")
+
+    for fallo in fallos:
+        print(f"❌ {fallo}")
+    if not fallos:
+        print("✅ Dentro del presupuesto")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
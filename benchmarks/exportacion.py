@@ -0,0 +1,101 @@
+"""
+Benchmark de la exportación completa de Datos Agrupados
+
+Compara, sobre un dataset sintético, exportar una a una todas las
+combinaciones agrupación x agregación como hasta ahora (una agrupación y un
+libro Excel por combinación, igual que la pestaña) con la exportación
+completa de utils.exportacion (agregados compartidos y un solo libro en
+modo write_only, o un zip de Parquet). Comprueba además que las tablas
+calculadas coinciden con las de la pestaña.
+
+Uso:
+    python benchmarks/exportacion.py
+    python benchmarks/exportacion.py --filas 50000 --repeticiones 5
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import pandas as pd
+from benchmarks.formatos import generar_dataset
+from config.settings import AGREGACIONES
+from utils.agregados import calcular_cubo
+from utils.data_processor import crear_columnas_agrupacion, obtener_columnas_numericas
+from utils.exportacion import AGRUPACIONES, calcular_agrupados, crear_exportacion
+
+
+def exportar_por_separado(df, columnas):
+    """
+    Exporta cada combinación como la pestaña de Datos Agrupados
+
+    Returns:
+        dict: {(agrupación, agregación): DataFrame}
+    """
+    tablas = {}
+    for agrupacion, claves in AGRUPACIONES.items():
+        for agregacion, funcion in AGREGACIONES.items():
+            tabla = df.groupby(claves)[columnas].agg(funcion).reset_index()
+            tabla = tabla.rename(columns={col: f"{col} ({agregacion})" for col in columnas})
+            buffer = io.BytesIO()
+            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+                tabla.to_excel(writer, index=False, sheet_name='Datos Agrupados')
+            tablas[(agrupacion, agregacion)] = tabla
+    return tablas
+
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de varias ejecuciones de una función y su último resultado"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la exportación completa")
+    parser.add_argument('--filas', type=int, default=10000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    argumentos = parser.parse_args()
+
+    df, _, columnas_excluir = crear_columnas_agrupacion(generar_dataset(argumentos.filas), True)
+    columnas = obtener_columnas_numericas(df, columnas_excluir)
+    cubo = calcular_cubo(df, True, columnas_excluir)
+    print(f"Dataset sintético: {len(df)} filas, {len(columnas)} columnas numéricas, "
+          f"{len(AGRUPACIONES) * len(AGREGACIONES)} combinaciones "
+          f"(mediana de {argumentos.repeticiones})\n")
+
+    ms_separado, tablas_separado = medir(lambda: exportar_por_separado(df, columnas), argumentos.repeticiones)
+    ms_agrupados, tablas = medir(lambda: calcular_agrupados(df, columnas, True), argumentos.repeticiones)
+    print(f"  {'una a una (Excel por combinación)':<40} {ms_separado:9.1f} ms")
+    print(f"  {'tablas compartidas (sin escribir)':<40} {ms_agrupados:9.1f} ms")
+    for formato in ('Excel', 'Parquet (zip)'):
+        ms, contenido = medir(
+            lambda: crear_exportacion(df, columnas, True, cubo, formato=formato), argumentos.repeticiones
+        )
+        print(f"  {f'exportación completa ({formato})':<40} {ms:9.1f} ms "
+              f"{ms_separado / ms:6.1f}x  {len(contenido) / 2**20:6.1f} MB")
+
+    distintas = []
+    for combinacion, esperada in tablas_separado.items():
+        try:
+            pd.testing.assert_frame_equal(tablas[combinacion], esperada, check_dtype=False)
+        except AssertionError:
+            distintas.append(' - '.join(combinacion))
+
+    if distintas:
+        print(f"❌ Tablas distintas de las de la pestaña: {', '.join(distintas)}")
+    else:
+        print("\n✅ Las tablas coinciden con las de la pestaña")
+    sys.exit(1 if distintas else 0)
+
+
+if __name__ == '__main__':
+    main()
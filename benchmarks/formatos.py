@@ -0,0 +1,144 @@
+"""
+Benchmark de carga por formato
+
+Genera un dataset sintético con la forma de la encuesta (promoción,
+módulo, preguntas de opción y preguntas numéricas), lo guarda en cada
+formato admitido que se puede escribir y mide la carga completa de cada
+archivo: lectura con su lector, limpieza y validación de columnas.
+Comprueba además que todos los formatos producen los mismos datos.
+
+Uso:
+    python benchmarks/formatos.py
+    python benchmarks/formatos.py --filas 50000 --repeticiones 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np
+import pandas as pd
+from config.settings import COLUMNAS
+from utils.data_processor import cargar_y_limpiar_datos, validar_columnas
+
+# Formato -> función que escribe el DataFrame en la ruta (.xls no se puede
+# escribir con las librerías actuales y no se mide)
+ESCRITORES = {
+    'xlsx': lambda df, ruta: df.to_excel(ruta, index=False),
+    'csv': lambda df, ruta: df.to_csv(ruta, index=False),
+    'tsv': lambda df, ruta: df.to_csv(ruta, index=False, sep='\t'),
+    'parquet': lambda df, ruta: df.to_parquet(ruta, index=False),
+    'feather': lambda df, ruta: df.to_feather(ruta),
+    'json': lambda df, ruta: df.to_json(ruta, orient='records', date_format='iso', force_ascii=False),
+    'jsonl': lambda df, ruta: df.to_json(ruta, orient='records', date_format='iso', force_ascii=False,
+                                         lines=True),
+}
+
+
+def generar_dataset(filas, preguntas=95, semilla=0):
+    """
+    Genera respuestas sintéticas con las columnas de la encuesta
+
+    Args:
+        filas: Número de respuestas
+        preguntas: Número de preguntas numéricas (1-10, con un 10% sin respuesta)
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        pd.DataFrame: Dataset sintético
+    """
+    generador = np.random.default_rng(semilla)
+    datos = {
+        COLUMNAS['fecha']: pd.Timestamp('2025-01-06')
+                           + pd.to_timedelta(generador.integers(0, 120 * 24 * 3600, filas), unit='s'),
+        COLUMNAS['token']: [f'tok{i:07d}' for i in range(filas)],
+        COLUMNAS['promocion']: generador.choice([f'Promo {letra}' for letra in 'ABCDEFGH'], filas),
+        COLUMNAS['modulo']: generador.choice([f'Módulo {i}' for i in range(1, 5)], filas),
+        COLUMNAS['expectativas']: generador.choice(['Sí', 'No', 'Parcialmente'], filas),
+        COLUMNAS['recomendacion']: generador.choice(['Sí', 'No', 'Tal vez'], filas),
+    }
+    for i in range(preguntas):
+        valores = generador.integers(1, 11, filas).astype(float)
+        valores[generador.random(filas) < 0.1] = np.nan
+        datos[f'Pregunta {i}'] = valores
+    return pd.DataFrame(datos)
+
+
+def medir(ruta, repeticiones):
+    """
+    Carga un archivo varias veces con el mismo camino que la aplicación
+
+    Args:
+        ruta: Ruta del archivo (el formato se elige por la extensión)
+        repeticiones: Número de cargas (se toma la mediana)
+
+    Returns:
+        tuple: (ms de la mediana, DataFrame cargado)
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        df = cargar_y_limpiar_datos(ruta)
+        es_valido, mensaje_error, _ = validar_columnas(df)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        if not es_valido:
+            raise ValueError(f"{ruta}: {mensaje_error}")
+    return statistics.median(tiempos), df
+
+
+def comparar(df, referencia):
+    """Diferencias de forma y contenido entre un DataFrame cargado y la referencia"""
+    if list(df.columns) != list(referencia.columns) or len(df) != len(referencia):
+        return "columnas o filas distintas"
+    numericas = referencia.select_dtypes('number').columns
+    if not np.allclose(df[numericas].to_numpy(float), referencia[numericas].to_numpy(float), equal_nan=True):
+        return "valores numéricos distintos"
+    fechas = pd.to_datetime(df[COLUMNAS['fecha']]).dt.tz_localize(None)
+    if not (fechas.to_numpy('datetime64[s]') == referencia[COLUMNAS['fecha']].to_numpy('datetime64[s]')).all():
+        return "fechas distintas"
+    texto = [col for col in referencia.columns if col not in numericas and col != COLUMNAS['fecha']]
+    if not df[texto].astype(str).equals(referencia[texto].astype(str)):
+        return "textos distintos"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga por formato")
+    parser.add_argument('--filas', type=int, default=10000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    argumentos = parser.parse_args()
+
+    referencia = generar_dataset(argumentos.filas)
+    print(f"Dataset sintético: {len(referencia)} filas x {len(referencia.columns)} columnas "
+          f"(mediana de {argumentos.repeticiones} cargas)\n")
+    print(f"  {'formato':<9} {'tamaño':>10} {'carga':>11} {'vs xlsx':>9}")
+
+    fallos = []
+    base_ms = None
+    with tempfile.TemporaryDirectory() as directorio:
+        for formato, escribir in ESCRITORES.items():
+            ruta = os.path.join(directorio, f'encuesta.{formato}')
+            escribir(referencia, ruta)
+
+            ms, df = medir(ruta, argumentos.repeticiones)
+            base_ms = base_ms or ms
+            print(f"  {formato:<9} {os.path.getsize(ruta) / 2**20:8.1f} MB {ms:8.1f} ms {base_ms / ms:8.1f}x")
+
+            diferencia = comparar(df, referencia)
+            if diferencia:
+                fallos.append(f"{formato}: {diferencia}")
+
+    for fallo in fallos:
+        print(f"❌ {fallo}")
+    if not fallos:
+        print("\n✅ Todos los formatos producen los mismos datos")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Comparación estadística entre dos cohortes en todas las preguntas
+"""
+import time
+import streamlit as st
+from config.settings import COLUMNAS, COMPARACION_ALFA
+from utils.calculations import necesita_filtro_modulo
+from utils.comparacion import comparar_cohortes
+from utils.metricas import cronometrado
+from components.tablas import mostrar_tabla
+
+
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='comparacion_cohortes')
+def mostrar_comparacion_cohortes(vista, numeric_columns, categorical_cols, grupo_col, nombre_grupo, key):
+    """
+    Muestra la comparación entre dos grupos seleccionados: pruebas de
+    significación en todas las preguntas, ordenadas por p-valor ajustado
+
+    Args:
+        vista: Vista filtrada del dataset (utils.vista.VistaFiltrada)
+        numeric_columns: Columnas numéricas a comparar
+        categorical_cols: Columnas categóricas a comparar
+        grupo_col: Columna por la que agrupar
+        nombre_grupo: Nombre del grupo ('Promoción' o 'Módulo')
+        key: Prefijo para las claves de los widgets
+    """
+    st.subheader(f"⚖️ Comparación entre dos Cohortes ({nombre_grupo})")
+
+    grupos = [grupo for grupo in vista.columnas([grupo_col])[grupo_col].dropna().unique()]
+    if len(grupos) < 2:
+        st.info(f"Selecciona al menos dos valores de {nombre_grupo.lower()} en los filtros para comparar")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        cohorte_a = st.selectbox(f"{nombre_grupo} A", grupos, index=0, key=f'{key}_comparar_a')
+    with col2:
+        cohorte_b = st.selectbox(f"{nombre_grupo} B", grupos, index=1, key=f'{key}_comparar_b')
+
+    if cohorte_a == cohorte_b:
+        st.warning("⚠️ Selecciona dos cohortes distintas")
+        return
+
+    # Preguntas que solo se analizan en un módulo concreto
+    filtros_modulo = {}
+    if COLUMNAS['modulo'] in vista.columns:
+        for columna in categorical_cols:
+            necesita_filtro, valor_modulo, _ = necesita_filtro_modulo(columna)
+            if necesita_filtro and valor_modulo:
+                filtros_modulo[columna] = (COLUMNAS['modulo'], valor_modulo)
+
+    inicio = time.perf_counter()
+    resultado = comparar_cohortes(
+        vista.columnas([grupo_col, COLUMNAS['modulo']] + numeric_columns + categorical_cols), grupo_col, cohorte_a, cohorte_b,
+        numeric_columns, categorical_cols, filtros_modulo=filtros_modulo
+    )
+    duracion = time.perf_counter() - inicio
+
+    if resultado is None:
+        st.info("No hay datos suficientes para comparar estas cohortes")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Pruebas", len(resultado))
+    with col2:
+        st.metric("Diferencias significativas", int(resultado['Significativa'].sum()))
+    with col3:
+        st.metric("Tiempo de cálculo", f"{duracion * 1000:,.0f} ms")
+
+    if st.checkbox("Mostrar solo diferencias significativas", key=f'{key}_comparar_signif'):
+        resultado = resultado[resultado['Significativa']]
+
+    mostrar_tabla(
+        resultado,
+        {
+            'Estadístico': '%.3f',
+            'p': '%.4f',
+            'p ajustado': '%.4f',
+            'n A': 'conteo',
+            'n B': 'conteo',
+            'A': 'decimal',
+            'B': 'decimal',
+            'Efecto': '%.3f'
+        },
+        height=400
+    )
+    st.caption(
+        f"💡 p ajustado por comparaciones múltiples (Benjamini-Hochberg); significativa si < {COMPARACION_ALFA}. "
+        "'A' y 'B' son las medias de cada cohorte; 'Efecto' es la diferencia de medias (A − B) "
+        "en las preguntas numéricas y la V de Cramér en las categóricas."
+    )
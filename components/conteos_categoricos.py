@@ -0,0 +1,62 @@
+"""
+Conteos de una columna categórica por grupo (tabla y gráfico apilado)
+"""
+import streamlit as st
+import plotly.express as px
+from config.settings import TOPK_UMBRAL_VALORES, TOPK_VALORES, TOPK_CAPACIDAD, TOPK_ETIQUETA_OTROS
+from utils.frecuentes import resumen_frecuentes, conteos_por_grupo
+from components.tablas import mostrar_tabla
+
+
+def mostrar_conteos_categoricos(df_filtrado, col_categorica, grupo_col, nombre_grupo, key):
+    """
+    Muestra los conteos de una columna categórica por grupo. Si la columna
+    tiene muchos valores distintos solo se muestran los más frecuentes y
+    el resto se agrupa en 'Otros'
+
+    Args:
+        df_filtrado: DataFrame filtrado
+        col_categorica: Columna categórica a contar
+        grupo_col: Columna de grupo (filas de la tabla)
+        nombre_grupo: Nombre del grupo en los títulos ('Promoción', 'Módulo')
+        key: Prefijo de las claves de los widgets
+    """
+    resumen = resumen_frecuentes(df_filtrado[col_categorica])
+    frecuentes = None
+
+    if len(resumen) > TOPK_UMBRAL_VALORES:
+        distintos = f"más de {TOPK_CAPACIDAD}" if len(resumen) >= TOPK_CAPACIDAD else str(len(resumen))
+        st.info(
+            f"ℹ️ '{col_categorica}' tiene {distintos} valores distintos: se muestran los más "
+            f"frecuentes y el resto se agrupa en '{TOPK_ETIQUETA_OTROS}'"
+        )
+        k = st.slider(
+            "Valores más frecuentes a mostrar",
+            min_value=1,
+            max_value=TOPK_UMBRAL_VALORES,
+            value=TOPK_VALORES,
+            key=f'{key}_topk'
+        )
+        frecuentes = resumen.index[:k]
+
+    crosstab = conteos_por_grupo(df_filtrado, col_categorica, grupo_col, frecuentes)
+    mostrar_tabla(crosstab, por_defecto='conteo')
+
+    try:
+        crosstab_reset = crosstab.reset_index()
+        value_columns = crosstab.columns.tolist()
+
+        if len(value_columns) > 0:
+            fig_cat = px.bar(
+                crosstab_reset,
+                x=grupo_col,
+                y=value_columns,
+                title=f'Distribución de {col_categorica} por {nombre_grupo}',
+                barmode='stack'
+            )
+            st.plotly_chart(fig_cat, use_container_width=True)
+        else:
+            st.warning("⚠️ No hay suficientes datos para generar el gráfico")
+    except Exception as e:
+        st.warning(f"⚠️ No se pudo generar el gráfico: {str(e)}")
+        st.info("La tabla de datos sigue siendo visible arriba.")
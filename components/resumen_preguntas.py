@@ -0,0 +1,59 @@
+"""
+Resumen de todas las preguntas numéricas por grupo
+"""
+import streamlit as st
+from utils.calculations import calcular_resumen_preguntas
+from utils.graficos import crear_figura_resumen_preguntas
+from utils.metricas import cronometrado
+from components.tablas import mostrar_tabla
+
+
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='resumen_preguntas')
+def mostrar_resumen_preguntas(df_filtrado, numeric_columns, grupo_col, nombre_grupo, key):
+    """
+    Muestra un mapa de calor pregunta x grupo y un ranking de preguntas
+    calculados en una sola agrupación sobre todas las columnas numéricas
+
+    Args:
+        df_filtrado: DataFrame filtrado
+        numeric_columns: Lista de columnas numéricas a resumir
+        grupo_col: Columna por la que agrupar
+        nombre_grupo: Nombre del grupo ('Promoción' o 'Módulo')
+        key: Prefijo para las claves de los widgets
+    """
+    st.subheader(f"🧮 Resumen de Todas las Preguntas por {nombre_grupo}")
+
+    resumen = calcular_resumen_preguntas(df_filtrado, numeric_columns, grupo_col, nombre_grupo)
+
+    if resumen is None or len(resumen) == 0:
+        st.info("No hay datos suficientes para el resumen")
+        return
+
+    metrica = st.radio(
+        "Métrica",
+        ['Media', 'Mediana', 'Tasa de respuesta (%)', 'Cantidad'],
+        horizontal=True,
+        key=f'{key}_resumen_metrica'
+    )
+
+    tabla = resumen.pivot(index='Pregunta', columns=nombre_grupo, values=metrica)
+    tabla = tabla.reindex(numeric_columns)
+
+    # Mapa de calor pregunta x grupo
+    fig = crear_figura_resumen_preguntas(tabla, nombre_grupo, metrica)
+    st.plotly_chart(fig, use_container_width=True)
+
+    # Ranking de preguntas (la tabla se puede ordenar por cualquier columna)
+    ranking = tabla.copy()
+    ranking.insert(0, 'Global', resumen.groupby('Pregunta')[metrica].mean().reindex(tabla.index))
+    ranking.insert(1, 'Diferencia máx.', tabla.max(axis=1) - tabla.min(axis=1))
+    ranking = ranking.sort_values('Global', ascending=False)
+
+    st.markdown(f"**Ranking de preguntas por {metrica.lower()}**")
+    formato = {'Cantidad': 'conteo', 'Tasa de respuesta (%)': 'porcentaje'}.get(metrica, 'decimal')
+    mostrar_tabla(ranking, {'Global': 'decimal'}, por_defecto=formato, height=400)
+    st.caption(
+        "💡 'Global' es la media de la métrica entre grupos; "
+        "'Diferencia máx.' es la distancia entre el mejor y el peor grupo"
+    )
@@ -1,22 +1,192 @@
 """
 Componentes del sidebar
 """
+from datetime import datetime
 import streamlit as st
-from config.settings import COLUMNAS
+from config.settings import COLUMNAS, INGESTA_INTERVALO_PROGRESO, FORMATOS_ENTRADA, CARPETA_DATOS
+from utils.carpeta import ArchivoCarpeta, listar_exports
 
 
 def mostrar_carga_archivo():
     """
-    Muestra el componente de carga de archivo
+    Muestra el componente de carga de archivo. Si hay una carpeta de datos
+    configurada (CARPETA_DATOS), permite elegir también uno de sus exports
     
     Returns:
-        uploaded_file: Archivo subido o None
+        uploaded_file: Archivo subido, export de la carpeta (ArchivoCarpeta) o None
     """
     st.sidebar.header("Cargar datos")
-    uploaded_file = st.sidebar.file_uploader("Sube tu archivo Excel", type=['xlsx', 'xls'])
+    
+    if CARPETA_DATOS:
+        origen = st.sidebar.radio(
+            "Origen de los datos",
+            ['Subir archivo', 'Carpeta del servidor'],
+            horizontal=True,
+            key='origen_datos'
+        )
+        if origen == 'Carpeta del servidor':
+            return _mostrar_exports_carpeta()
+    
+    uploaded_file = st.sidebar.file_uploader(
+        "Sube tu archivo (Excel, CSV, Parquet o JSON)",
+        type=FORMATOS_ENTRADA
+    )
     return uploaded_file
 
 
+def _mostrar_exports_carpeta():
+    """Lista los exports de la carpeta de datos y devuelve el elegido"""
+    exports = listar_exports()
+    
+    if not exports:
+        st.sidebar.info(f"📂 Buscando exports en '{CARPETA_DATOS}'...")
+        return None
+    
+    iconos = {'listo': '✅', 'cargando': '⏳', 'pendiente': '📄', 'error': '❌'}
+    por_ruta = {entrada['ruta']: entrada for entrada in exports}
+    ruta = st.sidebar.selectbox(
+        "Export",
+        list(por_ruta),
+        format_func=lambda ruta: (
+            f"{iconos[por_ruta[ruta]['estado']]} {por_ruta[ruta]['nombre']} "
+            f"({datetime.fromtimestamp(por_ruta[ruta]['modificado']):%d/%m/%Y %H:%M})"
+        ),
+        key='export_carpeta'
+    )
+    st.sidebar.caption("✅ Listo para abrir al instante · ⏳ Cargándose · 📄 Se carga al abrirlo")
+    
+    entrada = por_ruta[ruta]
+    if entrada['estado'] == 'error':
+        st.sidebar.error(entrada['error'])
+        return None
+    return ArchivoCarpeta(entrada['ruta'], entrada['clave'])
+
+
+def mostrar_modo_incremental():
+    """
+    Muestra la opción de carga incremental por Token
+    
+    Returns:
+        bool: Si está activado el modo incremental
+    """
+    return st.sidebar.checkbox(
+        "Carga incremental (por Token)",
+        value=False,
+        key='modo_incremental',
+        help="Con exports acumulados, procesa solo las respuestas cuyo Token no se ha cargado todavía"
+    )
+
+
+def mostrar_carga_referencia():
+    """
+    Muestra la carga opcional de un export anterior con el que comparar
+    
+    Returns:
+        uploaded_file: Archivo de referencia subido o None
+    """
+    return st.sidebar.file_uploader(
+        "Export de referencia (opcional)",
+        type=FORMATOS_ENTRADA,
+        key='archivo_referencia',
+        help="Un export anterior de la misma encuesta: la pestaña 'Cambios' muestra qué ha cambiado desde entonces"
+    )
+
+
+def mostrar_resultado_incremental(filas_nuevas, total_filas):
+    """
+    Muestra cuántas filas nuevas se añadieron en la carga incremental
+    
+    Args:
+        filas_nuevas: Número de filas añadidas
+        total_filas: Número total de filas tras la carga
+    """
+    st.sidebar.success(f"➕ {filas_nuevas} respuestas nuevas añadidas ({total_filas} en total)")
+
+
+def mostrar_progreso_ingesta(trabajo):
+    """
+    Muestra el progreso de la carga en segundo plano y un resumen parcial
+    en cuanto se conocen la cabecera y las columnas de agrupación.
+    Se actualiza sola y relanza la app al terminar la carga.
+    
+    Debe llamarse dentro de `with st.sidebar:`.
+    
+    Args:
+        trabajo: TrabajoIngesta en curso
+    """
+    @st.fragment(run_every=INGESTA_INTERVALO_PROGRESO)
+    def _progreso():
+        if not trabajo.activo:
+            st.rerun()
+        
+        st.header("Cargando datos")
+        
+        progreso = trabajo.progreso
+        if trabajo.filas_estimadas:
+            texto = f"⏳ {trabajo.filas_leidas} de ~{trabajo.filas_estimadas} filas leídas"
+        else:
+            texto = f"⏳ {trabajo.filas_leidas} filas leídas"
+        st.progress(progreso or 0.0, text=texto)
+        
+        if st.button("✖️ Cancelar carga", key='cancelar_ingesta'):
+            trabajo.cancelar()
+            st.session_state['ingesta_cancelada'] = trabajo.clave
+            st.rerun()
+        
+        if trabajo.cabecera is not None:
+            st.info(f"Columnas: {len(trabajo.cabecera)}")
+            
+            conteos = trabajo.conteos_parciales
+            titulos = {
+                'promocion': "### 🎯 Promociones encontradas:",
+                'modulo': "### 📚 Módulos encontrados:"
+            }
+            for clave, titulo in titulos.items():
+                if clave in conteos:
+                    st.markdown(titulo)
+                    for valor, cantidad in conteos[clave].items():
+                        st.write(f"- {valor}: {cantidad} registros (parcial)")
+    
+    _progreso()
+
+
+def mostrar_progreso_provisional(trabajo):
+    """
+    Indica que se están calculando los resultados exactos mientras se
+    muestran los provisionales. Se actualiza sola y relanza la app para
+    sustituirlos en cuanto terminan.
+    
+    Debe llamarse dentro de `with st.sidebar:`.
+    
+    Args:
+        trabajo: TrabajoIngesta en curso con dataset provisional
+    """
+    @st.fragment(run_every=INGESTA_INTERVALO_PROGRESO)
+    def _progreso():
+        if not trabajo.activo:
+            st.rerun()
+        
+        muestra = trabajo.provisional['provisional']
+        st.info(f"⏳ Calculando los resultados exactos con las {muestra['total']} filas... "
+                f"Se muestran resultados provisionales de una muestra de {muestra['muestra']}.")
+    
+    _progreso()
+
+
+def mostrar_tiempos_volcado(tiempos):
+    """
+    Muestra cuánto tardó el último volcado a disco y la recarga de los datos
+    
+    Args:
+        tiempos: dict con 'volcado_s' y/o 'recarga_s'
+    """
+    if 'recarga_s' in tiempos:
+        texto = f"♻️ Datos recargados de disco en {tiempos['recarga_s']:.2f} s"
+        if 'volcado_s' in tiempos:
+            texto += f" (volcado: {tiempos['volcado_s']:.2f} s)"
+        st.sidebar.caption(texto)
+
+
 def mostrar_info_archivo(uploaded_file, df):
     """
     Muestra información básica del archivo cargado
@@ -29,48 +199,71 @@ def mostrar_info_archivo(uploaded_file, df):
     st.sidebar.info(f"Filas: {len(df)} | Columnas: {len(df.columns)}")
 
 
-def mostrar_promociones(df):
+def mostrar_promociones(df, conteos=None):
     """
     Muestra las promociones encontradas en el sidebar
     
     Args:
         df: DataFrame con los datos
+        conteos: dict {promoción: registros} precalculado (opcional)
         
     Returns:
         list: Lista de promociones únicas
     """
     columna_promocion = COLUMNAS['promocion']
-    promociones = df[columna_promocion].unique().tolist()
+    if conteos is None:
+        conteos = df[columna_promocion].value_counts(sort=False, dropna=False).to_dict()
+    promociones = list(conteos)
     
     st.sidebar.markdown("### 🎯 Promociones encontradas:")
     for promo in promociones:
-        count = (df[columna_promocion] == promo).sum()
-        st.sidebar.write(f"- {promo}: {count} registros")
+        st.sidebar.write(f"- {promo}: {conteos[promo]} registros")
     
     return promociones
 
 
-def mostrar_modulos(df):
+def mostrar_modulos(df, conteos=None):
     """
     Muestra los módulos encontrados en el sidebar
     
     Args:
         df: DataFrame con los datos
+        conteos: dict {módulo: registros} precalculado (opcional)
         
     Returns:
         list: Lista de módulos únicos
     """
     columna_modulo = COLUMNAS['modulo']
-    modulos = df[columna_modulo].unique().tolist()
+    if conteos is None:
+        conteos = df[columna_modulo].value_counts(sort=False, dropna=False).to_dict()
+    modulos = list(conteos)
     
     st.sidebar.markdown("### 📚 Módulos encontrados:")
     for modulo in modulos:
-        count = (df[columna_modulo] == modulo).sum()
-        st.sidebar.write(f"- {modulo}: {count} registros")
+        st.sidebar.write(f"- {modulo}: {conteos[modulo]} registros")
     
     return modulos
 
 
+def mostrar_etiquetas_unificadas(informe):
+    """
+    Muestra las variantes de promoción y módulo unificadas al cargar los datos
+    
+    Args:
+        informe: Lista de fusiones del dataset (ver utils.etiquetas.normalizar_grupos)
+    """
+    if not informe:
+        return
+    
+    nombres = {'promocion': 'Promoción', 'modulo': 'Módulo'}
+    filas = sum(fusion['filas'] for fusion in informe)
+    with st.sidebar.expander(f"🏷️ Etiquetas unificadas ({filas} registros)"):
+        for fusion in informe:
+            variantes = ', '.join(f"'{variante}'" for variante in fusion['variantes'])
+            st.write(f"- {nombres[fusion['columna']]}: {variantes} → "
+                     f"'{fusion['etiqueta']}' ({fusion['filas']} registros)")
+
+
 def mostrar_filtros(promociones, modulos=None, tiene_modulo=False):
     """
     Muestra los filtros de promoción y módulo
@@ -81,23 +274,66 @@ def mostrar_filtros(promociones, modulos=None, tiene_modulo=False):
         tiene_modulo: Si existe la columna de módulo
         
     Returns:
-        tuple: (filtro_promocion, filtro_modulo)
+        tuple: (filtro_promocion, filtro_modulo) aplicados con el botón del
+               formulario (mientras no se pulsa, los anteriores)
     """
     st.sidebar.markdown("---")
-    st.sidebar.header("Filtros")
     
-    filtro_promocion = st.sidebar.multiselect(
-        "Selecciona promoción(es)",
-        options=promociones,
-        default=promociones
-    )
-    
-    filtro_modulo = None
-    if tiene_modulo and modulos:
-        filtro_modulo = st.sidebar.multiselect(
-            "Selecciona módulo(s)",
-            options=modulos,
-            default=modulos
+    # Los cambios en las selecciones no relanzan la app hasta aplicarlos
+    with st.sidebar.form('filtros'):
+        st.header("Filtros")
+        
+        filtro_promocion = st.multiselect(
+            "Selecciona promoción(es)",
+            options=promociones,
+            default=promociones
         )
+        
+        filtro_modulo = None
+        if tiene_modulo and modulos:
+            filtro_modulo = st.multiselect(
+                "Selecciona módulo(s)",
+                options=modulos,
+                default=modulos
+            )
+        
+        st.form_submit_button("✅ Aplicar filtros")
+    
+    return filtro_promocion, filtro_modulo
+
+def mostrar_exportar_informes(dataset, promociones, filtro_promocion, filtro_modulo=None):
+    """
+    Muestra la exportación de informes HTML estáticos (uno con la selección
+    actual y uno por promoción)
     
-    return filtro_promocion, filtro_modulo
\ No newline at end of file
+    Args:
+        dataset: Dataset de la sesión
+        promociones: Lista de promociones disponibles
+        filtro_promocion: Promociones seleccionadas
+        filtro_modulo: Módulos seleccionados
+    """
+    st.sidebar.markdown("---")
+    st.sidebar.header("📄 Informes")
+    
+    clave = (dataset['origen'], tuple(filtro_promocion), tuple(filtro_modulo or ()))
+    
+    if st.sidebar.button("Generar informes HTML"):
+        # Import diferido: solo se necesita al exportar
+        from utils.informes import generar_informes, comprimir_informes
+        
+        selecciones = {"Selección actual": (filtro_promocion, filtro_modulo)}
+        selecciones.update({promocion: ([promocion], filtro_modulo) for promocion in promociones})
+        
+        with st.spinner("Generando informes..."):
+            informes = generar_informes(dataset, selecciones)
+        st.session_state['informes_html'] = (clave, comprimir_informes(informes), len(informes))
+    
+    generado = st.session_state.get('informes_html')
+    if generado is not None and generado[0] == clave:
+        _, contenido, total = generado
+        st.sidebar.download_button(
+            f"⬇️ Descargar {total} informes (.zip)",
+            data=contenido,
+            file_name="informes_kpis.zip",
+            mime="application/zip"
+        )
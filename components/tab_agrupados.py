@@ -7,19 +7,28 @@ import plotly.express as px
 from datetime import datetime
 from config.settings import COLUMNAS, AGREGACIONES, COLOR_SCALES
 from utils.data_processor import obtener_columnas_numericas
+from utils.dataset import obtener_cubo
+from utils.exportacion import FORMATOS, crear_exportacion, nombre_exportacion
+from utils.metricas import cronometrado
+from components.tablas import mostrar_tabla
 
 
-def mostrar_tab_agrupados(df_filtrado, tiene_modulo, columnas_excluir):
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='agrupados')
+def mostrar_tab_agrupados(dataset, vista, filtro_promocion, filtro_modulo=None):
     """
     Muestra el tab de datos agrupados con opciones de agregación
     
     Args:
-        df_filtrado: DataFrame filtrado
-        tiene_modulo: Si existe la columna de módulo
-        columnas_excluir: Columnas a excluir del análisis
+        dataset: Dataset de la sesión
+        vista: Vista filtrada del dataset (utils.vista.VistaFiltrada)
+        filtro_promocion: Promociones seleccionadas
+        filtro_modulo: Módulos seleccionados
     """
     st.header("Datos Agrupados")
     
+    tiene_modulo = dataset['tiene_modulo']
+    columnas_excluir = dataset['columnas_excluir']
     columna_promocion = COLUMNAS['promocion']
     columna_modulo = COLUMNAS['modulo']
     
@@ -61,7 +70,7 @@ def mostrar_tab_agrupados(df_filtrado, tiene_modulo, columnas_excluir):
         nombre_grupo = 'Promoción + Módulo'
     
     # Obtener columnas numéricas
-    numeric_cols = obtener_columnas_numericas(df_filtrado, columnas_excluir)
+    numeric_cols = obtener_columnas_numericas(vista.base, columnas_excluir)
     
     if not numeric_cols:
         st.warning("⚠️ No hay columnas numéricas para agrupar")
@@ -80,6 +89,8 @@ def mostrar_tab_agrupados(df_filtrado, tiene_modulo, columnas_excluir):
     
     if not columnas_seleccionadas:
         st.info("👆 Selecciona al menos una columna para continuar")
+        st.markdown("---")
+        _mostrar_exportar_todo(dataset, vista, numeric_cols, filtro_promocion, filtro_modulo)
         return
     
     # Realizar agrupación
@@ -90,6 +101,7 @@ def mostrar_tab_agrupados(df_filtrado, tiene_modulo, columnas_excluir):
         # Aplicar agregación
         funcion_agregacion = AGREGACIONES[tipo_agregacion]
         
+        df_filtrado = vista.columnas(columnas_grupo + columnas_seleccionadas)
         df_agrupado = df_filtrado.groupby(columnas_grupo)[columnas_seleccionadas].agg(
             funcion_agregacion
         ).reset_index()
@@ -101,7 +113,7 @@ def mostrar_tab_agrupados(df_filtrado, tiene_modulo, columnas_excluir):
         df_agrupado = df_agrupado.rename(columns=nuevos_nombres)
         
         # Mostrar tabla
-        st.dataframe(df_agrupado, use_container_width=True, height=400)
+        mostrar_tabla(df_agrupado, por_defecto='conteo' if tipo_agregacion == 'Conteo' else 'decimal', height=400)
         
         # Estadísticas de la agrupación
         col_stat1, col_stat2, col_stat3 = st.columns(3)
@@ -157,4 +169,37 @@ def mostrar_tab_agrupados(df_filtrado, tiene_modulo, columnas_excluir):
         
     except Exception as e:
         st.error(f"❌ Error al agrupar datos: {str(e)}")
-        st.info("Verifica que las columnas seleccionadas sean compatibles con la agregación elegida")
\ No newline at end of file
+        st.info("Verifica que las columnas seleccionadas sean compatibles con la agregación elegida")
+    
+    # Exportar todas las combinaciones en un solo archivo
+    st.markdown("---")
+    _mostrar_exportar_todo(dataset, vista, numeric_cols, filtro_promocion, filtro_modulo)
+
+
+def _mostrar_exportar_todo(dataset, vista, numeric_cols, filtro_promocion, filtro_modulo):
+    """Descarga con todas las agrupaciones x agregaciones y las tablas de satisfacción"""
+    st.subheader("📦 Exportar Todo")
+    
+    tiene_modulo = dataset['tiene_modulo']
+    st.caption(f"Todas las agrupaciones × agregaciones ({', '.join(AGREGACIONES)}) de las "
+               f"{len(numeric_cols)} columnas numéricas y las tablas de satisfacción de la "
+               f"selección actual, en un solo archivo")
+    
+    formato = st.radio("Formato", list(FORMATOS), horizontal=True, key='exportar_formato')
+    
+    def _generar():
+        # Se calcula al pulsar el botón, no en cada rerun
+        claves = [COLUMNAS['promocion']] + ([COLUMNAS['modulo']] if tiene_modulo else [])
+        return crear_exportacion(
+            vista.columnas(claves + numeric_cols), numeric_cols, tiene_modulo, obtener_cubo(dataset),
+            filtro_promocion or None, (filtro_modulo or None) if tiene_modulo else None, formato
+        )
+    
+    st.download_button(
+        label="📥 Descargar todo",
+        data=_generar,
+        file_name=nombre_exportacion(formato),
+        mime=FORMATOS[formato][1],
+        on_click='ignore',
+        help="Un archivo con una tabla por combinación de agrupación y agregación"
+    )
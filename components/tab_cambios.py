@@ -0,0 +1,124 @@
+"""
+Tab de Cambios respecto a un export de referencia
+"""
+import streamlit as st
+from config.settings import COLUMNAS
+from utils.calculations import necesita_filtro_modulo
+from utils.dataset import obtener_cubo
+from utils.diferencias import diferencias_registros, diferencias_medias, diferencias_porcentajes
+from utils.graficos import crear_figura_diferencias
+from utils.metricas import cronometrado
+from components.tablas import mostrar_tabla
+
+NOMBRES_GRUPO = {COLUMNAS['promocion']: 'Promoción', COLUMNAS['modulo']: 'Módulo'}
+
+
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='cambios')
+def mostrar_tab_cambios(dataset, dataset_referencia, filtro_promocion, filtro_modulo=None):
+    """
+    Muestra las diferencias por grupo entre el export actual y el de referencia
+
+    Args:
+        dataset: Dataset del export actual
+        dataset_referencia: Dataset del export de referencia, o None
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+    """
+    st.header("Cambios respecto a un Export Anterior")
+
+    if dataset_referencia is None:
+        st.info("👈 Sube un export de referencia (por ejemplo, el del mes pasado) en la barra lateral "
+                "para ver qué ha cambiado")
+        return
+
+    cubo_actual = obtener_cubo(dataset)
+    cubo_referencia = obtener_cubo(dataset_referencia)
+    filtro_promocion = filtro_promocion or None
+    filtro_modulo = filtro_modulo or None
+
+    # Solo se puede agrupar por módulo si los dos exports lo tienen
+    opciones_agrupacion = {'Promoción': [COLUMNAS['promocion']]}
+    if COLUMNAS['modulo'] in cubo_actual['claves'] and COLUMNAS['modulo'] in cubo_referencia['claves']:
+        opciones_agrupacion['Módulo'] = [COLUMNAS['modulo']]
+        opciones_agrupacion['Promoción y módulo'] = [COLUMNAS['promocion'], COLUMNAS['modulo']]
+    else:
+        filtro_modulo = None
+    tipo_agrupacion = st.selectbox("Agrupar por", list(opciones_agrupacion), key='cambios_grupo')
+    grupo_cols = opciones_agrupacion[tipo_agrupacion]
+
+    # Respuestas por grupo
+    registros = diferencias_registros(cubo_actual, cubo_referencia, grupo_cols, filtro_promocion, filtro_modulo)
+    total_referencia, total_actual = int(registros['Referencia'].sum()), int(registros['Actual'].sum())
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Respuestas (referencia)", total_referencia)
+    col2.metric("Respuestas (actual)", total_actual, delta=total_actual - total_referencia)
+    col3.metric("Grupos nuevos", int(((registros['Referencia'] == 0) & (registros['Actual'] > 0)).sum()))
+
+    st.subheader(f"👥 Respuestas por {tipo_agrupacion}")
+    mostrar_tabla(
+        registros.rename(columns=NOMBRES_GRUPO),
+        {'Referencia': 'conteo', 'Actual': 'conteo', 'Δ': 'diferencia_conteo', 'Δ %': 'diferencia'},
+        hide_index=True
+    )
+
+    # Porcentajes de satisfacción
+    preguntas = [p for p in cubo_actual['respuestas'] if p in cubo_referencia['respuestas']]
+    if preguntas:
+        st.subheader("📊 Cambios en los Porcentajes de Satisfacción")
+        pregunta = st.selectbox("Pregunta", preguntas, key='cambios_pregunta')
+
+        necesita_filtro, valor_modulo, descripcion = necesita_filtro_modulo(pregunta)
+        modulo_especial = valor_modulo if necesita_filtro and 'Módulo' in opciones_agrupacion else None
+        if modulo_especial:
+            st.info(f"ℹ️ {descripcion}")
+
+        porcentajes = diferencias_porcentajes(
+            cubo_actual, cubo_referencia, pregunta, grupo_cols,
+            filtro_promocion, filtro_modulo, modulo_especial=modulo_especial
+        )
+        if porcentajes is None:
+            st.warning("⚠️ No hay respuestas a esta pregunta en la selección")
+        else:
+            porcentajes = _etiquetar(porcentajes, grupo_cols)
+            fig = crear_figura_diferencias(
+                porcentajes, 'Grupo', 'Δ pp', f'Cambio en {pregunta} (puntos porcentuales)',
+                color=pregunta, unidad=' pp'
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            mostrar_tabla(
+                porcentajes.drop(columns='Grupo'),
+                {'Respuestas ref.': 'conteo', 'Respuestas actual': 'conteo',
+                 '% ref.': 'porcentaje', '% actual': 'porcentaje', 'Δ pp': 'diferencia_pp'},
+                hide_index=True
+            )
+
+    # Medias de las preguntas numéricas
+    medias_actual, medias_referencia, diferencias = diferencias_medias(
+        cubo_actual, cubo_referencia, grupo_cols, filtro_promocion, filtro_modulo
+    )
+    if len(diferencias.columns) > 0:
+        st.subheader("📈 Mayores Cambios en las Medias")
+        cambios = diferencias.stack().dropna().rename('Δ media').to_frame()
+        cambios['Media ref.'] = medias_referencia.stack()
+        cambios['Media actual'] = medias_actual.stack()
+        cambios.index = cambios.index.set_names('Pregunta', level=-1)
+        cambios = cambios.reindex(cambios['Δ media'].abs().sort_values(ascending=False).index)
+
+        n = st.slider("Cambios a mostrar", min_value=5, max_value=100, value=20, key='cambios_n')
+        cambios = cambios.head(n)[['Media ref.', 'Media actual', 'Δ media']]
+        mostrar_tabla(
+            cambios.reset_index().rename(columns=NOMBRES_GRUPO),
+            {'Media ref.': 'decimal', 'Media actual': 'decimal', 'Δ media': 'diferencia'},
+            hide_index=True
+        )
+        st.caption("💡 Diferencias calculadas sobre los agregados de cada export, sin cruzar sus filas")
+
+
+def _etiquetar(tabla, grupo_cols):
+    """Renombra las columnas de grupo y añade 'Grupo' (etiqueta única para los gráficos)"""
+    tabla = tabla.rename(columns=NOMBRES_GRUPO)
+    nombres = [NOMBRES_GRUPO[col] for col in grupo_cols]
+    tabla.insert(0, 'Grupo', tabla[nombres].astype(str).agg(' · '.join, axis=1))
+    return tabla
@@ -0,0 +1,79 @@
+"""
+Tab de Análisis de Comentarios
+"""
+import streamlit as st
+from config.settings import COLUMNAS, COMENTARIOS_TERMINOS, COMENTARIOS_MIN_PALABRAS
+from utils.comentarios import terminos_por_grupo
+from utils.graficos import crear_figura_terminos
+from utils.metricas import cronometrado
+from components.tablas import mostrar_tabla
+
+TITULOS = {'palabras': 'Palabras más mencionadas', 'bigramas': 'Bigramas más mencionados'}
+
+
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='comentarios')
+def mostrar_tab_comentarios(dataset, vista, tiene_modulo):
+    """
+    Muestra los términos y bigramas más mencionados en los comentarios por
+    promoción o módulo
+
+    Args:
+        dataset: Dataset cargado (con el índice de comentarios)
+        vista: Vista filtrada del dataset (su índice son posiciones del dataset)
+        tiene_modulo: Si existe la columna de módulo
+    """
+    st.header("Análisis de Comentarios")
+
+    indices = dataset.get('comentarios') or {}
+    if not indices:
+        st.info(
+            f"ℹ️ No se encontraron columnas de texto libre (respuestas con al menos "
+            f"{COMENTARIOS_MIN_PALABRAS} palabras de media)"
+        )
+        return
+
+    col_config1, col_config2, col_config3, col_config4 = st.columns(4)
+
+    with col_config1:
+        columna = st.selectbox("Columna de comentarios", list(indices), key='coment_columna')
+
+    with col_config2:
+        opciones_agrupacion = ['Promoción', 'Módulo'] if tiene_modulo else ['Promoción']
+        tipo_agrupacion = st.selectbox("Agrupar por", opciones_agrupacion, key='coment_grupo')
+
+    with col_config3:
+        tipo = st.radio(
+            "Términos", ['palabras', 'bigramas'],
+            format_func=str.capitalize, horizontal=True, key='coment_tipo'
+        )
+
+    with col_config4:
+        n = st.slider("Términos por grupo", min_value=3, max_value=30, value=COMENTARIOS_TERMINOS, key='coment_n')
+
+    grupo_col = COLUMNAS['promocion'] if tipo_agrupacion == 'Promoción' else COLUMNAS['modulo']
+    indice = indices[columna]
+
+    # Solo se reduce el índice precalculado sobre las filas filtradas
+    posiciones = vista.index.to_numpy()
+    con_texto = int(indice['con_texto'][posiciones].sum())
+    st.caption(f"💬 {con_texto} de {len(vista)} respuestas filtradas tienen comentario")
+
+    if con_texto == 0:
+        st.warning("⚠️ No hay comentarios en los datos filtrados")
+        return
+
+    grupos = vista.columnas([grupo_col])[grupo_col]
+    terminos = terminos_por_grupo(indice, posiciones, grupos, tipo_agrupacion, tipo=tipo, n=n)
+
+    if len(terminos) == 0:
+        st.warning("⚠️ Los comentarios filtrados solo contienen palabras vacías")
+        return
+
+    st.subheader(f"🔤 {TITULOS[tipo]} en '{columna}' por {tipo_agrupacion}")
+    fig = crear_figura_terminos(terminos, tipo_agrupacion, f"{TITULOS[tipo]} por {tipo_agrupacion}")
+    st.plotly_chart(fig, use_container_width=True)
+
+    mostrar_tabla(terminos, {'Respuestas': 'conteo', '% comentarios': 'porcentaje'}, hide_index=True)
+    st.caption("💡 % de las respuestas con comentario del grupo que mencionan el término "
+               "(sin tildes ni mayúsculas, sin palabras vacías)")
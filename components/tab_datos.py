@@ -4,17 +4,23 @@ Tab de Vista de Datos
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from utils.metricas import cronometrado
 
 
-def mostrar_tab_datos(df_filtrado):
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='datos')
+def mostrar_tab_datos(vista):
     """
     Muestra el tab de vista de datos con búsqueda y descarga
     
     Args:
-        df_filtrado: DataFrame filtrado
+        vista: Vista filtrada del dataset (utils.vista.VistaFiltrada)
     """
     st.header("Vista de Datos")
     
+    # Esta pestaña muestra y descarga todas las columnas
+    df_filtrado = vista.completo()
+    
     # Información general
     col1, col2, col3 = st.columns(3)
     
@@ -51,8 +57,8 @@ def mostrar_tab_datos(df_filtrado):
             help="Selecciona una columna específica para buscar"
         )
     
-    # Aplicar búsqueda
-    df_mostrar = df_filtrado.copy()
+    # Aplicar búsqueda (los filtros y la ordenación crean DataFrames nuevos)
+    df_mostrar = df_filtrado
     
     if busqueda:
         if columna_busqueda == 'Todas':
@@ -2,25 +2,54 @@
 Tab de KPIs Principales
 """
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from config.settings import COLUMNAS, COLOR_SCALES, FILTROS_ESPECIALES
-from utils.calculations import calcular_porcentajes, calcular_porcentajes_con_filtro, necesita_filtro_modulo
+from config.settings import BOOTSTRAP_NIVEL
+from utils.calculations import obtener_columna_destacada
+from utils.agregados import crear_seleccion, actualizar_seleccion, metricas_desde_seleccion
+from utils.bootstrap import intervalos_porcentajes
+from utils.dataset import obtener_cubo
+from utils.graficos import crear_figura_porcentajes, crear_figura_kpi
+from utils.kpis import AGRUPACIONES, compilar_plan, evaluar_plan, titulo_kpi
+from utils.metricas import cronometrado
+from components.tablas import mostrar_tabla
 
+# Formatos de las tablas de KPIs (ver components/tablas.py)
+FORMATOS_PORCENTAJES = {
+    'Cantidad': 'conteo',
+    'Total': 'conteo',
+    'Porcentaje': 'porcentaje',
+    'IC inf.': 'porcentaje',
+    'IC sup.': 'porcentaje',
+    'Promotores (%)': 'porcentaje',
+    'Detractores (%)': 'porcentaje'
+}
 
-def mostrar_tab_kpis(df_filtrado, tiene_modulo, columnas_excluir):
+
+@cronometrado('dashboard_seccion_segundos', seccion='kpis')
+def mostrar_tab_kpis(dataset, filtro_promocion, filtro_modulo=None):
     """
     Muestra el tab de KPIs principales
     
+    Todo se calcula desde el cubo de agregados. Las métricas principales se
+    actualizan al cambiar los filtros sumando o restando solo las celdas de
+    las promociones/módulos que cambian; los KPIs se evalúan con el plan.
+    
     Args:
-        df_filtrado: DataFrame filtrado
-        tiene_modulo: Si existe la columna de módulo
-        columnas_excluir: Columnas a excluir del análisis
+        dataset: Dataset de la sesión
+        filtro_promocion: Promociones seleccionadas
+        filtro_modulo: Módulos seleccionados
     """
     st.header("KPIs Principales")
     
+    tiene_modulo = dataset['tiene_modulo']
+    cubo = obtener_cubo(dataset)
+    filtros = dict(filtro_promocion=filtro_promocion or None,
+                   filtro_modulo=(filtro_modulo or None) if tiene_modulo else None)
+    # buscar la columna con este valor: Valora de forma global el equipo docente 
+    columna_destacada = obtener_columna_destacada(list(cubo['sumas'].columns))
+    seleccion = _obtener_seleccion(dataset, cubo, filtros, columna_destacada)
+    
     # Métricas principales
-    _mostrar_metricas_principales(df_filtrado, tiene_modulo, columnas_excluir)
+    _mostrar_metricas_principales(dataset, seleccion)
     
     # Resumen por promoción
    # _mostrar_resumen_promocion(df_filtrado)
@@ -31,183 +60,111 @@ def mostrar_tab_kpis(df_filtrado, tiene_modulo, columnas_excluir):
     #     _mostrar_matriz_promocion_modulo(df_filtrado)
     
   
-    _mostrar_analisis_satisfaccion(df_filtrado, tiene_modulo)
+    _mostrar_analisis_satisfaccion(cubo, filtros)
+
 
+def _obtener_seleccion(dataset, cubo, filtros, columna):
+    """Totales de la selección actual, actualizados por deltas respecto a la anterior"""
+    anterior = st.session_state.get('seleccion_kpis')
+    
+    if anterior is not None and anterior[0] == dataset['origen']:
+        seleccion = actualizar_seleccion(anterior[1], cubo, columna=columna, **filtros)
+    else:
+        seleccion = crear_seleccion(cubo, columna=columna, **filtros)
+    
+    st.session_state['seleccion_kpis'] = (dataset['origen'], seleccion)
+    return seleccion
 
-def _mostrar_metricas_principales(df_filtrado, tiene_modulo, columnas_excluir):
+
+def _mostrar_metricas_principales(dataset, seleccion):
     """Muestra las métricas principales en columnas"""
-    columna_promocion = COLUMNAS['promocion']
-    columna_modulo = COLUMNAS['modulo']
+    primera_col_numerica = seleccion['columna']
+    metricas = metricas_desde_seleccion(seleccion)
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Registros", len(df_filtrado))
+        st.metric("Total Registros", metricas['registros'])
     
     with col2:
-        st.metric("Promociones", df_filtrado[columna_promocion].nunique())
+        st.metric("Promociones", metricas['promociones'])
     
     with col3:
-        if tiene_modulo:
-            st.metric("Módulos", df_filtrado[columna_modulo].nunique())
+        if dataset['tiene_modulo']:
+            st.metric("Módulos", metricas['modulos'])
         else:
-            st.metric("Columnas Analizadas", len(df_filtrado.columns))
-    
-    numeric_cols = df_filtrado.select_dtypes(include=['number']).columns
-    numeric_cols = [col for col in numeric_cols if col not in columnas_excluir]
+            st.metric("Columnas Analizadas", len(dataset['df'].columns))
     
     with col4:
-        if len(numeric_cols) > 0:
-            # buscar la columna con este valor: Valora de forma global el equipo docente 
-         
-            primera_col_numerica = numeric_cols[89] if len(numeric_cols) > 89 else numeric_cols[0]
-            media = df_filtrado[primera_col_numerica].mean()
-            st.metric(f"Media {primera_col_numerica}", f"{media:,.2f}")
+        if primera_col_numerica is not None:
+            st.metric(f"Media {primera_col_numerica}", f"{metricas['media']:,.2f}")
         else:
-            st.metric("Columnas Numéricas", len(numeric_cols))
+            st.metric("Columnas Numéricas", 0)
 
-def _mostrar_analisis_satisfaccion(df_filtrado, tiene_modulo):
-      # Análisis de satisfacción
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='kpis/satisfaccion')
+def _mostrar_analisis_satisfaccion(cubo, filtros):
+    """
+    Muestra los KPIs declarados en KPIS (config/settings.py), evaluados
+    todos juntos con un único plan sobre el cubo
+    """
     st.markdown("---")
     st.header("📊 Análisis de Satisfacción por Promoción")
-    """Muestra el análisis de satisfacción (expectativas y recomendación)"""
-    columna_promocion = COLUMNAS['promocion']
-    columna_modulo = COLUMNAS['modulo']
-    columna_expectativas = COLUMNAS['expectativas']
-    columna_recomendacion = COLUMNAS['recomendacion']
+    intervalos = st.checkbox(
+        f"Mostrar intervalos de confianza del {BOOTSTRAP_NIVEL:.0%} (bootstrap)",
+        key='kpis_intervalos',
+        help="Barras de error calculadas remuestreando las respuestas de cada grupo. "
+             "Los grupos con pocas respuestas tienen intervalos más anchos."
+    )
+    
+    for evaluado in evaluar_plan(compilar_plan(), cubo, **filtros):
+        if evaluado['disponible']:
+            _mostrar_kpi(evaluado, intervalos)
+
+def _mostrar_kpi(evaluado, intervalos):
+    """Muestra un KPI: un gráfico por cada agrupación declarada"""
+    kpi = evaluado['kpi']
+    modulo = evaluado['modulo']
+    resultados = evaluado['resultados']
+    
+    st.subheader(f"{kpi['icono']} {kpi['titulo']}")
     
-    # ========== EXPECTATIVAS (SOLO MÓDULO 4) ==========
-    if columna_expectativas in df_filtrado.columns:
-        st.subheader("✨ Cumplimiento de Expectativas")
+    if modulo:
+        # Pregunta restringida a un módulo
+        st.info(f"ℹ️ {kpi['descripcion']}")
         
-        # Verificar si necesita filtro especial
-        necesita_filtro, valor_modulo, descripcion = necesita_filtro_modulo(columna_expectativas)
+        principal = next(iter(resultados.values()), None)
+        if principal is None:
+            st.warning(f"⚠️ No hay datos disponibles para {modulo}")
+            return
         
-        if necesita_filtro and tiene_modulo:
-            # Mostrar advertencia
-            st.info(f"ℹ️ {descripcion}")
-            
-            # Calcular con filtro de módulo
-            porcentajes, df_usado = calcular_porcentajes_con_filtro(
-                df_filtrado, 
-                columna_expectativas, 
-                columna_promocion, 
-                'Promoción',
-                filtro_modulo=valor_modulo
-            )
-            
-            if porcentajes is not None and len(df_usado) > 0:
-                # Mostrar cuántos registros se están usando
-                st.caption(f"📊 Analizando {len(df_usado)} registros del {valor_modulo}")
-                
-                # Por Promoción
-                st.markdown("**Por Promoción:**")
-                _mostrar_grafico_porcentajes(
-                    porcentajes, 
-                    columna_expectativas,
-                    f'Cumplimiento de Expectativas por Promoción - {valor_modulo} (%)'
-                )
-                
-                # Por Módulo (dentro del Módulo 4)
-                if tiene_modulo and columna_modulo in df_usado.columns:
-                    st.markdown("---")
-                    st.markdown("**Por Módulo:**")
-                    
-                    porcentajes_modulo, _ = calcular_porcentajes_con_filtro(
-                        df_filtrado,
-                        columna_expectativas,
-                        columna_modulo,
-                        'Módulo',
-                        filtro_modulo=valor_modulo
-                    )
-                    
-                    if porcentajes_modulo is not None:
-                        _mostrar_grafico_porcentajes(
-                            porcentajes_modulo,
-                            columna_expectativas,
-                            f'Cumplimiento de Expectativas por Módulo - {valor_modulo} (%)'
-                        )
-            else:
-                st.warning(f"⚠️ No hay datos disponibles para {valor_modulo}")
-        else:
-            # Si no tiene módulo, calcular normalmente
-            _mostrar_grafico_porcentajes_simple(
-                df_filtrado, 
-                columna_expectativas, 
-                columna_promocion, 
-                'Cumplimiento de Expectativas por Promoción (%)'
-            )
-    
-    # ========== RECOMENDACIÓN (SOLO MÓDULO 4 - IGUAL QUE EXPECTATIVAS) ==========
-    if columna_recomendacion in df_filtrado.columns:
-        st.subheader("💚 Recomendación de Adalab")
+        # Mostrar cuántos registros se están usando
+        columna_total = 'Total' if 'Total' in principal.columns else 'Cantidad'
+        registros_usados = principal.drop_duplicates(principal.columns[0])[columna_total].sum()
+        st.caption(f"📊 Analizando {registros_usados} registros del {modulo}")
+    
+    varias = len(resultados) > 1
+    for i, (agrupacion, resultado) in enumerate(resultados.items()):
+        nombre_grupo = AGRUPACIONES[agrupacion][1]
+        if varias:
+            if i > 0:
+                st.markdown("---")
+            st.markdown(f"**Por {nombre_grupo}:**")
         
-        # Verificar si necesita filtro especial
-        necesita_filtro, valor_modulo, descripcion = necesita_filtro_modulo(columna_recomendacion)
+        if resultado is None:
+            continue
         
-        if necesita_filtro and tiene_modulo:
-            # Mostrar advertencia
-            st.info(f"ℹ️ {descripcion}")
-            
-            # Calcular con filtro de módulo
-            porcentajes, df_usado = calcular_porcentajes_con_filtro(
-                df_filtrado, 
-                columna_recomendacion, 
-                columna_promocion, 
-                'Promoción',
-                filtro_modulo=valor_modulo
-            )
-            
-            if porcentajes is not None and len(df_usado) > 0:
-                # Mostrar cuántos registros se están usando
-                st.caption(f"📊 Analizando {len(df_usado)} registros del {valor_modulo}")
-                
-                # Por Promoción
-                st.markdown("**Por Promoción:**")
-                _mostrar_grafico_porcentajes(
-                    porcentajes, 
-                    columna_recomendacion,
-                    f'Recomendación de Adalab por Promoción - {valor_modulo} (%)'
-                )
-                
-                # Por Módulo (dentro del Módulo 4)
-                if tiene_modulo and columna_modulo in df_usado.columns:
-                    st.markdown("---")
-                    st.markdown("**Por Módulo:**")
-                    
-                    porcentajes_modulo, _ = calcular_porcentajes_con_filtro(
-                        df_filtrado,
-                        columna_recomendacion,
-                        columna_modulo,
-                        'Módulo',
-                        filtro_modulo=valor_modulo
-                    )
-                    
-                    if porcentajes_modulo is not None:
-                        _mostrar_grafico_porcentajes(
-                            porcentajes_modulo,
-                            columna_recomendacion,
-                            f'Recomendación de Adalab por Módulo - {valor_modulo} (%)'
-                        )
-            else:
-                st.warning(f"⚠️ No hay datos disponibles para {valor_modulo}")
+        titulo = titulo_kpi(kpi, agrupacion, modulo)
+        if kpi['metrica'] == 'distribucion':
+            _mostrar_grafico_porcentajes(resultado, kpi['pregunta'], f"{titulo} (%)", intervalos)
         else:
-            # Si no tiene módulo, calcular normalmente
-            _mostrar_grafico_porcentajes_simple(
-                df_filtrado, 
-                columna_recomendacion, 
-                columna_promocion,
-                'Recomendación de Adalab por Promoción (%)'
-            )
-
-def _mostrar_grafico_porcentajes_simple(df_filtrado, columna, grupo_col, titulo):
-    """Muestra gráfico y tabla de porcentajes (sin filtro especial)"""
-    porcentajes = calcular_porcentajes(df_filtrado, columna, grupo_col, 'Promoción')
-    
-    if porcentajes is not None:
-        _mostrar_grafico_porcentajes(porcentajes, columna, titulo)
+            # top_box, media o NPS: un valor por grupo
+            fig = crear_figura_kpi(resultado, kpi['metrica'], kpi['pregunta'], nombre_grupo, titulo, agrupacion)
+            st.plotly_chart(fig, use_container_width=True)
+            with st.expander("📊 Ver datos detallados"):
+                mostrar_tabla(resultado, FORMATOS_PORCENTAJES, por_defecto='decimal')
 
-def _mostrar_grafico_porcentajes(porcentajes_df, columna_analizada, titulo):
+def _mostrar_grafico_porcentajes(porcentajes_df, columna_analizada, titulo, intervalos=False):
     """
     Muestra gráfico de barras con porcentajes
     
@@ -215,6 +172,7 @@ def _mostrar_grafico_porcentajes(porcentajes_df, columna_analizada, titulo):
         porcentajes_df: DataFrame con columnas [Grupo, Respuesta, Porcentaje]
         columna_analizada: Nombre de la columna analizada
         titulo: Título del gráfico
+        intervalos: Si se añaden barras de error con intervalos de confianza
     """
     if porcentajes_df is None or len(porcentajes_df) == 0:
         st.warning("⚠️ No hay datos suficientes para mostrar el gráfico")
@@ -223,7 +181,7 @@ def _mostrar_grafico_porcentajes(porcentajes_df, columna_analizada, titulo):
     try:
         # Identificar la columna de grupo (primera columna que no sea la analizada ni métricas)
         columnas_posibles = [col for col in porcentajes_df.columns 
-                            if col not in [columna_analizada, 'Cantidad', 'Total', 'Porcentaje']]
+                            if col not in [columna_analizada, 'Cantidad', 'Total', 'Porcentaje', 'IC inf.', 'IC sup.']]
         
         if not columnas_posibles:
             st.error("❌ No se pudo identificar la columna de agrupación")
@@ -243,37 +201,18 @@ def _mostrar_grafico_porcentajes(porcentajes_df, columna_analizada, titulo):
             st.dataframe(porcentajes_df)
             return
         
-        # Crear gráfico de barras agrupadas
-        fig = px.bar(
-            porcentajes_df,
-            x=columna_grupo,
-            y='Porcentaje',
-            color=columna_analizada,
-            title=titulo,
-            text='Porcentaje',
-            barmode='group',
-            color_discrete_sequence=px.colors.sequential.Blues
-        )
+        if intervalos:
+            porcentajes_df = intervalos_porcentajes(porcentajes_df, columna_grupo, columna_analizada)
         
-        # Formato del texto en las barras
-        fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-        
-        # Ajustar layout
-        fig.update_layout(
-            xaxis_title=columna_grupo,
-            yaxis_title='Porcentaje (%)',
-            yaxis_range=[0, max(porcentajes_df['Porcentaje'].max() * 1.1, 100)],
-            showlegend=True,
-            legend_title=columna_analizada,
-            height=500
-        )
+        # Crear gráfico de barras agrupadas
+        fig = crear_figura_porcentajes(porcentajes_df, columna_grupo, columna_analizada, titulo)
         
         st.plotly_chart(fig, use_container_width=True)
         # Mostrar tabla de datos
         with st.expander("📊 Ver datos detallados"):
         # Identificar columna de grupo y columna de respuesta
             columnas_posibles = [col for col in porcentajes_df.columns 
-                                if col not in ['Cantidad', 'Total', 'Porcentaje']]
+                                if col not in ['Cantidad', 'Total', 'Porcentaje', 'IC inf.', 'IC sup.']]
             
             if len(columnas_posibles) >= 2:
                 columna_grupo = columnas_posibles[0]  # Ej: 'Promoción' o 'Módulo'
@@ -290,19 +229,13 @@ def _mostrar_grafico_porcentajes(porcentajes_df, columna_analizada, titulo):
                 nuevos_nombres = {col: f"{col} (%)" for col in df_pivot.columns if col != columna_grupo}
                 df_pivot = df_pivot.rename(columns=nuevos_nombres)
                 
-                # Formatear porcentajes
-                for col in df_pivot.columns:
-                    if '(%)' in col:
-                        df_pivot[col] = df_pivot[col].apply(lambda x: f"{x:.2f}%" if pd.notna(x) else "-")
-                
-                st.dataframe(df_pivot, use_container_width=True)
+                # Los porcentajes siguen siendo numéricos: el formato se aplica al mostrar
+                mostrar_tabla(df_pivot, por_defecto='porcentaje')
             else:
                 # Fallback: mostrar tabla original si no se puede pivotar
-                df_mostrar = porcentajes_df.copy()
-                df_mostrar['Porcentaje'] = df_mostrar['Porcentaje'].apply(lambda x: f"{x:.2f}%")
-                st.dataframe(df_mostrar, use_container_width=True)
+                mostrar_tabla(porcentajes_df, FORMATOS_PORCENTAJES)
             
     except Exception as e:
         st.error(f"❌ Error al crear el gráfico: {str(e)}")
         st.info("Mostrando solo la tabla de datos:")
-        st.dataframe(porcentajes_df, use_container_width=True)
\ No newline at end of file
+        mostrar_tabla(porcentajes_df, FORMATOS_PORCENTAJES)
\ No newline at end of file
@@ -2,9 +2,7 @@
 Tab de Análisis por Módulo
 """
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from config.settings import COLUMNAS, COLOR_SCALES
+from config.settings import COLUMNAS, COLOR_SCALES, BOOTSTRAP_NIVEL
 from utils.calculations import (
     calcular_porcentajes, 
     calcular_porcentajes_con_filtro,
@@ -12,14 +10,26 @@ from utils.calculations import (
     necesita_filtro_modulo
 )
 from utils.data_processor import obtener_columnas_numericas, obtener_columnas_categoricas
+from utils.bootstrap import intervalos_estadisticas
+from utils.graficos import (
+    crear_figura_estadistica,
+    crear_figura_distribucion,
+    crear_figura_combinada,
+    crear_figura_mapa_calor
+)
+from utils.metricas import cronometrado
+from components.resumen_preguntas import mostrar_resumen_preguntas
+from components.tablas import mostrar_tabla
+from components.conteos_categoricos import mostrar_conteos_categoricos
 
 
-def mostrar_tab_modulo(df_filtrado, columnas_excluir):
+@cronometrado('dashboard_seccion_segundos', seccion='modulo')
+def mostrar_tab_modulo(vista, columnas_excluir):
     """
     Muestra el tab de análisis por módulo
     
     Args:
-        df_filtrado: DataFrame filtrado
+        vista: Vista filtrada del dataset (utils.vista.VistaFiltrada)
         columnas_excluir: Columnas a excluir del análisis
     """
     st.header("Análisis Detallado por Módulo")
@@ -27,96 +37,117 @@ def mostrar_tab_modulo(df_filtrado, columnas_excluir):
     columna_modulo = COLUMNAS['modulo']
     
     # Verificar que existe la columna de módulo
-    if columna_modulo not in df_filtrado.columns:
+    if columna_modulo not in vista.columns:
         st.warning("⚠️ No se encontró la columna de módulo en los datos")
         return
     
     # Análisis numérico
-    numeric_columns = obtener_columnas_numericas(df_filtrado, columnas_excluir)
+    numeric_columns = obtener_columnas_numericas(vista.base, columnas_excluir)
     
     if numeric_columns:
-        col_analizar = st.selectbox("Selecciona columna numérica para analizar", numeric_columns, key='modulo_col')
-        
-        stats_por_modulo = calcular_estadisticas_por_grupo(df_filtrado, col_analizar, columna_modulo)
-        stats_por_modulo.columns = ['Módulo', 'Media', 'Mediana', 'Máximo', 'Mínimo', 'Cantidad']
-        
-        st.subheader(f"📈 Estadísticas de '{col_analizar}' por Módulo")
-        st.dataframe(stats_por_modulo, use_container_width=True)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig1 = px.bar(
-                stats_por_modulo, 
-                x='Módulo', 
-                y='Media',
-                title=f'Media de {col_analizar} por Módulo',
-                color='Media',
-                color_continuous_scale=COLOR_SCALES['modulo_media']
-            )
-            st.plotly_chart(fig1, use_container_width=True)
-        
-        with col2:
-            fig2 = px.bar(
-                stats_por_modulo, 
-                x='Módulo', 
-                y='Mediana',
-                title=f'Mediana de {col_analizar} por Módulo',
-                color='Mediana',
-                color_continuous_scale=COLOR_SCALES['modulo_mediana']
-            )
-            st.plotly_chart(fig2, use_container_width=True)
+        df_numerico = vista.columnas([columna_modulo] + numeric_columns)
+        mostrar_resumen_preguntas(df_numerico, numeric_columns, columna_modulo, 'Módulo', key='modulo')
+        _mostrar_estadisticas(df_numerico, numeric_columns)
     else:
         st.info("No hay columnas numéricas para analizar")
     
     # Análisis categórico
+    _mostrar_analisis_categorico(vista, obtener_columnas_categoricas(vista.base, columnas_excluir))
+    
+    # Análisis combinado: Promoción x Módulo
+    st.markdown("---")
+    st.subheader("🔀 Análisis Combinado: Promoción x Módulo")
+    _mostrar_analisis_combinado(vista, numeric_columns)
+
+
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='modulo/estadisticas')
+def _mostrar_estadisticas(df_numerico, numeric_columns):
+    """Muestra las estadísticas de la columna numérica elegida por módulo"""
+    columna_modulo = COLUMNAS['modulo']
+    
+    col_analizar = st.selectbox("Selecciona columna numérica para analizar", numeric_columns, key='modulo_col')
+    
+    stats_por_modulo = calcular_estadisticas_por_grupo(df_numerico, col_analizar, columna_modulo)
+    stats_por_modulo.columns = ['Módulo', 'Media', 'Mediana', 'Máximo', 'Mínimo', 'Cantidad']
+    
+    if st.checkbox(
+        f"Mostrar intervalos de confianza del {BOOTSTRAP_NIVEL:.0%} (bootstrap)",
+        key='modulo_intervalos',
+        help="Intervalos de la media y la mediana remuestreando las respuestas de cada módulo. "
+             "Los grupos con pocas respuestas tienen intervalos más anchos."
+    ):
+        intervalos = intervalos_estadisticas(df_numerico, col_analizar, columna_modulo)
+        stats_por_modulo = stats_por_modulo.merge(
+            intervalos.rename(columns={columna_modulo: 'Módulo'}), on='Módulo', how='left'
+        )
+    
+    st.subheader(f"📈 Estadísticas de '{col_analizar}' por Módulo")
+    mostrar_tabla(stats_por_modulo, {'Cantidad': 'conteo'}, por_defecto='decimal')
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig1 = crear_figura_estadistica(
+            stats_por_modulo, 'Módulo', 'Media', f'Media de {col_analizar} por Módulo', 'modulo_media'
+        )
+        st.plotly_chart(fig1, use_container_width=True)
+    
+    with col2:
+        fig2 = crear_figura_estadistica(
+            stats_por_modulo, 'Módulo', 'Mediana', f'Mediana de {col_analizar} por Módulo', 'modulo_mediana'
+        )
+        st.plotly_chart(fig2, use_container_width=True)
+
+
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='modulo/categorico')
+def _mostrar_analisis_categorico(vista, categorical_cols):
+    """Muestra la distribución de la columna categórica elegida por módulo"""
     st.subheader("📝 Análisis de Columnas Categóricas por Módulo")
     
-    categorical_cols = obtener_columnas_categoricas(df_filtrado, columnas_excluir)
+    if not categorical_cols:
+        return
     
-    if categorical_cols:
-        col_categorica = st.selectbox("Selecciona columna categórica", categorical_cols, key='modulo_cat')
-        
-        # Verificar si es una columna de porcentaje
-        columna_expectativas = COLUMNAS['expectativas']
-        columna_recomendacion = COLUMNAS['recomendacion']
-        es_columna_porcentaje = col_categorica in [columna_expectativas, columna_recomendacion]
+    columna_modulo = COLUMNAS['modulo']
+    col_categorica = st.selectbox("Selecciona columna categórica", categorical_cols, key='modulo_cat')
+    df_filtrado = vista.columnas([columna_modulo, col_categorica])
+    
+    # Verificar si es una columna de porcentaje
+    columna_expectativas = COLUMNAS['expectativas']
+    columna_recomendacion = COLUMNAS['recomendacion']
+    es_columna_porcentaje = col_categorica in [columna_expectativas, columna_recomendacion]
+    
+    if es_columna_porcentaje:
+        # Verificar si necesita filtro especial
+        necesita_filtro, valor_modulo, descripcion = necesita_filtro_modulo(col_categorica)
         
-        if es_columna_porcentaje:
-            # Verificar si necesita filtro especial
-            necesita_filtro, valor_modulo, descripcion = necesita_filtro_modulo(col_categorica)
+        if necesita_filtro:
+            st.info(f"ℹ️ {descripcion}")
             
-            if necesita_filtro:
-                st.info(f"ℹ️ {descripcion}")
+            # Filtrar solo el módulo específico
+            df_modulo_especifico = df_filtrado[df_filtrado[columna_modulo] == valor_modulo]
+            
+            if len(df_modulo_especifico) > 0:
+                st.caption(f"📊 Analizando {len(df_modulo_especifico)} registros del {valor_modulo}")
                 
-                # Filtrar solo el módulo específico
-                df_modulo_especifico = df_filtrado[df_filtrado[columna_modulo] == valor_modulo]
+                # Calcular porcentajes dentro del módulo específico
+                porcentajes = calcular_porcentajes(df_modulo_especifico, col_categorica, columna_modulo, 'Módulo')
                 
-                if len(df_modulo_especifico) > 0:
-                    st.caption(f"📊 Analizando {len(df_modulo_especifico)} registros del {valor_modulo}")
-                    
-                    # Calcular porcentajes dentro del módulo específico
-                    porcentajes = calcular_porcentajes(df_modulo_especifico, col_categorica, columna_modulo, 'Módulo')
-                    
-                    if porcentajes is not None:
-                        _mostrar_analisis_porcentajes(porcentajes, col_categorica, valor_modulo)
-                    else:
-                        st.warning(f"⚠️ No hay datos suficientes para analizar")
+                if porcentajes is not None:
+                    _mostrar_analisis_porcentajes(porcentajes, col_categorica, valor_modulo)
                 else:
-                    st.warning(f"⚠️ No hay datos disponibles para {valor_modulo}")
+                    st.warning(f"⚠️ No hay datos suficientes para analizar")
             else:
-                # Calcular normalmente para todos los módulos
-                porcentajes = calcular_porcentajes(df_filtrado, col_categorica, columna_modulo, 'Módulo')
-                if porcentajes is not None:
-                    _mostrar_analisis_porcentajes(porcentajes, col_categorica)
+                st.warning(f"⚠️ No hay datos disponibles para {valor_modulo}")
         else:
-            # Mostrar en conteos normales
-            _mostrar_analisis_conteos(df_filtrado, col_categorica, columna_modulo)
-    
-    # Análisis combinado: Promoción x Módulo
-    st.markdown("---")
-    st.subheader("🔀 Análisis Combinado: Promoción x Módulo")
-    _mostrar_analisis_combinado(df_filtrado, columnas_excluir)
+            # Calcular normalmente para todos los módulos
+            porcentajes = calcular_porcentajes(df_filtrado, col_categorica, columna_modulo, 'Módulo')
+            if porcentajes is not None:
+                _mostrar_analisis_porcentajes(porcentajes, col_categorica)
+    else:
+        # Mostrar en conteos normales
+        mostrar_conteos_categoricos(df_filtrado, col_categorica, columna_modulo, 'Módulo', key='modulo')
 
 
 def _mostrar_analisis_porcentajes(porcentajes, col_categorica, modulo_filtrado=None):
@@ -132,60 +163,27 @@ def _mostrar_analisis_porcentajes(porcentajes, col_categorica, modulo_filtrado=N
     ).fillna(0)
     tabla_pct['TOTAL'] = tabla_pct.sum(axis=1)
     
-    st.dataframe(tabla_pct.style.format("{:.2f}%"), use_container_width=True)
+    mostrar_tabla(tabla_pct, por_defecto='porcentaje')
     st.caption("💡 Cada fila debe sumar 100% (porcentaje dentro de cada módulo)")
     
     try:
-        fig_cat = px.bar(
-            porcentajes,
-            x='Módulo',
-            y='Porcentaje',
-            color=col_categorica,
-            title=f'Distribución de {col_categorica} por Módulo (%)' + titulo_extra,
-            text='Porcentaje',
-            barmode='stack'
+        fig_cat = crear_figura_distribucion(
+            porcentajes, 'Módulo', col_categorica, f'Distribución de {col_categorica} por Módulo (%)' + titulo_extra
         )
-        fig_cat.update_traces(texttemplate='%{text:.1f}%', textposition='inside')
-        fig_cat.update_layout(yaxis_title="Porcentaje (%)", yaxis_range=[0, 100])
         st.plotly_chart(fig_cat, use_container_width=True)
     except Exception as e:
         st.warning(f"⚠️ No se pudo generar el gráfico: {str(e)}")
 
 
-def _mostrar_analisis_conteos(df_filtrado, col_categorica, columna_modulo):
-    """Muestra análisis de conteos"""
-    crosstab = pd.crosstab(df_filtrado[columna_modulo], df_filtrado[col_categorica])
-    st.dataframe(crosstab, use_container_width=True)
-    
-    try:
-        crosstab_reset = crosstab.reset_index()
-        value_columns = crosstab.columns.tolist()
-        
-        if len(value_columns) > 0:
-            fig_cat = px.bar(
-                crosstab_reset, 
-                x=columna_modulo,
-                y=value_columns,
-                title=f'Distribución de {col_categorica} por Módulo',
-                barmode='stack'
-            )
-            st.plotly_chart(fig_cat, use_container_width=True)
-        else:
-            st.warning("⚠️ No hay suficientes datos para generar el gráfico")
-    except Exception as e:
-        st.warning(f"⚠️ No se pudo generar el gráfico: {str(e)}")
-        st.info("La tabla de datos sigue siendo visible arriba.")
-
-
-def _mostrar_analisis_combinado(df_filtrado, columnas_excluir):
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='modulo/combinado')
+def _mostrar_analisis_combinado(vista, numeric_columns):
     """Muestra análisis combinado de promoción x módulo"""
     from utils.calculations import calcular_estadisticas_combinado
     
     columna_promocion = COLUMNAS['promocion']
     columna_modulo = COLUMNAS['modulo']
     
-    numeric_columns = obtener_columnas_numericas(df_filtrado, columnas_excluir)
-    
     if numeric_columns:
         col_analizar_comb = st.selectbox(
             "Selecciona columna numérica para análisis combinado", 
@@ -194,26 +192,17 @@ def _mostrar_analisis_combinado(df_filtrado, columnas_excluir):
         )
         
         stats_combinado = calcular_estadisticas_combinado(
-            df_filtrado, 
+            vista.columnas([columna_promocion, columna_modulo, col_analizar_comb]), 
             col_analizar_comb, 
             [columna_promocion, columna_modulo]
         )
         stats_combinado.columns = ['Promoción', 'Módulo', 'Media', 'Mediana', 'Cantidad']
         
         st.subheader(f"📊 Estadísticas de '{col_analizar_comb}' por Promoción y Módulo")
-        st.dataframe(stats_combinado, use_container_width=True)
+        mostrar_tabla(stats_combinado, {'Cantidad': 'conteo'}, por_defecto='decimal')
         
         # Gráfico de barras agrupadas
-        fig_comb = px.bar(
-            stats_combinado,
-            x='Promoción',
-            y='Media',
-            color='Módulo',
-            title=f'Media de {col_analizar_comb} por Promoción y Módulo',
-            barmode='group',
-            text='Media'
-        )
-        fig_comb.update_traces(texttemplate='%{text:.2f}', textposition='outside')
+        fig_comb = crear_figura_combinada(stats_combinado, col_analizar_comb)
         st.plotly_chart(fig_comb, use_container_width=True)
         
         # Heatmap de medias
@@ -223,12 +212,8 @@ def _mostrar_analisis_combinado(df_filtrado, columnas_excluir):
             values='Media'
         )
         
-        fig_heatmap = px.imshow(
-            pivot_media,
-            labels=dict(x="Módulo", y="Promoción", color="Media"),
-            title=f"Mapa de Calor: Media de {col_analizar_comb}",
-            color_continuous_scale=COLOR_SCALES['heatmap'],
-            text_auto='.2f'
+        fig_heatmap = crear_figura_mapa_calor(
+            pivot_media, "Módulo", "Promoción", "Media", f"Mapa de Calor: Media de {col_analizar_comb}"
         )
         st.plotly_chart(fig_heatmap, use_container_width=True)
     else:
@@ -2,9 +2,7 @@
 Tab de Análisis por Promoción
 """
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from config.settings import COLUMNAS, COLOR_SCALES
+from config.settings import COLUMNAS, COLOR_SCALES, BOOTSTRAP_NIVEL
 from utils.calculations import (
     calcular_porcentajes, 
     calcular_porcentajes_con_filtro,
@@ -12,14 +10,22 @@ from utils.calculations import (
     necesita_filtro_modulo
 )
 from utils.data_processor import obtener_columnas_numericas, obtener_columnas_categoricas
+from utils.bootstrap import intervalos_estadisticas
+from utils.graficos import crear_figura_estadistica, crear_figura_distribucion
+from utils.metricas import cronometrado
+from components.resumen_preguntas import mostrar_resumen_preguntas
+from components.tablas import mostrar_tabla
+from components.conteos_categoricos import mostrar_conteos_categoricos
+from components.comparacion_cohortes import mostrar_comparacion_cohortes
 
 
-def mostrar_tab_promocion(df_filtrado, columnas_excluir):
+@cronometrado('dashboard_seccion_segundos', seccion='promocion')
+def mostrar_tab_promocion(vista, columnas_excluir):
     """
     Muestra el tab de análisis por promoción
     
     Args:
-        df_filtrado: DataFrame filtrado
+        vista: Vista filtrada del dataset (utils.vista.VistaFiltrada)
         columnas_excluir: Columnas a excluir del análisis
     """
     st.header("Análisis Detallado por Promoción")
@@ -27,83 +33,111 @@ def mostrar_tab_promocion(df_filtrado, columnas_excluir):
     columna_promocion = COLUMNAS['promocion']
     
     # Análisis numérico
-    numeric_columns = obtener_columnas_numericas(df_filtrado, columnas_excluir)
+    numeric_columns = obtener_columnas_numericas(vista.base, columnas_excluir)
     
     if numeric_columns:
-        col_analizar = st.selectbox("Selecciona columna numérica para analizar", numeric_columns, key='promo_col')
-        
-        stats_por_promocion = calcular_estadisticas_por_grupo(df_filtrado, col_analizar, columna_promocion)
-        stats_por_promocion.columns = ['Promoción', 'Media', 'Mediana', 'Máximo', 'Mínimo', 'Cantidad']
-        
-        st.subheader(f"📈 Estadísticas de '{col_analizar}' por Promoción")
-        st.dataframe(stats_por_promocion, use_container_width=True)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig1 = px.bar(
-                stats_por_promocion, 
-                x='Promoción', 
-                y='Media',
-                title=f'Media de {col_analizar} por Promoción',
-                color='Media',
-                color_continuous_scale=COLOR_SCALES['media']
-            )
-            st.plotly_chart(fig1, use_container_width=True)
-        
-        with col2:
-            fig2 = px.bar(
-                stats_por_promocion, 
-                x='Promoción', 
-                y='Mediana',
-                title=f'Mediana de {col_analizar} por Promoción',
-                color='Mediana',
-                color_continuous_scale=COLOR_SCALES['mediana']
-            )
-            st.plotly_chart(fig2, use_container_width=True)
+        df_numerico = vista.columnas([columna_promocion] + numeric_columns)
+        mostrar_resumen_preguntas(df_numerico, numeric_columns, columna_promocion, 'Promoción', key='promo')
+        _mostrar_estadisticas(df_numerico, numeric_columns)
     else:
         st.info("No hay columnas numéricas para analizar")
     
     # Análisis categórico
+    categorical_cols = obtener_columnas_categoricas(vista.base, columnas_excluir)
+    _mostrar_analisis_categorico(vista, categorical_cols)
+    
+    # Comparación entre dos promociones
+    st.markdown("---")
+    mostrar_comparacion_cohortes(
+        vista, numeric_columns, categorical_cols, columna_promocion, 'Promoción', key='promo'
+    )
+
+
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='promocion/estadisticas')
+def _mostrar_estadisticas(df_numerico, numeric_columns):
+    """Muestra las estadísticas de la columna numérica elegida por promoción"""
+    columna_promocion = COLUMNAS['promocion']
+    
+    col_analizar = st.selectbox("Selecciona columna numérica para analizar", numeric_columns, key='promo_col')
+    
+    stats_por_promocion = calcular_estadisticas_por_grupo(df_numerico, col_analizar, columna_promocion)
+    stats_por_promocion.columns = ['Promoción', 'Media', 'Mediana', 'Máximo', 'Mínimo', 'Cantidad']
+    
+    if st.checkbox(
+        f"Mostrar intervalos de confianza del {BOOTSTRAP_NIVEL:.0%} (bootstrap)",
+        key='promo_intervalos',
+        help="Intervalos de la media y la mediana remuestreando las respuestas de cada promoción. "
+             "Los grupos con pocas respuestas tienen intervalos más anchos."
+    ):
+        intervalos = intervalos_estadisticas(df_numerico, col_analizar, columna_promocion)
+        stats_por_promocion = stats_por_promocion.merge(
+            intervalos.rename(columns={columna_promocion: 'Promoción'}), on='Promoción', how='left'
+        )
+    
+    st.subheader(f"📈 Estadísticas de '{col_analizar}' por Promoción")
+    mostrar_tabla(stats_por_promocion, {'Cantidad': 'conteo'}, por_defecto='decimal')
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig1 = crear_figura_estadistica(
+            stats_por_promocion, 'Promoción', 'Media', f'Media de {col_analizar} por Promoción', 'media'
+        )
+        st.plotly_chart(fig1, use_container_width=True)
+    
+    with col2:
+        fig2 = crear_figura_estadistica(
+            stats_por_promocion, 'Promoción', 'Mediana', f'Mediana de {col_analizar} por Promoción', 'mediana'
+        )
+        st.plotly_chart(fig2, use_container_width=True)
+
+
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='promocion/categorico')
+def _mostrar_analisis_categorico(vista, categorical_cols):
+    """Muestra la distribución de la columna categórica elegida por promoción"""
     st.subheader("📝 Análisis de Columnas Categóricas por Promoción")
     
-    categorical_cols = obtener_columnas_categoricas(df_filtrado, columnas_excluir)
+    if not categorical_cols:
+        return
     
-    if categorical_cols:
-        col_categorica = st.selectbox("Selecciona columna categórica", categorical_cols, key='promo_cat')
-        
-        # Verificar si es una columna de porcentaje
-        columna_expectativas = COLUMNAS['expectativas']
-        columna_recomendacion = COLUMNAS['recomendacion']
-        es_columna_porcentaje = col_categorica in [columna_expectativas, columna_recomendacion]
+    columna_promocion = COLUMNAS['promocion']
+    col_categorica = st.selectbox("Selecciona columna categórica", categorical_cols, key='promo_cat')
+    df_filtrado = vista.columnas([columna_promocion, COLUMNAS['modulo'], col_categorica])
+    
+    # Verificar si es una columna de porcentaje
+    columna_expectativas = COLUMNAS['expectativas']
+    columna_recomendacion = COLUMNAS['recomendacion']
+    es_columna_porcentaje = col_categorica in [columna_expectativas, columna_recomendacion]
+    
+    if es_columna_porcentaje:
+        # Verificar si necesita filtro especial
+        necesita_filtro, valor_modulo, descripcion = necesita_filtro_modulo(col_categorica)
         
-        if es_columna_porcentaje:
-            # Verificar si necesita filtro especial
-            necesita_filtro, valor_modulo, descripcion = necesita_filtro_modulo(col_categorica)
+        if necesita_filtro and COLUMNAS['modulo'] in df_filtrado.columns:
+            st.info(f"ℹ️ {descripcion}")
             
-            if necesita_filtro and COLUMNAS['modulo'] in df_filtrado.columns:
-                st.info(f"ℹ️ {descripcion}")
-                
-                porcentajes, df_usado = calcular_porcentajes_con_filtro(
-                    df_filtrado, 
-                    col_categorica, 
-                    columna_promocion, 
-                    'Promoción',
-                    filtro_modulo=valor_modulo
-                )
-                
-                if porcentajes is not None:
-                    st.caption(f"📊 Analizando {len(df_usado)} registros del {valor_modulo}")
-                    _mostrar_analisis_porcentajes(porcentajes, col_categorica, valor_modulo)
-                else:
-                    st.warning(f"⚠️ No hay datos disponibles para {valor_modulo}")
+            porcentajes, df_usado = calcular_porcentajes_con_filtro(
+                df_filtrado, 
+                col_categorica, 
+                columna_promocion, 
+                'Promoción',
+                filtro_modulo=valor_modulo
+            )
+            
+            if porcentajes is not None:
+                st.caption(f"📊 Analizando {len(df_usado)} registros del {valor_modulo}")
+                _mostrar_analisis_porcentajes(porcentajes, col_categorica, valor_modulo)
             else:
-                porcentajes = calcular_porcentajes(df_filtrado, col_categorica, columna_promocion, 'Promoción')
-                if porcentajes is not None:
-                    _mostrar_analisis_porcentajes(porcentajes, col_categorica)
+                st.warning(f"⚠️ No hay datos disponibles para {valor_modulo}")
         else:
-            # Mostrar en conteos normales
-            _mostrar_analisis_conteos(df_filtrado, col_categorica, columna_promocion)
+            porcentajes = calcular_porcentajes(df_filtrado, col_categorica, columna_promocion, 'Promoción')
+            if porcentajes is not None:
+                _mostrar_analisis_porcentajes(porcentajes, col_categorica)
+    else:
+        # Mostrar en conteos normales
+        mostrar_conteos_categoricos(df_filtrado, col_categorica, columna_promocion, 'Promoción', key='promo')
 
 
 def _mostrar_analisis_porcentajes(porcentajes, col_categorica, modulo_filtrado=None):
@@ -119,46 +153,13 @@ def _mostrar_analisis_porcentajes(porcentajes, col_categorica, modulo_filtrado=N
     ).fillna(0)
     tabla_pct['TOTAL'] = tabla_pct.sum(axis=1)
     
-    st.dataframe(tabla_pct.style.format("{:.2f}%"), use_container_width=True)
+    mostrar_tabla(tabla_pct, por_defecto='porcentaje')
     st.caption("💡 Cada fila debe sumar 100% (porcentaje dentro de cada promoción)")
     
     try:
-        fig_cat = px.bar(
-            porcentajes,
-            x='Promoción',
-            y='Porcentaje',
-            color=col_categorica,
-            title=f'Distribución de {col_categorica} por Promoción (%)' + titulo_extra,
-            text='Porcentaje',
-            barmode='stack'
+        fig_cat = crear_figura_distribucion(
+            porcentajes, 'Promoción', col_categorica, f'Distribución de {col_categorica} por Promoción (%)' + titulo_extra
         )
-        fig_cat.update_traces(texttemplate='%{text:.1f}%', textposition='inside')
-        fig_cat.update_layout(yaxis_title="Porcentaje (%)", yaxis_range=[0, 100])
         st.plotly_chart(fig_cat, use_container_width=True)
     except Exception as e:
         st.warning(f"⚠️ No se pudo generar el gráfico: {str(e)}")
-
-
-def _mostrar_analisis_conteos(df_filtrado, col_categorica, columna_promocion):
-    """Muestra análisis de conteos"""
-    crosstab = pd.crosstab(df_filtrado[columna_promocion], df_filtrado[col_categorica])
-    st.dataframe(crosstab, use_container_width=True)
-    
-    try:
-        crosstab_reset = crosstab.reset_index()
-        value_columns = crosstab.columns.tolist()
-        
-        if len(value_columns) > 0:
-            fig_cat = px.bar(
-                crosstab_reset, 
-                x=columna_promocion,
-                y=value_columns,
-                title=f'Distribución de {col_categorica} por Promoción',
-                barmode='stack'
-            )
-            st.plotly_chart(fig_cat, use_container_width=True)
-        else:
-            st.warning("⚠️ No hay suficientes datos para generar el gráfico")
-    except Exception as e:
-        st.warning(f"⚠️ No se pudo generar el gráfico: {str(e)}")
-        st.info("La tabla de datos sigue siendo visible arriba.")
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Tab de Tendencias Temporales
+"""
+import streamlit as st
+import plotly.express as px
+from config.settings import COLUMNAS, VENTANA_TENDENCIA
+from utils.calculations import necesita_filtro_modulo
+from utils.data_processor import obtener_columnas_numericas, obtener_columnas_categoricas
+from utils.tendencias import (
+    seleccionar_particiones,
+    calcular_agregados_particiones,
+    calcular_tendencia
+)
+from utils.metricas import cronometrado
+
+
+@st.fragment
+@cronometrado('dashboard_seccion_segundos', seccion='tendencias')
+def mostrar_tab_tendencias(df, particiones, tiene_modulo, columnas_excluir,
+                           filtro_promocion, filtro_modulo=None):
+    """
+    Muestra la evolución temporal de los KPIs por promoción o módulo
+
+    Args:
+        df: DataFrame completo (las particiones apuntan a sus filas)
+        particiones: dict {pd.Period: posiciones} creado al cargar los datos
+        tiene_modulo: Si existe la columna de módulo
+        columnas_excluir: Columnas a excluir del análisis
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+    """
+    st.header("Tendencias en el Tiempo")
+
+    if not particiones:
+        st.info(f"ℹ️ No se encontró la columna '{COLUMNAS['fecha']}' con fechas válidas")
+        return
+
+    columna_promocion = COLUMNAS['promocion']
+    columna_modulo = COLUMNAS['modulo']
+    claves = [columna_promocion, columna_modulo] if tiene_modulo else [columna_promocion]
+
+    periodos = list(particiones)
+    fecha_min = periodos[0].start_time.date()
+    fecha_max = periodos[-1].end_time.date()
+
+    # Configuración
+    col_config1, col_config2, col_config3 = st.columns(3)
+
+    with col_config1:
+        rango = st.date_input(
+            "Rango de fechas",
+            value=(fecha_min, fecha_max),
+            min_value=fecha_min,
+            max_value=fecha_max,
+            key='tend_rango'
+        )
+
+    with col_config2:
+        opciones_agrupacion = ['Promoción', 'Módulo'] if tiene_modulo else ['Promoción']
+        tipo_agrupacion = st.selectbox("Agrupar por", opciones_agrupacion, key='tend_grupo')
+
+    with col_config3:
+        ventana = st.slider(
+            "Ventana móvil (periodos)",
+            min_value=1,
+            max_value=8,
+            value=VENTANA_TENDENCIA,
+            key='tend_ventana'
+        )
+
+    # El date_input devuelve una tupla incompleta mientras se elige el rango
+    if not isinstance(rango, (tuple, list)) or len(rango) != 2:
+        st.info("👆 Selecciona fecha de inicio y de fin")
+        return
+
+    fecha_inicio, fecha_fin = rango
+    seleccion = seleccionar_particiones(particiones, fecha_inicio, fecha_fin)
+
+    if not seleccion:
+        st.warning("⚠️ No hay respuestas en el rango de fechas seleccionado")
+        return
+
+    st.caption(f"📅 Analizando {len(seleccion)} de {len(particiones)} periodos")
+
+    grupo_col = columna_promocion if tipo_agrupacion == 'Promoción' else columna_modulo
+    parametros = dict(
+        df=df,
+        particiones=particiones,
+        seleccion=seleccion,
+        claves=claves,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin
+    )
+    filtros = dict(filtro_promocion=filtro_promocion, filtro_modulo=filtro_modulo)
+
+    # ========== KPIs DE SATISFACCIÓN (PORCENTAJES) ==========
+    st.markdown("---")
+    st.subheader("✨ Evolución de KPIs de Satisfacción (%)")
+
+    categorical_cols = obtener_columnas_categoricas(df, columnas_excluir)
+    preguntas_kpi = [col for col in dict.fromkeys(COLUMNAS.values()) if col in categorical_cols]
+
+    if preguntas_kpi:
+        col_kpi1, col_kpi2 = st.columns(2)
+
+        with col_kpi1:
+            pregunta = st.selectbox("Selecciona pregunta", preguntas_kpi, key='tend_pregunta')
+
+        necesita_filtro, valor_modulo, descripcion = necesita_filtro_modulo(pregunta)
+        valor_modulo = valor_modulo if necesita_filtro and tiene_modulo else None
+
+        with col_kpi2:
+            respuestas = sorted(df[pregunta].dropna().unique().tolist(), key=str)
+            respuesta = st.selectbox("Respuesta a seguir", respuestas, key='tend_respuesta')
+
+        if valor_modulo:
+            st.info(f"ℹ️ {descripcion}")
+
+        agregados = calcular_agregados_particiones(
+            columna=pregunta, es_numerica=False, filtro_modulo=valor_modulo, **parametros
+        )
+        tendencia = calcular_tendencia(
+            agregados, grupo_col, tipo_agrupacion, ventana=ventana,
+            respuesta=respuesta, columna=pregunta, **filtros
+        )
+
+        if tendencia is not None:
+            fig = px.line(
+                tendencia,
+                x='Periodo',
+                y='Valor',
+                color=tipo_agrupacion,
+                markers=True,
+                hover_data=['Cantidad'],
+                title=f"% '{respuesta}' en {pregunta} (ventana de {ventana} periodos)"
+            )
+            fig.update_layout(yaxis_title='Porcentaje (%)', yaxis_range=[0, 100])
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("⚠️ No hay datos suficientes para mostrar la tendencia")
+    else:
+        st.info("No hay preguntas de satisfacción en los datos")
+
+    # ========== MEDIAS DE COLUMNAS NUMÉRICAS ==========
+    st.markdown("---")
+    st.subheader("📈 Evolución de Medias")
+
+    numeric_columns = obtener_columnas_numericas(df, columnas_excluir)
+
+    if numeric_columns:
+        col_analizar = st.selectbox(
+            "Selecciona columna numérica para analizar", numeric_columns, key='tend_col'
+        )
+
+        agregados = calcular_agregados_particiones(columna=col_analizar, es_numerica=True, **parametros)
+        tendencia = calcular_tendencia(
+            agregados, grupo_col, tipo_agrupacion, ventana=ventana, es_numerica=True, **filtros
+        )
+
+        if tendencia is not None:
+            fig = px.line(
+                tendencia,
+                x='Periodo',
+                y='Valor',
+                color=tipo_agrupacion,
+                markers=True,
+                hover_data=['Cantidad'],
+                title=f"Media móvil de {col_analizar} (ventana de {ventana} periodos)"
+            )
+            fig.update_layout(yaxis_title='Media')
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("⚠️ No hay datos suficientes para mostrar la tendencia")
+    else:
+        st.info("No hay columnas numéricas para analizar")
@@ -0,0 +1,48 @@
+"""
+Presentación de tablas
+
+Las tablas se envían al navegador con sus tipos numéricos (Arrow compacto)
+y el formato de cada columna se declara con st.column_config, de modo que
+se aplica en el cliente en lugar de convertir cada celda a texto en Python.
+"""
+import streamlit as st
+from config.settings import FORMATOS_TABLA
+
+
+def mostrar_tabla(df, formatos=None, por_defecto=None, **kwargs):
+    """
+    Muestra un DataFrame con formatos de presentación por columna
+
+    Args:
+        df: DataFrame a mostrar (se mantiene numérico)
+        formatos: dict {columna: tipo}, con tipo una clave de FORMATOS_TABLA
+                  ('porcentaje', 'decimal', 'conteo') o un formato printf
+        por_defecto: Tipo para las columnas numéricas sin formato propio
+        **kwargs: Argumentos adicionales para st.dataframe (height, hide_index...)
+    """
+    kwargs.setdefault('use_container_width', True)
+    st.dataframe(df, column_config=configurar_columnas(df, formatos, por_defecto), **kwargs)
+
+
+def configurar_columnas(df, formatos=None, por_defecto=None):
+    """
+    Construye el column_config de st.dataframe para los formatos indicados
+
+    Args:
+        df: DataFrame a mostrar
+        formatos: dict {columna: tipo} (ver mostrar_tabla)
+        por_defecto: Tipo para las columnas numéricas sin formato propio
+
+    Returns:
+        dict: {nombre de columna: st.column_config.NumberColumn}
+    """
+    formatos = dict(formatos or {})
+    if por_defecto is not None:
+        for columna in df.select_dtypes('number').columns:
+            formatos.setdefault(columna, por_defecto)
+
+    return {
+        str(columna): st.column_config.NumberColumn(format=FORMATOS_TABLA.get(tipo, tipo))
+        for columna, tipo in formatos.items()
+        if columna in df.columns
+    }
@@ -1,6 +1,8 @@
 """
 Configuración y constantes del dashboard
 """
+import os
+import tempfile
 
 # Configuración de la página
 PAGE_CONFIG = {
@@ -16,11 +18,66 @@ COLUMNAS = {
     'expectativas_IA': '¿Los contenidos de los talleres han cumplido tus expectativas?',
     'expectativas PW': '¿Ha cumplido el Bootcamp de programación web de Adalab tus expectativas?',
     'recomendacion': '¿Recomendarías Adalab a otras mujeres?', 
-    "recomendacion_IA": '¿Recomendarías estos talleres a otras alumnas?'
+    "recomendacion_IA": '¿Recomendarías estos talleres a otras alumnas?',
+    'fecha': 'Submitted At',
+    'token': 'Token'
 }
 
+# Posición (entre las columnas numéricas) de la pregunta que se destaca en
+# los KPIs principales: "Valora de forma global el equipo docente"
+INDICE_COLUMNA_DESTACADA = 89
+
+# Formatos de archivo admitidos (extensión sin punto); cada uno tiene su
+# lector en utils/lectores.py
+FORMATOS_ENTRADA = ['xlsx', 'xls', 'csv', 'tsv', 'parquet', 'feather', 'arrow', 'json', 'jsonl']
+
 # Columnas a eliminar automáticamente
-COLUMNAS_ELIMINAR = ['Submitted At', 'Token']
+COLUMNAS_ELIMINAR = []
+
+# Frecuencia de las particiones temporales creadas al cargar los datos
+# (alias de periodo de pandas: 'W' = semana, 'M' = mes, 'D' = día)
+FRECUENCIA_PARTICION = 'W'
+
+# Segundos que un trabajo de carga terminado sigue disponible para otras
+# sesiones que suban el mismo archivo
+INGESTA_SEGUNDOS_RETENCION = 60
+
+# Presupuesto de memoria (MB) de la caché de datasets compartida entre
+# sesiones; se expulsan los datasets menos usados recientemente
+CACHE_MEMORIA_MAX_MB = 1024
+
+# Volcado a disco de los datos de sesiones inactivas
+SPILL_DIRECTORIO = os.path.join(tempfile.gettempdir(), 'dashboard-kpis-volcado')
+SPILL_SEGUNDOS_INACTIVIDAD = 30 * 60      # Volcar tras 30 minutos sin interacción
+SPILL_SEGUNDOS_BORRADO = 7 * 24 * 3600    # Olvidar la sesión tras 7 días
+SPILL_INTERVALO_REVISION = 60             # Cada cuánto se revisan las sesiones
+
+# Carpeta del servidor con los exports (por ejemplo, los que se dejan cada
+# noche). Si está definida, la barra lateral permite abrirlos sin subirlos:
+# los nuevos o modificados se cargan en segundo plano en la caché
+CARPETA_DATOS = os.environ.get('DASHBOARD_CARPETA_DATOS') or None
+CARPETA_INTERVALO_REVISION = 60   # Cada cuánto se revisa la carpeta
+CARPETA_SEGUNDOS_ESTABLE = 10     # Los archivos modificados hace menos se revisan en la siguiente pasada (copia en curso)
+CARPETA_MAX_PRECARGA = 5          # Exports más recientes que se cargan sin esperar a que alguien los abra
+
+# Modo progresivo para exports grandes: mientras se calcula el dataset
+# completo, los KPIs y el análisis por promoción y módulo se muestran como
+# provisionales sobre una muestra estratificada por promoción y módulo
+PROGRESIVO_MIN_FILAS = 100_000        # Solo para exports con más filas
+PROGRESIVO_TAMANO_MUESTRA = 20_000    # Filas de la muestra (respuesta por debajo del segundo)
+PROGRESIVO_MIN_POR_GRUPO = 50         # Filas mínimas de cada grupo en la muestra (o todas si tiene menos)
+PROGRESIVO_SEMILLA = 42               # Misma semilla = misma muestra para el mismo archivo
+
+# Segundos entre actualizaciones de la barra de progreso de la carga
+INGESTA_INTERVALO_PROGRESO = 0.5
+
+# Ventana móvil por defecto (en periodos) para las tendencias
+VENTANA_TENDENCIA = 3
+
+# Cambios de filtros que se aplican sumando y restando celdas a la selección
+# de los KPIs antes de recalcularla desde el cubo (las sumas decimales
+# acumulan error de redondeo en cada resta)
+SELECCION_MAX_ACTUALIZACIONES = 20
 
 # NUEVO: Configuración de filtros especiales por pregunta
 FILTROS_ESPECIALES = {
@@ -43,6 +100,52 @@ FILTROS_ESPECIALES = {
     }
 }
 
+# KPIs de la pestaña principal. Cada KPI declara:
+#   titulo, icono: Cabecera de la sección
+#   pregunta: Columna del Excel
+#   metrica: 'distribucion' (% de cada respuesta), 'top_box' (% de respuestas
+#            en 'positivas'), 'media' o 'nps' (% de 9-10 menos % de 0-6)
+#   modulo: Módulo al que se restringe la pregunta, o None (opcional: por
+#           defecto, el de la pregunta en FILTROS_ESPECIALES)
+#   agrupaciones: Niveles por los que se muestra ('promocion', 'modulo')
+#   positivas: Respuestas que cuentan como positivas (solo 'top_box')
+# Todos los KPIs se evalúan juntos con un único plan (utils/kpis.py): añadir
+# uno nuevo sobre una restricción y agrupación ya usadas casi no cuesta nada.
+KPIS = [
+    {
+        'titulo': 'Cumplimiento de Expectativas',
+        'icono': '✨',
+        'pregunta': COLUMNAS['expectativas'],
+        'metrica': 'distribucion',
+        'agrupaciones': ['promocion', 'modulo']
+    },
+    {
+        'titulo': 'Recomendación de Adalab',
+        'icono': '💚',
+        'pregunta': COLUMNAS['recomendacion'],
+        'metrica': 'distribucion',
+        'agrupaciones': ['promocion', 'modulo']
+    },
+    # Ejemplo de KPI de porcentaje de respuestas positivas:
+    # {
+    #     'titulo': 'Recomendaría Adalab',
+    #     'icono': '👍',
+    #     'pregunta': COLUMNAS['recomendacion'],
+    #     'metrica': 'top_box',
+    #     'positivas': ['Sí'],
+    #     'agrupaciones': ['promocion']
+    # },
+]
+
+# Normalización de las etiquetas de promoción y módulo al cargar los datos:
+# las variantes que solo difieren en espacios, mayúsculas o tildes ('modulo 4 ',
+# 'Modulo 4') se unifican. La etiqueta que se conserva es, por orden: la de
+# ETIQUETAS_ALIAS, la que usan los KPIS y FILTROS_ESPECIALES, o la variante
+# más frecuente. ETIQUETAS_ALIAS une además nombres distintos:
+# variante -> etiqueta (ej: 'Modulo IV': 'Módulo 4'); las variantes se
+# comparan igual, sin espacios, mayúsculas ni tildes
+ETIQUETAS_ALIAS = {}
+
 # Tipos de agregación disponibles
 AGREGACIONES = {
     "Media": 'mean',
@@ -61,4 +164,60 @@ COLOR_SCALES = {
     'mediana': 'Plasma',
     'modulo_media': 'Teal',
     'modulo_mediana': 'Mint'
-}
\ No newline at end of file
+}
+
+# Formatos de presentación de las tablas (printf, se aplican en el navegador
+# sobre los datos numéricos; ver components/tablas.py)
+FORMATOS_TABLA = {
+    'porcentaje': '%.2f%%',   # Valores ya en 0-100
+    'decimal': '%.2f',
+    'conteo': '%d',
+    'diferencia': '%+.2f',
+    'diferencia_pp': '%+.2f pp',                # Puntos porcentuales
+    'diferencia_conteo': '%+d'
+}
+
+# Procesos para construir en paralelo las figuras de los informes HTML
+INFORMES_PROCESOS = min(8, os.cpu_count() or 1)
+
+# API HTTP de consultas (api.py)
+API_HOST = '127.0.0.1'
+API_PUERTO = 8502
+API_CACHE_RESPUESTAS = 512                # Respuestas JSON guardadas (LRU)
+API_EXTENSIONES = tuple(f'.{formato}' for formato in FORMATOS_ENTRADA)  # Archivos que se sirven de un directorio
+
+# Métricas de operación en formato de texto de Prometheus (utils/metricas.py).
+# Se sirven en http://METRICAS_HOST:METRICAS_PUERTO/metrics y/o se escriben
+# cada METRICAS_INTERVALO_ARCHIVO segundos en METRICAS_ARCHIVO (para el
+# textfile collector de node_exporter); sin ninguno de los dos solo se
+# acumulan en memoria. La API (api.py) las sirve además en su propio /metrics
+METRICAS_HOST = '127.0.0.1'
+METRICAS_PUERTO = int(os.environ.get('DASHBOARD_METRICAS_PUERTO') or 0) or None
+METRICAS_ARCHIVO = os.environ.get('DASHBOARD_METRICAS_ARCHIVO') or None
+METRICAS_INTERVALO_ARCHIVO = 15
+# Límites (segundos) de las cubetas de los histogramas de latencia
+METRICAS_CUBETAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Comparación estadística entre cohortes
+COMPARACION_ALFA = 0.05                   # Significación tras corregir (Benjamini-Hochberg)
+COMPARACION_MAX_RESPUESTAS = 20           # Más respuestas distintas = texto libre, sin chi-cuadrado
+
+# Columnas categóricas con muchos valores distintos (texto libre, emails...):
+# se muestran los más frecuentes y el resto se agrupa en 'Otros'
+TOPK_UMBRAL_VALORES = 20                  # Más valores distintos = modo top-K
+TOPK_VALORES = 10                         # Valores mostrados por defecto
+TOPK_CAPACIDAD = 200                      # Contadores del resumen Space-Saving
+TOPK_BLOQUE = 50_000                      # Filas procesadas en cada paso del recuento
+TOPK_ETIQUETA_OTROS = 'Otros'
+
+# Análisis de comentarios (texto libre)
+COMENTARIOS_MIN_PALABRAS = 3              # Media de palabras por respuesta para tratar una columna como comentario
+COMENTARIOS_TERMINOS = 10                 # Términos mostrados por grupo
+COMENTARIOS_PALABRAS_VACIAS_EXTRA = []    # Palabras a ignorar además de las vacías del español (ej: 'adalab')
+
+# Intervalos de confianza por bootstrap
+BOOTSTRAP_REMUESTRAS = 1000
+BOOTSTRAP_NIVEL = 0.95
+BOOTSTRAP_SEMILLA = 42                    # Misma semilla = mismos intervalos en cada recarga
+BOOTSTRAP_MAX_ELEMENTOS = 4_000_000       # Tamaño máximo de cada bloque de la matriz de índices
+BOOTSTRAP_CACHE_ENTRADAS = 256            # Intervalos guardados por estado de filtros (LRU)
@@ -0,0 +1,373 @@
+"""
+Agregados por grupo (promoción x módulo) reutilizables
+
+El "cubo" guarda, para cada combinación de promoción y módulo, el número de
+registros, las sumas y conteos de las columnas numéricas y el conteo de
+respuestas de las preguntas de satisfacción. A partir de él se obtienen
+medias y porcentajes para cualquier selección de grupos sin volver a
+recorrer las filas.
+"""
+import pandas as pd
+from config.settings import COLUMNAS, KPIS, SELECCION_MAX_ACTUALIZACIONES
+from utils.data_processor import obtener_columnas_numericas, obtener_columnas_categoricas
+
+
+def claves_cubo(tiene_modulo):
+    """
+    Columnas que identifican cada celda del cubo
+
+    Args:
+        tiene_modulo: Si existe la columna de módulo
+
+    Returns:
+        list: Columnas de agrupación
+    """
+    if tiene_modulo:
+        return [COLUMNAS['promocion'], COLUMNAS['modulo']]
+    return [COLUMNAS['promocion']]
+
+
+def calcular_cubo(df, tiene_modulo, columnas_excluir):
+    """
+    Calcula los agregados por promoción (y módulo) de un DataFrame
+
+    Las filas sin promoción o sin módulo forman su propio grupo (clave nula)
+    en todas las tablas, igual que en los conteos del dataset, las opciones
+    de los filtros y utils.vista: los totales no cambian según se calcule el
+    cubo de una vez o sumando deltas.
+
+    Args:
+        df: DataFrame con los datos
+        tiene_modulo: Si existe la columna de módulo
+        columnas_excluir: Columnas a excluir del análisis
+
+    Returns:
+        dict: Cubo con claves 'tamanos', 'sumas', 'conteos' y 'respuestas'
+    """
+    claves = claves_cubo(tiene_modulo)
+    numericas = obtener_columnas_numericas(df, columnas_excluir)
+    categoricas = obtener_columnas_categoricas(df, columnas_excluir)
+    # Preguntas de satisfacción y de los KPIs declarados que se cuentan por respuesta
+    preguntas_kpi = [kpi['pregunta'] for kpi in KPIS if kpi['metrica'] != 'media']
+    preguntas = [
+        col for col in dict.fromkeys(list(COLUMNAS.values()) + preguntas_kpi)
+        if col in categoricas or (col in preguntas_kpi and col in df.columns)
+    ]
+
+    agrupado = df.groupby(claves, dropna=False)
+
+    return {
+        'claves': claves,
+        'tamanos': _normalizar_indice(agrupado.size()),
+        'sumas': _normalizar_indice(_consolidar(agrupado[numericas].sum())),
+        'conteos': _normalizar_indice(_consolidar(agrupado[numericas].count())),
+        'respuestas': {
+            pregunta: _contar_respuestas(df, claves, pregunta)
+            for pregunta in preguntas
+        }
+    }
+
+
+def memoria_cubo(cubo):
+    """
+    Bytes ocupados por un cubo de agregados
+
+    Args:
+        cubo: Cubo creado con calcular_cubo
+
+    Returns:
+        int: Bytes aproximados (tablas e índices)
+    """
+    tablas = [cubo['tamanos'], cubo['sumas'], cubo['conteos'], *cubo['respuestas'].values()]
+    total = 0
+    for tabla in tablas:
+        memoria = tabla.memory_usage(deep=True)
+        total += int(memoria.sum() if isinstance(tabla, pd.DataFrame) else memoria)
+    return total
+
+
+def sumar_cubos(cubo, otro):
+    """
+    Suma dos cubos celda a celda (por ejemplo, el actual y el de un delta)
+
+    Args:
+        cubo: Cubo original
+        otro: Cubo a sumar
+
+    Returns:
+        dict: Nuevo cubo
+    """
+    def _sumar(a, b):
+        return a.add(b, fill_value=0)
+
+    respuestas = dict(cubo['respuestas'])
+    for pregunta, conteo in otro['respuestas'].items():
+        respuestas[pregunta] = _sumar(respuestas[pregunta], conteo) if pregunta in respuestas else conteo
+
+    return {
+        'claves': cubo['claves'],
+        'tamanos': _sumar(cubo['tamanos'], otro['tamanos']),
+        'sumas': _consolidar(_sumar(cubo['sumas'], otro['sumas'])),
+        'conteos': _consolidar(_sumar(cubo['conteos'], otro['conteos'])),
+        'respuestas': respuestas
+    }
+
+
+def filtrar_cubo(tabla, filtro_promocion=None, filtro_modulo=None):
+    """
+    Selecciona las celdas de una tabla del cubo según los filtros
+
+    Args:
+        tabla: Series o DataFrame indexado por las claves del cubo
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+
+    Returns:
+        Series o DataFrame con las filas seleccionadas
+    """
+    mascara = pd.Series(True, index=tabla.index)
+    niveles = tabla.index.names
+
+    if filtro_promocion is not None and COLUMNAS['promocion'] in niveles:
+        mascara &= tabla.index.get_level_values(COLUMNAS['promocion']).isin(filtro_promocion)
+    if filtro_modulo is not None and COLUMNAS['modulo'] in niveles:
+        mascara &= tabla.index.get_level_values(COLUMNAS['modulo']).isin(filtro_modulo)
+
+    return tabla[mascara.values]
+
+
+def medias_desde_cubo(cubo, grupo_cols, filtro_promocion=None, filtro_modulo=None):
+    """
+    Calcula las medias de las columnas numéricas por grupo
+
+    Args:
+        cubo: Cubo calculado con calcular_cubo
+        grupo_cols: Columnas por las que agrupar (subconjunto de las claves)
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+
+    Returns:
+        tuple: (DataFrame de medias, DataFrame de conteos) indexados por grupo
+    """
+    sumas = filtrar_cubo(cubo['sumas'], filtro_promocion, filtro_modulo).groupby(grupo_cols).sum()
+    conteos = filtrar_cubo(cubo['conteos'], filtro_promocion, filtro_modulo).groupby(grupo_cols).sum()
+    return sumas / conteos.where(conteos > 0), conteos
+
+
+def porcentajes_desde_cubo(cubo, columna, grupo_col, nombre_grupo='Grupo',
+                           filtro_promocion=None, filtro_modulo=None, modulo_especial=None,
+                           total_registros=False):
+    """
+    Calcula porcentajes de respuestas DENTRO de cada grupo a partir del cubo,
+    con el mismo formato que calcular_porcentajes
+
+    Args:
+        cubo: Cubo calculado con calcular_cubo
+        columna: Pregunta de satisfacción a analizar
+        grupo_col: Columna por la que agrupar
+        nombre_grupo: Nombre para la columna de grupo en el resultado
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+        modulo_especial: Valor del módulo al que se restringe la pregunta (ej: 'Módulo 4')
+        total_registros: Si el total del grupo incluye los registros sin respuesta
+                         (como calcular_porcentajes) en lugar de solo las respuestas
+
+    Returns:
+        pd.DataFrame: Columnas [nombre_grupo, columna, 'Cantidad', 'Total', 'Porcentaje'],
+                      o None si no hay datos
+    """
+    if columna not in cubo['respuestas']:
+        return None
+
+    conteo = filtrar_cubo(cubo['respuestas'][columna], filtro_promocion, filtro_modulo)
+    if modulo_especial and COLUMNAS['modulo'] in conteo.index.names:
+        conteo = filtrar_cubo(conteo, filtro_modulo=[modulo_especial])
+
+    conteo = conteo.groupby([grupo_col, columna]).sum()
+    conteo = conteo[conteo > 0]
+    if len(conteo) == 0:
+        return None
+
+    resultado = conteo.reset_index(name='Cantidad')
+    if total_registros:
+        tamanos = filtrar_cubo(cubo['tamanos'], filtro_promocion, filtro_modulo).groupby(grupo_col).sum()
+        resultado['Total'] = resultado[grupo_col].map(tamanos)
+    else:
+        resultado['Total'] = resultado.groupby(grupo_col)['Cantidad'].transform('sum')
+
+    return _formatear_porcentajes(resultado, grupo_col, nombre_grupo)
+
+
+def crear_seleccion(cubo, filtro_promocion=None, filtro_modulo=None, columna=None):
+    """
+    Calcula los totales de una selección de filtros sumando sus celdas del
+    cubo: los registros por módulo (o en un único grupo 'Total' si no hay
+    módulo) y la suma y el conteo de la columna destacada
+
+    Igual que aplicar_filtros, una lista de filtro vacía equivale a no filtrar.
+
+    Args:
+        cubo: Cubo calculado con calcular_cubo
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+        columna: Columna numérica de la que calcular la media (opcional)
+
+    Returns:
+        dict: Selección con claves 'celdas', 'columna', 'totales' (tamanos
+              por módulo, suma y conteo de la columna) y 'actualizaciones'
+    """
+    if columna is not None and columna not in cubo['sumas'].columns:
+        columna = None
+    celdas = _celdas_seleccionadas(cubo, filtro_promocion, filtro_modulo)
+    return {
+        'celdas': celdas,
+        'columna': columna,
+        'totales': _sumar_celdas(cubo, celdas, columna),
+        'actualizaciones': 0
+    }
+
+
+def actualizar_seleccion(seleccion, cubo, filtro_promocion=None, filtro_modulo=None, columna=None):
+    """
+    Actualiza los totales de una selección cuando cambian los filtros,
+    sumando las celdas añadidas y restando las quitadas en lugar de
+    recalcular todo. Vuelve a sumar desde el cubo cuando se seleccionan
+    todas las celdas o tras SELECCION_MAX_ACTUALIZACIONES cambios, para que
+    el error de redondeo de las sumas no se acumule
+
+    Args:
+        seleccion: Selección creada con crear_seleccion sobre el mismo cubo
+        cubo: Cubo calculado con calcular_cubo
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+        columna: Columna numérica de la que calcular la media (opcional)
+
+    Returns:
+        dict: Selección nueva (la original no se modifica)
+    """
+    if columna is not None and columna not in cubo['sumas'].columns:
+        columna = None
+    if columna != seleccion['columna']:
+        return crear_seleccion(cubo, filtro_promocion, filtro_modulo, columna)
+
+    celdas = _celdas_seleccionadas(cubo, filtro_promocion, filtro_modulo)
+    anadidas = celdas - seleccion['celdas']
+    quitadas = seleccion['celdas'] - celdas
+
+    if not anadidas and not quitadas:
+        return seleccion
+
+    # Si cambia más de lo que queda es más barato sumar desde cero; al volver
+    # a la selección completa o tras muchos cambios se descarta además el
+    # error acumulado de las restas
+    if (len(anadidas) + len(quitadas) >= len(celdas)
+            or len(celdas) == int((cubo['tamanos'] > 0).sum())
+            or seleccion['actualizaciones'] >= SELECCION_MAX_ACTUALIZACIONES):
+        return crear_seleccion(cubo, filtro_promocion, filtro_modulo, columna)
+
+    totales = seleccion['totales']
+    if anadidas:
+        totales = _combinar_totales(totales, _sumar_celdas(cubo, anadidas, columna), 1)
+    if quitadas:
+        totales = _combinar_totales(totales, _sumar_celdas(cubo, quitadas, columna), -1)
+
+    return {
+        'celdas': celdas,
+        'columna': columna,
+        'totales': totales,
+        'actualizaciones': seleccion['actualizaciones'] + 1
+    }
+
+
+def metricas_desde_seleccion(seleccion):
+    """
+    Métricas principales de una selección
+
+    Args:
+        seleccion: Selección creada con crear_seleccion
+
+    Returns:
+        dict: 'registros', 'promociones', 'modulos' y 'media' de la columna
+              de la selección (None si no tiene)
+    """
+    totales = seleccion['totales']
+    tamanos = totales['tamanos']
+    promociones = {celda[0] if isinstance(celda, tuple) else celda for celda in seleccion['celdas']}
+
+    media = None
+    if seleccion['columna'] is not None:
+        conteo = totales['conteo']
+        media = totales['suma'] / conteo if conteo > 0 else float('nan')
+
+    return {
+        'registros': int(tamanos.sum()),
+        'promociones': len(promociones),
+        'modulos': int((tamanos > 0).sum()),
+        'media': media
+    }
+
+
+def _contar_respuestas(df, claves, pregunta):
+    """Respuestas por grupo y valor, con las claves de grupo nulas y sin las respuestas nulas"""
+    conteo = df.groupby(claves + [pregunta], dropna=False).size()
+    return _normalizar_indice(conteo[conteo.index.get_level_values(pregunta).notna()])
+
+
+def _normalizar_indice(tabla):
+    """
+    Rehace el MultiIndex de groupby(dropna=False), que guarda las claves
+    nulas como un valor NaN del nivel, para que las marque como faltantes
+    (como al alinear o sumar tablas): así isin las encuentra al elegir celdas
+    """
+    indice = tabla.index
+    if indice.nlevels == 1:
+        return tabla
+    niveles = [indice.get_level_values(nivel) for nivel in range(indice.nlevels)]
+    return tabla.set_axis(pd.MultiIndex.from_arrays(niveles, names=indice.names))
+
+
+def _consolidar(tabla):
+    """Guarda las columnas numéricas en un único bloque float (operaciones vectorizadas)"""
+    return pd.DataFrame(tabla.to_numpy(dtype=float), index=tabla.index, columns=tabla.columns)
+
+
+def _formatear_porcentajes(resultado, grupo_col, nombre_grupo):
+    resultado['Cantidad'] = resultado['Cantidad'].astype(int)
+    resultado['Total'] = resultado['Total'].astype(int)
+    resultado['Porcentaje'] = (resultado['Cantidad'] / resultado['Total'] * 100).round(2)
+    return resultado.rename(columns={grupo_col: nombre_grupo})
+
+
+def _celdas_seleccionadas(cubo, filtro_promocion, filtro_modulo):
+    """Celdas (claves del cubo) que cumplen los filtros"""
+    tamanos = filtrar_cubo(cubo['tamanos'], filtro_promocion or None, filtro_modulo or None)
+    return set(tamanos[tamanos > 0].index)
+
+
+def _sumar_celdas(cubo, celdas, columna=None):
+    """Registros por módulo y suma y conteo de la columna sobre unas celdas del cubo"""
+    celdas = list(celdas)
+    tamanos = cubo['tamanos']
+    elegidas = tamanos[tamanos.index.isin(celdas)]
+
+    if COLUMNAS['modulo'] in cubo['claves']:
+        grupo = elegidas.index.get_level_values(COLUMNAS['modulo'])
+    else:
+        grupo = pd.Index(['Total'] * len(elegidas), name='Total')
+
+    totales = {'tamanos': elegidas.groupby(grupo, dropna=False).sum(), 'suma': 0.0, 'conteo': 0}
+    if columna is not None:
+        en_celdas = cubo['sumas'].index.isin(celdas)
+        totales['suma'] = float(cubo['sumas'][columna][en_celdas].sum())
+        totales['conteo'] = int(cubo['conteos'][columna][en_celdas].sum())
+    return totales
+
+
+def _combinar_totales(totales, otros, signo):
+    """Suma (signo=1) o resta (signo=-1) unos totales parciales"""
+    # Los registros se guardan como enteros (al alinear pasan a float)
+    return {
+        'tamanos': totales['tamanos'].add(otros['tamanos'] * signo, fill_value=0).astype('int64'),
+        'suma': totales['suma'] + otros['suma'] * signo,
+        'conteo': totales['conteo'] + otros['conteo'] * signo
+    }
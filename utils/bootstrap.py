@@ -0,0 +1,225 @@
+"""
+Intervalos de confianza por bootstrap
+
+Todas las remuestras de todos los grupos salen de una única matriz de
+índices (remuestras x registros): cada registro del grupo g se sustituye
+por un índice aleatorio dentro del tramo de g, así que una sola
+indexación de NumPy remuestrea todos los grupos a la vez, sin bucles por
+grupo ni por remuestra. Si la matriz no cabe en BOOTSTRAP_MAX_ELEMENTOS
+se genera por bloques de remuestras.
+
+Los resultados dependen solo de los datos filtrados y de los parámetros
+(la semilla es fija), por lo que se guardan en una caché LRU compartida
+por todas las sesiones: volver a un estado de filtros ya visto no
+recalcula nada.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from config.settings import (
+    BOOTSTRAP_REMUESTRAS,
+    BOOTSTRAP_NIVEL,
+    BOOTSTRAP_SEMILLA,
+    BOOTSTRAP_MAX_ELEMENTOS,
+    BOOTSTRAP_CACHE_ENTRADAS
+)
+from utils.metricas import contar, registrar_recolector
+
+_CACHE = OrderedDict()
+_CANDADO = threading.Lock()
+
+
+def intervalos_estadisticas(df, columna, grupo_col, n_remuestras=BOOTSTRAP_REMUESTRAS,
+                            nivel=BOOTSTRAP_NIVEL, semilla=BOOTSTRAP_SEMILLA):
+    """
+    Intervalos de confianza de la media y la mediana de una columna por grupo
+
+    Args:
+        df: DataFrame con los datos
+        columna: Columna numérica a analizar
+        grupo_col: Columna por la que agrupar
+        n_remuestras: Número de remuestras bootstrap
+        nivel: Nivel de confianza (ej: 0.95)
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        pd.DataFrame: Una fila por grupo con columnas [grupo_col, 'Media IC inf.',
+                      'Media IC sup.', 'Mediana IC inf.', 'Mediana IC sup.']
+    """
+    # Registros ordenados por grupo y, dentro de cada grupo, por valor
+    datos = df[[grupo_col, columna]].dropna().sort_values([grupo_col, columna])
+    if len(datos) == 0:
+        return pd.DataFrame(columns=[grupo_col, 'Media IC inf.', 'Media IC sup.',
+                                     'Mediana IC inf.', 'Mediana IC sup.'])
+    codigos, grupos = pd.factorize(datos[grupo_col])
+    valores = datos[columna].to_numpy(dtype=float)
+    tamanos = np.bincount(codigos, minlength=len(grupos))
+
+    clave = _clave('estadisticas', [valores, tamanos, list(grupos)], n_remuestras, nivel, semilla)
+    resultado = _leer_cache(clave)
+    if resultado is not None:
+        return resultado.copy()
+
+    inicios = np.cumsum(tamanos) - tamanos
+    medias, medianas = [], []
+
+    for indices in _bloques_indices(tamanos, n_remuestras, semilla):
+        muestras = valores[indices]
+        medias.append(np.add.reduceat(muestras, inicios, axis=1) / tamanos)
+
+        # Los tramos de cada grupo no se solapan y los valores están ordenados
+        # dentro de cada grupo: ordenar los índices ordena cada remuestra por valor
+        ordenadas = valores[np.sort(indices, axis=1)]
+        medianas.append((ordenadas[:, inicios + (tamanos - 1) // 2] + ordenadas[:, inicios + tamanos // 2]) / 2)
+
+    limites_media = _percentiles(np.vstack(medias), nivel)
+    limites_mediana = _percentiles(np.vstack(medianas), nivel)
+
+    resultado = pd.DataFrame({
+        grupo_col: grupos,
+        'Media IC inf.': limites_media[0],
+        'Media IC sup.': limites_media[1],
+        'Mediana IC inf.': limites_mediana[0],
+        'Mediana IC sup.': limites_mediana[1]
+    })
+    _guardar_cache(clave, resultado)
+    return resultado.copy()
+
+
+def intervalos_porcentajes(porcentajes, nombre_grupo, columna, n_remuestras=BOOTSTRAP_REMUESTRAS,
+                           nivel=BOOTSTRAP_NIVEL, semilla=BOOTSTRAP_SEMILLA):
+    """
+    Añade a una tabla de porcentajes los intervalos de confianza de cada
+    porcentaje, remuestreando las respuestas dentro de cada grupo
+
+    Los registros se reconstruyen a partir de los conteos, así que sirve
+    igual para porcentajes calculados desde el DataFrame o desde el cubo.
+    Si 'Total' incluye registros sin respuesta, se remuestrean también.
+
+    Args:
+        porcentajes: DataFrame con columnas [nombre_grupo, columna, 'Cantidad', 'Total', 'Porcentaje']
+        nombre_grupo: Columna de grupo
+        columna: Columna de respuestas
+        n_remuestras: Número de remuestras bootstrap
+        nivel: Nivel de confianza (ej: 0.95)
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        pd.DataFrame: Copia de la tabla con las columnas 'IC inf.' e 'IC sup.' (en %)
+    """
+    resultado = porcentajes.copy()
+    # Sin registros que remuestrear (tabla vacía o todos los totales a 0)
+    if len(resultado) == 0 or resultado['Total'].sum() == 0:
+        resultado['IC inf.'] = np.nan
+        resultado['IC sup.'] = np.nan
+        return resultado
+
+    codigo_grupo, grupos = pd.factorize(resultado[nombre_grupo])
+    codigo_respuesta, respuestas = pd.factorize(resultado[columna])
+    cantidades = resultado['Cantidad'].to_numpy(dtype=np.int64)
+    totales = resultado.groupby(codigo_grupo)['Total'].first().to_numpy(dtype=np.int64)
+
+    clave = _clave('porcentajes', [codigo_grupo, codigo_respuesta, cantidades, totales],
+                   n_remuestras, nivel, semilla)
+    limites = _leer_cache(clave)
+
+    if limites is None:
+        sin_respuesta = len(respuestas)
+        n_grupos, n_codigos = len(grupos), len(respuestas) + 1
+
+        # Registros reconstruidos, ordenados por grupo (el código sin_respuesta
+        # completa cada grupo hasta su total)
+        faltan = np.maximum(totales - np.bincount(codigo_grupo, weights=cantidades, minlength=n_grupos), 0)
+        orden_grupo = np.concatenate([codigo_grupo, np.arange(n_grupos)])
+        orden_codigo = np.concatenate([codigo_respuesta, np.full(n_grupos, sin_respuesta)])
+        repeticiones = np.concatenate([cantidades, faltan.astype(np.int64)])
+        orden = np.argsort(orden_grupo, kind='stable')
+        registros = np.repeat(orden_codigo[orden], repeticiones[orden])
+        tamanos = np.bincount(orden_grupo, weights=repeticiones, minlength=n_grupos).astype(np.int64)
+        grupo_de = np.repeat(np.arange(n_grupos), tamanos)
+
+        bloques = []
+        for indices in _bloques_indices(tamanos, n_remuestras, semilla):
+            # Conteo (remuestra, grupo, respuesta) con un solo bincount
+            filas = np.arange(len(indices))[:, None]
+            celdas = (filas * n_grupos + grupo_de) * n_codigos + registros[indices]
+            conteos = np.bincount(celdas.ravel(), minlength=len(indices) * n_grupos * n_codigos)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                bloques.append(conteos.reshape(len(indices), n_grupos, n_codigos) / tamanos[:, None] * 100)
+
+        limites = _percentiles(np.concatenate(bloques), nivel)[:, codigo_grupo, codigo_respuesta]
+        _guardar_cache(clave, limites)
+
+    resultado['IC inf.'] = limites[0]
+    resultado['IC sup.'] = limites[1]
+    return resultado
+
+
+def _bloques_indices(tamanos, n_remuestras, semilla):
+    """
+    Genera la matriz de índices remuestreados (remuestras x registros) por
+    bloques de remuestras: la columna j toma valores dentro del tramo del
+    grupo al que pertenece el registro j
+    """
+    tamanos = np.asarray(tamanos, dtype=np.int64)
+    total = int(tamanos.sum())
+    inicios = np.cumsum(tamanos) - tamanos
+    desde = np.repeat(inicios, tamanos)
+    hasta = desde + np.repeat(tamanos, tamanos)
+
+    generador = np.random.default_rng(semilla)
+    por_bloque = max(1, BOOTSTRAP_MAX_ELEMENTOS // max(total, 1))
+
+    for inicio in range(0, n_remuestras, por_bloque):
+        filas = min(por_bloque, n_remuestras - inicio)
+        yield generador.integers(desde, hasta, size=(filas, total))
+
+
+def _percentiles(remuestras, nivel):
+    """Límites inferior y superior del intervalo por el método de percentiles"""
+    alfa = (1 - nivel) / 2
+    return np.quantile(remuestras, [alfa, 1 - alfa], axis=0)
+
+
+def _clave(tipo, arrays, n_remuestras, nivel, semilla):
+    """Clave de caché a partir del contenido de los datos y los parámetros"""
+    resumen = hashlib.sha256(tipo.encode())
+    for array in arrays:
+        if isinstance(array, np.ndarray):
+            resumen.update(np.ascontiguousarray(array).tobytes())
+        else:
+            resumen.update(repr(array).encode())
+        resumen.update(b'|')
+    return resumen.hexdigest(), n_remuestras, nivel, semilla
+
+
+def _leer_cache(clave):
+    """Devuelve un resultado guardado (y lo marca como reciente) o None"""
+    with _CANDADO:
+        if clave not in _CACHE:
+            contar('dashboard_cache_consultas_total', cache='bootstrap', resultado='fallo')
+            return None
+        _CACHE.move_to_end(clave)
+        contar('dashboard_cache_consultas_total', cache='bootstrap', resultado='acierto')
+        return _CACHE[clave]
+
+
+def _guardar_cache(clave, valor):
+    """Guarda un resultado descartando los menos recientes"""
+    with _CANDADO:
+        _CACHE[clave] = valor
+        _CACHE.move_to_end(clave)
+        while len(_CACHE) > BOOTSTRAP_CACHE_ENTRADAS:
+            _CACHE.popitem(last=False)
+            contar('dashboard_cache_expulsiones_total', cache='bootstrap')
+
+
+def _metricas():
+    """Entradas de la caché de intervalos para utils.metricas"""
+    with _CANDADO:
+        return [('dashboard_cache_entradas', {'cache': 'bootstrap'}, len(_CACHE))]
+
+
+registrar_recolector(_metricas)
@@ -0,0 +1,160 @@
+"""
+Caché de datasets compartida por todas las sesiones del proceso
+"""
+import threading
+from collections import OrderedDict
+from config.settings import CACHE_MEMORIA_MAX_MB
+from utils.metricas import registrar_recolector
+
+# clave (hash del contenido) -> (dataset, bytes estimados), en orden LRU
+_CACHE = OrderedDict()
+_BLOQUEO = threading.Lock()
+_ESTADISTICAS = {'aciertos': 0, 'fallos': 0, 'expulsiones': 0}
+
+
+def obtener_dataset(clave):
+    """
+    Devuelve el dataset cacheado para una clave y lo marca como usado
+
+    El dataset es compartido entre sesiones y de solo lectura: para
+    añadir filas hay que usar utils.dataset.actualizar_dataset, que
+    devuelve un dataset nuevo.
+
+    Args:
+        clave: Hash del contenido del archivo
+
+    Returns:
+        dict: Dataset o None si no está en caché
+    """
+    with _BLOQUEO:
+        entrada = _CACHE.get(clave)
+        if entrada is None:
+            _ESTADISTICAS['fallos'] += 1
+            return None
+        _CACHE.move_to_end(clave)
+        _ESTADISTICAS['aciertos'] += 1
+        return entrada[0]
+
+
+def esta_en_cache(clave):
+    """
+    Indica si una clave está en caché sin marcarla como usada ni contarla
+    como consulta (para mostrar estados)
+
+    Args:
+        clave: Hash del contenido del archivo
+
+    Returns:
+        bool: True si el dataset está en caché
+    """
+    with _BLOQUEO:
+        return clave in _CACHE
+
+
+def guardar_dataset(clave, dataset, limite_mb=None):
+    """
+    Guarda un dataset en la caché, expulsando los menos usados
+    recientemente hasta respetar el presupuesto de memoria
+
+    Args:
+        clave: Hash del contenido del archivo
+        dataset: Dataset creado con utils.dataset.crear_dataset
+        limite_mb: Presupuesto total en MB (por defecto CACHE_MEMORIA_MAX_MB)
+
+    Returns:
+        bool: True si el dataset quedó en caché
+    """
+    limite = (limite_mb if limite_mb is not None else CACHE_MEMORIA_MAX_MB) * 1024 ** 2
+    tamano = estimar_memoria(dataset)
+
+    if tamano > limite:
+        return False
+
+    with _BLOQUEO:
+        if clave in _CACHE:
+            _CACHE.move_to_end(clave)
+            return True
+
+        _CACHE[clave] = (dataset, tamano)
+        total = sum(bytes_entrada for _, bytes_entrada in _CACHE.values())
+
+        while total > limite:
+            _, (_, bytes_expulsados) = _CACHE.popitem(last=False)
+            total -= bytes_expulsados
+            _ESTADISTICAS['expulsiones'] += 1
+
+    return True
+
+
+def estimar_memoria(dataset):
+    """
+    Estima la memoria ocupada por un dataset
+
+    Args:
+        dataset: Dataset creado con utils.dataset.crear_dataset
+
+    Returns:
+        int: Bytes estimados
+    """
+    tamano = int(dataset['df'].memory_usage(deep=True).sum())
+    tamano += sum(posiciones.nbytes for posiciones in dataset['particiones'].values())
+    # Aproximación del conjunto de tokens (cadenas cortas + huecos de la tabla hash)
+    tamano += 100 * len(dataset['tokens'])
+    if dataset.get('cubo') is not None:
+        from utils.agregados import memoria_cubo
+        tamano += memoria_cubo(dataset['cubo'])
+    if dataset.get('comentarios'):
+        from utils.comentarios import memoria_indices
+        tamano += memoria_indices(dataset['comentarios'])
+    return tamano
+
+
+def estadisticas_cache():
+    """
+    Devuelve el estado actual de la caché
+
+    Returns:
+        dict: entradas, memoria_mb, aciertos, fallos y expulsiones
+    """
+    with _BLOQUEO:
+        return {
+            'entradas': len(_CACHE),
+            'memoria_mb': sum(bytes_entrada for _, bytes_entrada in _CACHE.values()) / 1024 ** 2,
+            **_ESTADISTICAS
+        }
+
+
+def memoria_cacheada(clave):
+    """
+    Memoria estimada al guardar el dataset de una clave, sin recalcularla
+
+    Args:
+        clave: Hash del contenido del archivo
+
+    Returns:
+        int: Bytes estimados, o None si la clave no está en caché
+    """
+    with _BLOQUEO:
+        entrada = _CACHE.get(clave)
+        return None if entrada is None else entrada[1]
+
+
+def vaciar_cache():
+    """Elimina todas las entradas de la caché"""
+    with _BLOQUEO:
+        _CACHE.clear()
+
+
+def _metricas():
+    """Estado de la caché para utils.metricas"""
+    estadisticas = estadisticas_cache()
+    return [
+        ('dashboard_cache_consultas_total', {'cache': 'datasets', 'resultado': 'acierto'}, estadisticas['aciertos']),
+        ('dashboard_cache_consultas_total', {'cache': 'datasets', 'resultado': 'fallo'}, estadisticas['fallos']),
+        ('dashboard_cache_expulsiones_total', {'cache': 'datasets'}, estadisticas['expulsiones']),
+        ('dashboard_cache_entradas', {'cache': 'datasets'}, estadisticas['entradas']),
+        ('dashboard_cache_memoria_bytes', {'cache': 'datasets'}, int(estadisticas['memoria_mb'] * 1024 ** 2)),
+    ]
+
+
+registrar_recolector(_metricas)
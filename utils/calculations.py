@@ -2,7 +2,7 @@
 Funciones para cálculos y estadísticas
 """
 import pandas as pd
-from config.settings import COLUMNAS, FILTROS_ESPECIALES
+from config.settings import COLUMNAS, FILTROS_ESPECIALES, INDICE_COLUMNA_DESTACADA
 
 
 def calcular_porcentajes(df_data, columna, grupo_col, nombre_grupo='Grupo'):
@@ -173,6 +173,23 @@ def calcular_estadisticas_combinado(df, columna_analizar, grupo_cols):
     return stats
 
 
+def obtener_columna_destacada(numeric_cols):
+    """
+    Devuelve la columna numérica que se destaca en los KPIs principales
+    
+    Args:
+        numeric_cols: Lista de columnas numéricas
+        
+    Returns:
+        str: Nombre de la columna, o None si no hay columnas numéricas
+    """
+    if len(numeric_cols) == 0:
+        return None
+    if len(numeric_cols) > INDICE_COLUMNA_DESTACADA:
+        return numeric_cols[INDICE_COLUMNA_DESTACADA]
+    return numeric_cols[0]
+
+
 def necesita_filtro_modulo(columna):
     """
     Verifica si una columna necesita filtro de módulo especial
@@ -187,4 +204,42 @@ def necesita_filtro_modulo(columna):
         if COLUMNAS.get(key) == columna:
             return True, config.get('modulo'), config.get('descripcion')
     
-    return False, None, None
\ No newline at end of file
+    return False, None, None
+
+def calcular_resumen_preguntas(df, columnas, grupo_col, nombre_grupo='Grupo'):
+    """
+    Calcula media, mediana, cantidad y tasa de respuesta de todas las
+    columnas numéricas por grupo en una sola agrupación
+    
+    Args:
+        df: DataFrame con los datos
+        columnas: Lista de columnas numéricas a analizar
+        grupo_col: Columna por la que agrupar
+        nombre_grupo: Nombre para la columna de grupo en el resultado
+        
+    Returns:
+        pd.DataFrame: Una fila por (grupo, pregunta) con columnas
+                      [nombre_grupo, 'Pregunta', 'Media', 'Mediana',
+                       'Cantidad', 'Tasa de respuesta (%)']
+    """
+    if not columnas or grupo_col not in df.columns:
+        return None
+    
+    agregado = df.groupby(grupo_col)[columnas].agg(['mean', 'median', 'count'])
+    tamanos = df.groupby(grupo_col).size()
+    
+    # Columnas (pregunta, estadística) -> filas (grupo, pregunta)
+    agregado.columns = agregado.columns.set_names(['Pregunta', 'Estadistica'])
+    resumen = agregado.stack(level='Pregunta').reset_index()
+    resumen.columns.name = None
+    resumen = resumen.rename(columns={
+        grupo_col: nombre_grupo,
+        'mean': 'Media',
+        'median': 'Mediana',
+        'count': 'Cantidad'
+    })
+    resumen['Tasa de respuesta (%)'] = (
+        resumen['Cantidad'] / resumen[nombre_grupo].map(tamanos) * 100
+    ).round(2)
+    
+    return resumen[[nombre_grupo, 'Pregunta', 'Media', 'Mediana', 'Cantidad', 'Tasa de respuesta (%)']]
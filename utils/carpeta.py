@@ -0,0 +1,195 @@
+"""
+Exports de una carpeta del servidor cargados en segundo plano
+
+Un hilo de fondo revisa CARPETA_DATOS cada CARPETA_INTERVALO_REVISION
+segundos. Un archivo solo se vuelve a leer si cambió su fecha de
+modificación o su tamaño, y solo se vuelve a procesar si además cambió su
+contenido (hash SHA-256, la misma clave que usa la caché de datasets). Los
+CARPETA_MAX_PRECARGA exports más recientes se procesan de uno en uno con
+utils.ingesta, así que al abrirlos el dataset ya está en la caché. Cada
+contenido se precarga una sola vez (si después sale de la caché, se vuelve
+a cargar al abrirlo) y la precarga se detiene al llenar CACHE_MEMORIA_MAX_MB.
+"""
+import os
+import threading
+import time
+from config.settings import (
+    CARPETA_DATOS,
+    CARPETA_INTERVALO_REVISION,
+    CARPETA_SEGUNDOS_ESTABLE,
+    CARPETA_MAX_PRECARGA,
+    CACHE_MEMORIA_MAX_MB,
+    API_EXTENSIONES
+)
+from utils.ingesta import calcular_clave, iniciar_ingesta, obtener_trabajo
+from utils.cache_datasets import esta_en_cache, memoria_cacheada
+
+# ruta -> {'nombre', 'ruta', 'firma': (mtime_ns, tamaño), 'clave', 'modificado', 'error', 'precargado'}
+_CATALOGO = {}
+_BLOQUEO = threading.Lock()
+_VIGILANTE = None
+
+
+class ArchivoCarpeta:
+    """
+    Export de la carpeta con la parte de la interfaz de un archivo subido
+    que usa la app (name y getvalue). Lleva la clave de su contenido para
+    no tener que leerlo ni calcularla en cada rerun.
+    """
+
+    def __init__(self, ruta, clave):
+        self.ruta = ruta
+        self.name = os.path.basename(ruta)
+        self.clave = clave
+
+    def getvalue(self):
+        with open(self.ruta, 'rb') as archivo:
+            return archivo.read()
+
+
+def revisar_carpeta(directorio=CARPETA_DATOS, ahora=None):
+    """
+    Actualiza el catálogo con los exports nuevos o modificados de la carpeta
+    y carga en la caché los más recientes que aún no lo están
+
+    Args:
+        directorio: Carpeta a revisar
+        ahora: Instante de la revisión (time.time()), para pruebas
+
+    Returns:
+        list: Entradas del catálogo (ver listar_exports)
+    """
+    ahora = time.time() if ahora is None else ahora
+    try:
+        nombres = sorted(os.listdir(directorio))
+    except OSError:
+        nombres = []
+
+    encontrados = set()
+    for nombre in nombres:
+        ruta = os.path.join(directorio, nombre)
+        if not nombre.lower().endswith(API_EXTENSIONES) or nombre.startswith(('~$', '.')):
+            continue
+        try:
+            estado = os.stat(ruta)
+        except OSError:
+            continue
+        encontrados.add(ruta)
+
+        firma = (estado.st_mtime_ns, estado.st_size)
+        with _BLOQUEO:
+            entrada = _CATALOGO.get(ruta)
+        if entrada is not None and entrada['firma'] == firma:
+            continue
+        # Un archivo que se está copiando cambia entre revisiones: se espera
+        # a que lleve un rato sin modificarse
+        if ahora - estado.st_mtime < CARPETA_SEGUNDOS_ESTABLE:
+            continue
+
+        # La fecha o el tamaño cambiaron: solo cuenta si cambió el contenido
+        try:
+            with open(ruta, 'rb') as archivo:
+                clave = calcular_clave(archivo.read())
+        except OSError:
+            continue
+        if entrada is not None and entrada['clave'] == clave:
+            with _BLOQUEO:
+                entrada['firma'] = firma
+            continue
+        with _BLOQUEO:
+            _CATALOGO[ruta] = {
+                'nombre': nombre,
+                'ruta': ruta,
+                'firma': firma,
+                'clave': clave,
+                'modificado': estado.st_mtime,
+                'error': None,
+                'precargado': False
+            }
+
+    with _BLOQUEO:
+        for ruta in [ruta for ruta in _CATALOGO if ruta not in encontrados]:
+            del _CATALOGO[ruta]
+
+    # Sin repetir precargas (un dataset mayor que la caché no se guarda y uno
+    # expulsado vuelve a 'pendiente') ni pasar del presupuesto de la caché
+    presupuesto = CACHE_MEMORIA_MAX_MB * 1024 ** 2
+    ocupado = 0
+    for entrada in listar_exports()[:CARPETA_MAX_PRECARGA]:
+        if ocupado >= presupuesto:
+            break
+        if entrada['estado'] == 'pendiente' and not entrada['precargado']:
+            _precargar(entrada)
+        ocupado += memoria_cacheada(entrada['clave']) or 0
+    return listar_exports()
+
+
+def listar_exports():
+    """
+    Exports conocidos de la carpeta, del más reciente al más antiguo
+
+    Returns:
+        list: dicts con 'nombre', 'ruta', 'clave', 'modificado', 'error',
+              'precargado' y 'estado' ('listo' si está en la caché,
+              'cargando', 'error' o 'pendiente')
+    """
+    with _BLOQUEO:
+        entradas = [dict(entrada) for entrada in _CATALOGO.values()]
+
+    for entrada in entradas:
+        trabajo = obtener_trabajo(entrada['clave'])
+        if esta_en_cache(entrada['clave']):
+            entrada['estado'] = 'listo'
+        elif trabajo is not None and trabajo.activo:
+            entrada['estado'] = 'cargando'
+        elif entrada['error']:
+            entrada['estado'] = 'error'
+        else:
+            entrada['estado'] = 'pendiente'
+        del entrada['firma']
+    return sorted(entradas, key=lambda entrada: entrada['modificado'], reverse=True)
+
+
+def _precargar(entrada):
+    """Carga un export en la caché y espera a que termine"""
+    # De uno en uno, para que la precarga no compita por la memoria con las sesiones
+    archivo = ArchivoCarpeta(entrada['ruta'], entrada['clave'])
+    try:
+        trabajo = iniciar_ingesta(archivo.getvalue(), archivo.name, archivo.clave)
+    except OSError as e:
+        error = f"❌ No se pudo leer el archivo: {str(e)}"
+    else:
+        trabajo.esperar()
+        error = trabajo.error if trabajo.estado == 'error' else None
+
+    # Ni un archivo que no se puede procesar ni uno ya precargado se
+    # reintentan hasta que cambie su contenido
+    with _BLOQUEO:
+        guardada = _CATALOGO.get(entrada['ruta'])
+        if guardada is not None and guardada['clave'] == entrada['clave']:
+            guardada['precargado'] = True
+            if error:
+                guardada['error'] = error
+
+
+def iniciar_vigilancia(directorio=CARPETA_DATOS):
+    """
+    Arranca (una vez por proceso) el hilo que revisa la carpeta. Sin
+    carpeta configurada no hace nada
+
+    Args:
+        directorio: Carpeta a vigilar, o None
+    """
+    global _VIGILANTE
+
+    with _BLOQUEO:
+        if directorio is None or (_VIGILANTE is not None and _VIGILANTE.is_alive()):
+            return
+
+        def _bucle():
+            while True:
+                revisar_carpeta(directorio)
+                time.sleep(CARPETA_INTERVALO_REVISION)
+
+        _VIGILANTE = threading.Thread(target=_bucle, name='carpeta-datos', daemon=True)
+        _VIGILANTE.start()
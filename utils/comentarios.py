@@ -0,0 +1,254 @@
+"""
+Índice de términos de las columnas de comentarios (texto libre)
+
+Cada columna de comentarios se tokeniza una sola vez al crear el dataset:
+el texto se pasa a minúsculas y sin tildes, se descartan las palabras
+vacías del español y se guarda una matriz dispersa fila x término (1 si la
+respuesta contiene el término) para las palabras y otra para los bigramas
+(dos palabras con contenido seguidas). Como los comentarios se repiten a
+menudo, se tokeniza cada texto distinto una vez y la matriz por fila se
+obtiene con un producto disperso.
+
+Los términos por grupo son reducciones de esas matrices sobre las filas
+filtradas (un producto grupo x fila por fila x término), así que cambiar
+los filtros nunca vuelve a tokenizar.
+"""
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from config.settings import (
+    COLUMNAS,
+    COMENTARIOS_MIN_PALABRAS,
+    COMENTARIOS_TERMINOS,
+    COMENTARIOS_PALABRAS_VACIAS_EXTRA
+)
+
+# Palabras vacías del español, en minúsculas y sin tildes
+PALABRAS_VACIAS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes aqui asi aun aunque bien cada casi como con contra
+cual cuales cuando de del desde donde dos e el ella ellas ello ellos en entre era eran es esa esas ese eso
+esos esta estaba estaban estado estamos estan estar este esto estos estoy fue fueron fui ha habia habian
+han has hasta hay he hemos la las le les lo los mas me mi mis mucha muchas mucho muchos muy nada ni no nos
+nosotras nosotros nuestra nuestro o os otra otras otro otros para pero poco por porque pues que quien
+quienes se sea ser si sido sin sobre solo son su sus tal tambien tanto te tenia tener tengo ti tiene
+tienen toda todas todo todos tu tus un una unas uno unos vez y ya yo
+""".split()) | frozenset(COMENTARIOS_PALABRAS_VACIAS_EXTRA)
+
+# Palabras de al menos dos letras en un texto ya normalizado (sin dígitos)
+_PALABRA = re.compile(r'[a-z]{2,}')
+
+
+def detectar_columnas_comentarios(df, columnas_excluir):
+    """
+    Detecta las columnas de texto libre: columnas de texto que no son de
+    agrupación ni preguntas conocidas y cuyas respuestas tienen de media al
+    menos COMENTARIOS_MIN_PALABRAS palabras
+
+    Args:
+        df: DataFrame con los datos
+        columnas_excluir: Columnas a excluir del análisis
+
+    Returns:
+        list: Nombres de las columnas de comentarios
+    """
+    conocidas = set(COLUMNAS.values()) | set(columnas_excluir)
+    columnas = []
+    for columna, tipo in df.dtypes.items():
+        if columna in conocidas or not pd.api.types.is_string_dtype(tipo):
+            continue
+        textos = df[columna].dropna().astype(str)
+        if len(textos) > 0 and textos.str.split().str.len().mean() >= COMENTARIOS_MIN_PALABRAS:
+            columnas.append(columna)
+    return columnas
+
+
+def normalizar_texto(texto):
+    """
+    Pasa un texto a minúsculas y le quita las tildes (la ñ queda como n y
+    se descartan los caracteres que no son latinos, como los emojis)
+
+    Args:
+        texto: Texto original
+
+    Returns:
+        str: Texto normalizado
+    """
+    return unicodedata.normalize('NFKD', texto.lower()).encode('ascii', 'ignore').decode('ascii')
+
+
+def tokenizar(texto):
+    """
+    Palabras y bigramas con contenido de un texto
+
+    Args:
+        texto: Texto original
+
+    Returns:
+        tuple: (lista de palabras, lista de bigramas 'palabra palabra'),
+               en orden de aparición y sin palabras vacías
+    """
+    palabras = _PALABRA.findall(normalizar_texto(texto))
+    contenido = [palabra not in PALABRAS_VACIAS for palabra in palabras]
+    bigramas = [
+        f"{anterior} {siguiente}"
+        for anterior, siguiente, uno, otro in zip(palabras, palabras[1:], contenido, contenido[1:])
+        if uno and otro
+    ]
+    return [palabra for palabra, es_contenido in zip(palabras, contenido) if es_contenido], bigramas
+
+
+def crear_indice_comentarios(df, columnas):
+    """
+    Tokeniza las columnas de comentarios de un DataFrame
+
+    Args:
+        df: DataFrame con los datos (el índice del resultado es por posición)
+        columnas: Columnas de comentarios a indexar
+
+    Returns:
+        dict: {columna: índice} donde cada índice tiene 'con_texto' (bool por
+              fila) y, para 'palabras' y 'bigramas', un dict con 'matriz'
+              (CSR fila x término, int8) y 'terminos' (array de términos)
+    """
+    return {columna: _indexar_columna(df[columna]) for columna in columnas if columna in df.columns}
+
+
+def sumar_indices(indices, indices_delta):
+    """
+    Añade al final de cada índice las filas de un índice nuevo, uniendo los
+    vocabularios
+
+    Args:
+        indices: Índices del dataset (no se modifican)
+        indices_delta: Índices de las filas nuevas, con las mismas columnas
+
+    Returns:
+        dict: Nuevos índices con las filas de ambos
+    """
+    resultado = {}
+    for columna, indice in indices.items():
+        delta = indices_delta[columna]
+        resultado[columna] = {'con_texto': np.concatenate([indice['con_texto'], delta['con_texto']])}
+        for tipo in ('palabras', 'bigramas'):
+            terminos = indice[tipo]['terminos']
+            posicion = {termino: i for i, termino in enumerate(terminos)}
+            nuevos = [termino for termino in delta[tipo]['terminos'] if termino not in posicion]
+            todos = np.concatenate([terminos, np.array(nuevos, dtype=object)])
+            posicion.update((termino, len(terminos) + i) for i, termino in enumerate(nuevos))
+
+            # Reasignar las columnas del delta al vocabulario unido
+            matriz_delta = delta[tipo]['matriz'].tocoo()
+            destino = np.array([posicion[t] for t in delta[tipo]['terminos']], dtype=np.int64)
+            matriz_delta = sparse.csr_matrix(
+                (matriz_delta.data, (matriz_delta.row, destino[matriz_delta.col])),
+                shape=(matriz_delta.shape[0], len(todos))
+            )
+            matriz = indice[tipo]['matriz']
+            matriz = sparse.csr_matrix((matriz.data, matriz.indices, matriz.indptr), shape=(matriz.shape[0], len(todos)))
+            resultado[columna][tipo] = {'matriz': sparse.vstack([matriz, matriz_delta], format='csr'), 'terminos': todos}
+    return resultado
+
+
+def terminos_por_grupo(indice, posiciones, grupos, nombre_grupo, tipo='palabras', n=COMENTARIOS_TERMINOS):
+    """
+    Términos más mencionados en cada grupo
+
+    Args:
+        indice: Índice de una columna (ver crear_indice_comentarios)
+        posiciones: Posiciones de las filas filtradas en el dataset
+        grupos: Grupo de cada fila filtrada (misma longitud que posiciones)
+        nombre_grupo: Nombre de la columna de grupo en el resultado
+        tipo: 'palabras' o 'bigramas'
+        n: Términos por grupo
+
+    Returns:
+        pd.DataFrame: Columnas [nombre_grupo, 'Término', 'Respuestas',
+                      '% comentarios'], con los n términos más frecuentes de
+                      cada grupo ('% comentarios' sobre las respuestas del
+                      grupo con texto)
+    """
+    matriz = indice[tipo]['matriz']
+    terminos = indice[tipo]['terminos']
+    codigos, nombres = pd.factorize(np.asarray(grupos), sort=True)
+    posiciones = np.asarray(posiciones)
+    validas = codigos >= 0
+
+    # Matriz grupo x fila: un solo producto disperso cuenta todos los grupos
+    pertenencia = sparse.csr_matrix(
+        (np.ones(validas.sum(), dtype=np.int32), (codigos[validas], posiciones[validas])),
+        shape=(len(nombres), matriz.shape[0])
+    )
+    conteos = (pertenencia @ matriz).tocsr()
+    conteos.sort_indices()
+    comentarios = pertenencia @ indice['con_texto'].astype(np.int32)
+
+    filas = []
+    for codigo, nombre in enumerate(nombres):
+        inicio, fin = conteos.indptr[codigo], conteos.indptr[codigo + 1]
+        columnas, conteo = conteos.indices[inicio:fin], conteos.data[inicio:fin]
+        if len(conteo) > n:
+            # Solo se ordenan los candidatos que alcanzan el n-ésimo conteo
+            umbral = np.partition(conteo, len(conteo) - n)[len(conteo) - n]
+            columnas, conteo = columnas[conteo >= umbral], conteo[conteo >= umbral]
+        # De más a menos mencionado; los empates, por orden de aparición
+        orden = np.lexsort((columnas, -conteo))[:n]
+        for termino, cantidad in zip(columnas[orden], conteo[orden]):
+            filas.append((nombre, terminos[termino], int(cantidad), cantidad / comentarios[codigo] * 100))
+
+    return pd.DataFrame(filas, columns=[nombre_grupo, 'Término', 'Respuestas', '% comentarios'])
+
+
+def memoria_indices(indices):
+    """
+    Bytes ocupados por los índices de comentarios
+
+    Args:
+        indices: Índices creados con crear_indice_comentarios
+
+    Returns:
+        int: Bytes aproximados (matrices, vocabularios y máscaras)
+    """
+    total = 0
+    for indice in indices.values():
+        total += indice['con_texto'].nbytes
+        for tipo in ('palabras', 'bigramas'):
+            matriz = indice[tipo]['matriz']
+            total += matriz.data.nbytes + matriz.indices.nbytes + matriz.indptr.nbytes
+            total += 60 * len(indice[tipo]['terminos'])
+    return total
+
+
+def _indexar_columna(serie):
+    """Índice de una columna: se tokeniza cada texto distinto una sola vez"""
+    codigos, textos = pd.factorize(serie)
+    vocabularios = {'palabras': {}, 'bigramas': {}}
+    celdas = {'palabras': ([], []), 'bigramas': ([], [])}
+
+    for posicion, texto in enumerate(textos):
+        for tipo, tokens in zip(('palabras', 'bigramas'), tokenizar(str(texto))):
+            vocabulario = vocabularios[tipo]
+            columnas = {vocabulario.setdefault(token, len(vocabulario)) for token in tokens}
+            celdas[tipo][0].extend([posicion] * len(columnas))
+            celdas[tipo][1].extend(columnas)
+
+    # Matriz fila -> texto distinto (las filas sin texto quedan vacías)
+    con_texto = codigos >= 0
+    filas_a_textos = sparse.csr_matrix(
+        (np.ones(con_texto.sum(), dtype=np.int8), (np.flatnonzero(con_texto), codigos[con_texto])),
+        shape=(len(serie), len(textos))
+    )
+
+    indice = {'con_texto': con_texto}
+    for tipo, vocabulario in vocabularios.items():
+        textos_a_terminos = sparse.csr_matrix(
+            (np.ones(len(celdas[tipo][0]), dtype=np.int8), celdas[tipo]),
+            shape=(len(textos), len(vocabulario))
+        )
+        indice[tipo] = {
+            'matriz': (filas_a_textos @ textos_a_terminos).tocsr(),
+            'terminos': np.array(list(vocabulario), dtype=object)
+        }
+    return indice
+
@@ -0,0 +1,224 @@
+"""
+Comparación estadística entre dos cohortes
+
+Todas las pruebas se calculan a la vez para todas las preguntas con
+operaciones sobre matrices (una columna por pregunta), sin bucles por
+pregunta:
+- Preguntas numéricas: t de Welch y U de Mann-Whitney (aproximación
+  normal con corrección de empates y de continuidad)
+- Preguntas categóricas: chi-cuadrado sobre la tabla 2 x respuestas
+Los p-valores se corrigen por comparaciones múltiples con
+Benjamini-Hochberg sobre el conjunto de todas las pruebas.
+"""
+import numpy as np
+import pandas as pd
+from scipy import stats
+from config.settings import COMPARACION_ALFA, COMPARACION_MAX_RESPUESTAS
+
+
+def comparar_cohortes(df, grupo_col, cohorte_a, cohorte_b, numericas, categoricas,
+                      filtros_modulo=None, alfa=COMPARACION_ALFA):
+    """
+    Compara dos cohortes en todas las preguntas
+
+    Args:
+        df: DataFrame con los datos
+        grupo_col: Columna que identifica la cohorte (ej: promoción)
+        cohorte_a: Valor de la primera cohorte
+        cohorte_b: Valor de la segunda cohorte
+        numericas: Columnas numéricas a comparar
+        categoricas: Columnas categóricas a comparar (se omiten las de texto libre,
+                     con más de COMPARACION_MAX_RESPUESTAS respuestas distintas)
+        filtros_modulo: dict {pregunta: (columna, valor)} para restringir una
+                        pregunta a un subconjunto (ej: solo Módulo 4)
+        alfa: Nivel de significación tras la corrección
+
+    Returns:
+        pd.DataFrame: Una fila por prueba, ordenada por p ajustado, con columnas
+                      ['Pregunta', 'Prueba', 'Estadístico', 'p', 'p ajustado',
+                       'Significativa', 'n A', 'n B', 'A', 'B', 'Efecto']
+    """
+    en_a = (df[grupo_col] == cohorte_a).to_numpy()
+    en_b = (df[grupo_col] == cohorte_b).to_numpy()
+
+    datos = df.loc[en_a | en_b]
+    es_a = en_a[en_a | en_b]
+
+    # Restringir las preguntas con filtro especial (el resto de filas = sin respuesta)
+    for pregunta, (columna, valor) in (filtros_modulo or {}).items():
+        if pregunta in datos.columns and columna in datos.columns:
+            datos = datos.assign(**{pregunta: datos[pregunta].where(datos[columna] == valor)})
+
+    partes = []
+    if numericas:
+        matriz = datos[numericas].to_numpy(dtype=float)
+        partes.append(_pruebas_numericas(matriz[es_a], matriz[~es_a], numericas))
+    categoricas = [col for col in categoricas if datos[col].nunique() <= COMPARACION_MAX_RESPUESTAS]
+    if categoricas:
+        partes.append(_prueba_chi_cuadrado(datos[categoricas], es_a))
+
+    partes = [parte for parte in partes if len(parte) > 0]
+    if not partes:
+        return None
+
+    resultado = pd.concat(partes, ignore_index=True)
+    resultado = resultado[resultado['p'].notna()].copy()
+    if len(resultado) == 0:
+        return None
+
+    resultado['p ajustado'] = ajustar_benjamini_hochberg(resultado['p'].to_numpy())
+    resultado['Significativa'] = resultado['p ajustado'] < alfa
+
+    columnas = ['Pregunta', 'Prueba', 'Estadístico', 'p', 'p ajustado', 'Significativa',
+                'n A', 'n B', 'A', 'B', 'Efecto']
+    return resultado[columnas].sort_values(['p ajustado', 'p']).reset_index(drop=True)
+
+
+def ajustar_benjamini_hochberg(p):
+    """
+    Corrige p-valores por comparaciones múltiples (tasa de falsos descubrimientos)
+
+    Args:
+        p: array de p-valores
+
+    Returns:
+        np.ndarray: p-valores ajustados, en el mismo orden
+    """
+    p = np.asarray(p, dtype=float)
+    m = len(p)
+    if m == 0:
+        return p
+
+    orden = np.argsort(p)
+    ajustados = p[orden] * m / np.arange(1, m + 1)
+    # Monotonía: cada p ajustado es el mínimo de los de su derecha
+    ajustados = np.minimum.accumulate(ajustados[::-1])[::-1]
+
+    resultado = np.empty(m)
+    resultado[orden] = np.minimum(ajustados, 1.0)
+    return resultado
+
+
+def _pruebas_numericas(a, b, columnas):
+    """t de Welch y U de Mann-Whitney por columna de dos matrices (filas = respuestas)"""
+    n_a = np.sum(~np.isnan(a), axis=0)
+    n_b = np.sum(~np.isnan(b), axis=0)
+    validas = (n_a >= 2) & (n_b >= 2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # ========== WELCH ==========
+        media_a = np.nansum(a, axis=0) / n_a
+        media_b = np.nansum(b, axis=0) / n_b
+        var_a = np.nansum((a - media_a) ** 2, axis=0) / (n_a - 1)
+        var_b = np.nansum((b - media_b) ** 2, axis=0) / (n_b - 1)
+
+        error_a = var_a / n_a
+        error_b = var_b / n_b
+        error = np.sqrt(error_a + error_b)
+        t = (media_a - media_b) / error
+        gl = (error_a + error_b) ** 2 / (error_a ** 2 / (n_a - 1) + error_b ** 2 / (n_b - 1))
+        p_welch = 2 * stats.t.sf(np.abs(t), gl)
+        # Sin varianza en ninguno de los grupos: no hay prueba posible
+        p_welch = np.where(validas & (error > 0), p_welch, np.nan)
+
+        # ========== MANN-WHITNEY ==========
+        u, p_mw = _mann_whitney(a, b, n_a, n_b)
+        p_mw = np.where(validas, p_mw, np.nan)
+
+    comunes = {
+        'Pregunta': columnas,
+        'n A': n_a,
+        'n B': n_b,
+        'A': media_a,
+        'B': media_b,
+        'Efecto': media_a - media_b
+    }
+    return pd.concat([
+        pd.DataFrame({**comunes, 'Prueba': 't de Welch', 'Estadístico': t, 'p': p_welch}),
+        pd.DataFrame({**comunes, 'Prueba': 'U de Mann-Whitney', 'Estadístico': u, 'p': p_mw})
+    ], ignore_index=True)
+
+
+def _mann_whitney(a, b, n_a, n_b):
+    """
+    U de Mann-Whitney por columna con aproximación normal (corrección de
+    empates y de continuidad, como scipy.stats.mannwhitneyu(method='asymptotic'))
+    """
+    combinados = np.vstack([a, b])
+    k = combinados.shape[1]
+    n = n_a + n_b
+
+    # Rangos medios por columna; los NaN quedan como NaN
+    rangos = stats.rankdata(combinados, axis=0, nan_policy='omit')
+    r_a = np.nansum(rangos[:len(a)], axis=0)
+    u = r_a - n_a * (n_a + 1) / 2
+
+    # Empates: tamaños de los grupos de valores iguales de cada columna
+    ordenados = np.sort(combinados, axis=0)
+    validos = ~np.isnan(ordenados)
+    nuevo_grupo = np.ones_like(ordenados, dtype=bool)
+    nuevo_grupo[1:] = ordenados[1:] != ordenados[:-1]
+    grupo = np.cumsum(nuevo_grupo, axis=0) - 1
+    grupo_global = (grupo + np.arange(k) * combinados.shape[0])[validos]
+    tamanos = np.bincount(grupo_global, minlength=k * combinados.shape[0]).reshape(k, -1)
+    empates = np.sum(tamanos.astype(float) ** 3 - tamanos, axis=1)
+
+    media_u = n_a * n_b / 2
+    sigma = np.sqrt(n_a * n_b / 12 * ((n + 1) - empates / (n * (n - 1))))
+    z = (np.abs(u - media_u) - 0.5) / sigma
+    p = np.minimum(2 * stats.norm.sf(z), 1.0)
+    return u, np.where(sigma > 0, p, np.nan)
+
+
+def _prueba_chi_cuadrado(categoricas, es_a):
+    """Chi-cuadrado de independencia cohorte x respuesta para todas las columnas a la vez"""
+    # Formato largo: (pregunta, respuesta, cohorte) -> conteo, en una sola agrupación
+    largo = categoricas.assign(_cohorte=np.where(es_a, 'A', 'B')).melt(
+        id_vars='_cohorte', var_name='Pregunta', value_name='_respuesta'
+    ).dropna(subset=['_respuesta'])
+
+    if len(largo) == 0:
+        return pd.DataFrame()
+
+    tabla = largo.groupby(['Pregunta', '_respuesta', '_cohorte'], sort=False).size().unstack('_cohorte', fill_value=0)
+    for cohorte in ('A', 'B'):
+        if cohorte not in tabla.columns:
+            tabla[cohorte] = 0
+
+    preguntas, codigo = np.unique(tabla.index.get_level_values('Pregunta').to_numpy(dtype=object).astype(str),
+                                  return_inverse=True)
+    observados = tabla[['A', 'B']].to_numpy(dtype=float)
+
+    # Totales por respuesta (filas), por cohorte y pregunta (columnas) y por pregunta
+    total_fila = observados.sum(axis=1)
+    total_a = np.bincount(codigo, weights=observados[:, 0], minlength=len(preguntas))
+    total_b = np.bincount(codigo, weights=observados[:, 1], minlength=len(preguntas))
+    total = total_a + total_b
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        esperados = np.column_stack([
+            total_fila * total_a[codigo] / total[codigo],
+            total_fila * total_b[codigo] / total[codigo]
+        ])
+        contribucion = np.where(esperados > 0, (observados - esperados) ** 2 / esperados, 0)
+        chi2 = np.bincount(codigo, weights=contribucion.sum(axis=1), minlength=len(preguntas))
+
+        respuestas = np.bincount(codigo, weights=(total_fila > 0).astype(float), minlength=len(preguntas))
+        gl = respuestas - 1
+        p = stats.chi2.sf(chi2, gl)
+        p = np.where((gl > 0) & (total_a > 0) & (total_b > 0), p, np.nan)
+        v_cramer = np.sqrt(chi2 / total)
+
+    # Mantener los nombres originales de las preguntas
+    nombres = {str(col): col for col in categoricas.columns}
+    return pd.DataFrame({
+        'Pregunta': [nombres[pregunta] for pregunta in preguntas],
+        'Prueba': 'Chi-cuadrado',
+        'Estadístico': chi2,
+        'p': p,
+        'n A': total_a.astype(int),
+        'n B': total_b.astype(int),
+        'A': np.nan,
+        'B': np.nan,
+        'Efecto': v_cramer
+    })
@@ -0,0 +1,151 @@
+"""
+Consultas de KPIs independientes de la interfaz
+
+Traducen los parámetros de una petición (pregunta, agrupación y filtros)
+a las funciones de utils.calculations y devuelven resultados
+serializables a JSON. Las usa la API HTTP (api.py).
+"""
+import json
+from config.settings import COLUMNAS
+from utils.calculations import (
+    calcular_porcentajes_con_filtro,
+    calcular_porcentajes_combinado,
+    calcular_estadisticas_por_grupo,
+    calcular_estadisticas_combinado,
+    necesita_filtro_modulo
+)
+from utils.data_processor import obtener_columnas_numericas, obtener_columnas_categoricas
+from utils.vista import crear_vista
+
+# Agrupaciones admitidas: nombre en la petición -> (columnas, nombres en el resultado)
+AGRUPACIONES = {
+    'promocion': ([COLUMNAS['promocion']], ['Promoción']),
+    'modulo': ([COLUMNAS['modulo']], ['Módulo']),
+    'promocion_modulo': ([COLUMNAS['promocion'], COLUMNAS['modulo']], ['Promoción', 'Módulo'])
+}
+
+
+class ErrorConsulta(ValueError):
+    """Parámetros de consulta no válidos"""
+
+
+def describir_dataset(dataset):
+    """
+    Resume el contenido de un dataset para que el cliente sepa qué consultar
+
+    Args:
+        dataset: Dataset creado con utils.dataset.crear_dataset
+
+    Returns:
+        dict: filas, tiene_modulo, promociones, modulos, preguntas y columnas numéricas
+    """
+    df = dataset['df']
+    columnas_excluir = dataset['columnas_excluir']
+    categoricas = obtener_columnas_categoricas(df, columnas_excluir)
+
+    return {
+        'filas': len(df),
+        'tiene_modulo': dataset['tiene_modulo'],
+        'promociones': [str(valor) for valor in dataset['conteos']['promocion']],
+        'modulos': [str(valor) for valor in dataset['conteos'].get('modulo', {})],
+        'preguntas': [col for col in dict.fromkeys(COLUMNAS.values()) if col in categoricas],
+        'numericas': obtener_columnas_numericas(df, columnas_excluir)
+    }
+
+
+def consultar_porcentajes(dataset, pregunta, agrupacion='promocion', filtro_promocion=None, filtro_modulo=None):
+    """
+    Porcentajes de respuestas de una pregunta dentro de cada grupo, con el
+    filtro especial de módulo de la pregunta si lo tiene
+
+    Args:
+        dataset: Dataset creado con utils.dataset.crear_dataset
+        pregunta: Columna de la pregunta
+        agrupacion: Clave de AGRUPACIONES
+        filtro_promocion: Lista de promociones, o None para todas
+        filtro_modulo: Lista de módulos, o None para todos
+
+    Returns:
+        list: Registros [{grupo..., pregunta, Cantidad, Total, Porcentaje}]
+    """
+    df = _preparar(dataset, pregunta, agrupacion, filtro_promocion, filtro_modulo)
+    columnas, nombres = AGRUPACIONES[agrupacion]
+
+    if len(columnas) == 1:
+        necesita_filtro, valor_modulo, _ = necesita_filtro_modulo(pregunta)
+        resultado, _ = calcular_porcentajes_con_filtro(
+            df, pregunta, columnas[0], nombres[0],
+            filtro_modulo=valor_modulo if necesita_filtro else None
+        )
+    else:
+        resultado = calcular_porcentajes_combinado(df, pregunta, columnas, nombres)
+
+    return _a_registros(resultado)
+
+
+def consultar_estadisticas(dataset, columna, agrupacion='promocion', filtro_promocion=None, filtro_modulo=None):
+    """
+    Estadísticas descriptivas de una columna numérica por grupo
+
+    Args:
+        dataset: Dataset creado con utils.dataset.crear_dataset
+        columna: Columna numérica a analizar
+        agrupacion: Clave de AGRUPACIONES
+        filtro_promocion: Lista de promociones, o None para todas
+        filtro_modulo: Lista de módulos, o None para todos
+
+    Returns:
+        list: Registros [{grupo..., Media, Mediana, ..., Cantidad}]
+    """
+    df = _preparar(dataset, columna, agrupacion, filtro_promocion, filtro_modulo)
+    if columna not in obtener_columnas_numericas(dataset['df'], dataset['columnas_excluir']):
+        raise ErrorConsulta(f"La columna '{columna}' no es numérica")
+
+    columnas, nombres = AGRUPACIONES[agrupacion]
+    if len(columnas) == 1:
+        resultado = calcular_estadisticas_por_grupo(df, columna, columnas[0])
+    else:
+        resultado = calcular_estadisticas_combinado(df, columna, columnas)
+
+    return _a_registros(resultado.rename(columns=dict(zip(columnas, nombres))))
+
+
+def _preparar(dataset, columna, agrupacion, filtro_promocion, filtro_modulo):
+    """Valida los parámetros y devuelve el DataFrame filtrado"""
+    df = dataset['df']
+
+    if agrupacion not in AGRUPACIONES:
+        raise ErrorConsulta(f"Agrupación no válida: '{agrupacion}' (opciones: {', '.join(AGRUPACIONES)})")
+    if agrupacion != 'promocion' and not dataset['tiene_modulo']:
+        raise ErrorConsulta("El dataset no tiene columna de módulo")
+    if columna not in df.columns:
+        raise ErrorConsulta(f"La columna '{columna}' no existe")
+
+    if filtro_promocion is None and filtro_modulo is None:
+        return df
+
+    # Los filtros llegan como texto: se traducen a los valores reales
+    filtro_promocion = _valores_reales(dataset['conteos']['promocion'], filtro_promocion)
+    filtro_modulo = _valores_reales(dataset['conteos'].get('modulo', {}), filtro_modulo)
+
+    # crear_vista trata una lista vacía como "sin filtro"
+    if filtro_promocion == [] or (filtro_modulo == [] and dataset['tiene_modulo']):
+        return df.iloc[0:0]
+    # Solo se copian las columnas de la consulta (grupo, módulo y la pregunta)
+    vista = crear_vista(df, filtro_promocion, filtro_modulo, dataset['tiene_modulo'])
+    return vista.columnas(AGRUPACIONES[agrupacion][0] + [COLUMNAS['modulo'], columna])
+
+
+def _valores_reales(conteos, filtro):
+    """Valores del dataset cuyo texto coincide con el filtro"""
+    if filtro is None:
+        return None
+    buscados = set(filtro)
+    return [valor for valor in conteos if str(valor) in buscados]
+
+
+def _a_registros(resultado):
+    """Convierte un DataFrame en registros JSON (NaN -> null, tipos nativos)"""
+    if resultado is None or len(resultado) == 0:
+        return []
+    return json.loads(resultado.to_json(orient='records', force_ascii=False, date_format='iso'))
@@ -3,24 +3,199 @@
 Funciones para procesamiento de datos
 """
 import pandas as pd
-from config.settings import COLUMNAS, COLUMNAS_ELIMINAR
+from config.settings import COLUMNAS, COLUMNAS_ELIMINAR, FRECUENCIA_PARTICION
+from utils.vista import crear_vista
 
 
-def cargar_y_limpiar_datos(uploaded_file):
+def cargar_y_limpiar_datos(uploaded_file, nombre=None):
     """
-    Carga el archivo Excel y elimina columnas no deseadas
+    Carga el archivo con el lector de su formato, elimina columnas no
+    deseadas y convierte la fecha de envío a datetime
     
     Args:
-        uploaded_file: Archivo subido por el usuario
+        uploaded_file: Archivo subido por el usuario o ruta
+        nombre: Nombre del archivo (por defecto, el del archivo subido o la ruta)
+        
+    Returns:
+        pd.DataFrame: DataFrame limpio
+    """
+    from utils.lectores import leer_archivo
+    
+    nombre = nombre or getattr(uploaded_file, 'name', uploaded_file)
+    df = leer_archivo(uploaded_file, nombre)
+    return limpiar_datos(df)
+
+
+def leer_excel_por_filas(fuente, al_leer_cabecera=None, al_progresar=None, cancelar=None, bloque=1000,
+                         conservar=None):
+    """
+    Lee la primera hoja de un .xlsx fila a fila, informando del progreso
+    
+    Args:
+        fuente: Ruta o archivo binario (.xlsx)
+        al_leer_cabecera: Función llamada con la lista de columnas al leer la cabecera
+        al_progresar: Función llamada con (filas_bloque, filas_leidas, filas_estimadas)
+                      cada `bloque` filas
+        cancelar: threading.Event para interrumpir la lectura
+        bloque: Número de filas entre avisos de progreso
+        conservar: Función llamada con cada fila (tupla) que decide si se
+                   conserva (por defecto, todas)
+        
+    Returns:
+        pd.DataFrame: DataFrame leído, o None si se canceló
+    """
+    from openpyxl import load_workbook
+    
+    libro = load_workbook(fuente, read_only=True, data_only=True)
+    try:
+        hoja = libro.worksheets[0]
+        filas_estimadas = max(hoja.max_row - 1, 0) if hoja.max_row else None
+        filas = hoja.iter_rows(values_only=True)
+        
+        cabecera = _nombres_unicos(next(filas, ()))
+        if al_leer_cabecera:
+            al_leer_cabecera(cabecera)
+        
+        datos = []
+        pendientes = []
+        for fila in filas:
+            # Igual que read_excel: se omiten las filas vacías
+            if all(valor is None for valor in fila):
+                continue
+            if conservar is not None and not conservar(fila):
+                continue
+            pendientes.append(fila[:len(cabecera)])
+            
+            if len(pendientes) >= bloque:
+                if cancelar is not None and cancelar.is_set():
+                    return None
+                datos.extend(pendientes)
+                if al_progresar:
+                    al_progresar(pendientes, len(datos), filas_estimadas)
+                pendientes = []
+        
+        datos.extend(pendientes)
+        if al_progresar:
+            al_progresar(pendientes, len(datos), len(datos))
+    finally:
+        libro.close()
+    
+    return pd.DataFrame(datos, columns=cabecera).infer_objects()
+
+
+def _nombres_unicos(cabecera):
+    """Renombra columnas repetidas o vacías igual que read_excel"""
+    nombres = []
+    vistos = {}
+    for posicion, nombre in enumerate(cabecera):
+        nombre = f"Unnamed: {posicion}" if nombre is None else nombre
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f"{nombre}.{vistos[nombre]}"
+        else:
+            vistos[nombre] = 0
+        nombres.append(nombre)
+    return nombres
+
+
+def limpiar_datos(df):
+    """
+    Elimina columnas no deseadas y convierte la fecha de envío a datetime
+    
+    Args:
+        df: DataFrame leído del archivo
         
     Returns:
         pd.DataFrame: DataFrame limpio
     """
-    df = pd.read_excel(uploaded_file)
     df = df.drop(columns=[col for col in COLUMNAS_ELIMINAR if col in df.columns], errors='ignore')
+    
+    columna_fecha = COLUMNAS['fecha']
+    if columna_fecha in df.columns:
+        df[columna_fecha] = pd.to_datetime(df[columna_fecha], errors='coerce')
+    
     return df
 
 
+def cargar_delta(uploaded_file, tokens_conocidos, nombre=None):
+    """
+    Carga y limpia solo las filas cuyo Token no se ha cargado todavía
+    
+    Args:
+        uploaded_file: Archivo subido por el usuario (export acumulado)
+        tokens_conocidos: Conjunto de tokens ya presentes en el dataset
+        nombre: Nombre del archivo (por defecto, el del archivo subido)
+        
+    Returns:
+        pd.DataFrame: DataFrame limpio con las filas nuevas, o None si el
+                      archivo no tiene la columna Token
+    """
+    from utils.lectores import extension, leer_archivo
+    
+    columna_token = COLUMNAS['token']
+    nombre = nombre or getattr(uploaded_file, 'name', '')
+    
+    if extension(nombre) != 'xlsx':
+        # Sin lectura por filas: se lee completo y se filtran las filas nuevas
+        df = leer_archivo(uploaded_file, nombre)
+        if columna_token not in df.columns:
+            return None
+        tokens = df[columna_token]
+        es_nueva = tokens.notna() & ~tokens.isin(tokens_conocidos) & ~tokens.duplicated()
+        return limpiar_datos(df[es_nueva.to_numpy()].reset_index(drop=True))
+    
+    # Una sola pasada por la hoja: de cada fila se mira el Token y solo se
+    # guardan las nuevas. Las filas sin Token no se pueden identificar y se
+    # ignoran; un Token repetido en el archivo se queda con su primera fila
+    posicion = {}
+    vistos = set()
+    
+    def _leer_cabecera(cabecera):
+        if columna_token in cabecera:
+            posicion['token'] = cabecera.index(columna_token)
+    
+    def _es_nueva(fila):
+        if 'token' not in posicion or posicion['token'] >= len(fila):
+            return False
+        token = fila[posicion['token']]
+        if token is None or token in tokens_conocidos or token in vistos:
+            return False
+        vistos.add(token)
+        return True
+    
+    uploaded_file.seek(0)
+    df_delta = leer_excel_por_filas(uploaded_file, al_leer_cabecera=_leer_cabecera, conservar=_es_nueva)
+    if 'token' not in posicion:
+        return None
+    return limpiar_datos(df_delta)
+
+
+def crear_particiones_temporales(df, frecuencia=FRECUENCIA_PARTICION):
+    """
+    Particiona el DataFrame por periodo de la fecha de envío
+    
+    Args:
+        df: DataFrame con la columna de fecha
+        frecuencia: Alias de periodo de pandas ('W', 'M', 'D')
+        
+    Returns:
+        dict: {pd.Period: array de posiciones de fila}, ordenado por periodo.
+              Vacío si no hay columna de fecha. Las filas sin fecha no
+              pertenecen a ninguna partición.
+    """
+    columna_fecha = COLUMNAS['fecha']
+    
+    if columna_fecha not in df.columns:
+        return {}
+    
+    # Se agrupa por la propia serie de periodos (sus códigos), sin convertir
+    # cada fila en un objeto pd.Period
+    periodos = df[columna_fecha].dt.to_period(frecuencia).reset_index(drop=True)
+    posiciones = periodos.groupby(periodos, sort=True).indices
+    
+    return dict(sorted(posiciones.items()))
+
+
 def validar_columnas(df):
     """
     Valida que existan las columnas necesarias
@@ -64,6 +239,10 @@ def crear_columnas_agrupacion(df, tiene_modulo):
         columnas_agrupacion = [columna_promocion]
         columnas_excluir = [columna_promocion, '_Agrupacion']
     
+    for columna in (COLUMNAS['fecha'], COLUMNAS['token']):
+        if columna in df.columns:
+            columnas_excluir.append(columna)
+    
     return df, columnas_agrupacion, columnas_excluir
 
 
@@ -78,20 +257,11 @@ def aplicar_filtros(df, filtro_promocion, filtro_modulo=None, tiene_modulo=False
         tiene_modulo: Si existe la columna de módulo
         
     Returns:
-        pd.DataFrame: DataFrame filtrado
+        pd.DataFrame: DataFrame filtrado (sin filtros, el propio df)
     """
-    df_filtrado = df.copy()
-    
-    columna_promocion = COLUMNAS['promocion']
-    columna_modulo = COLUMNAS['modulo']
-    
-    if filtro_promocion:
-        df_filtrado = df_filtrado[df_filtrado[columna_promocion].isin(filtro_promocion)]
-    
-    if tiene_modulo and filtro_modulo:
-        df_filtrado = df_filtrado[df_filtrado[columna_modulo].isin(filtro_modulo)]
-    
-    return df_filtrado
+    # Una sola máscara sobre las columnas de filtro; el resto de columnas
+    # solo se copia si hay filas que descartar
+    return crear_vista(df, filtro_promocion, filtro_modulo, tiene_modulo).completo()
 
 
 def obtener_columnas_numericas(df, columnas_excluir):
@@ -0,0 +1,179 @@
+"""
+Dataset cargado y sus agregados precalculados
+"""
+import numpy as np
+import pandas as pd
+from config.settings import COLUMNAS
+from utils.data_processor import crear_particiones_temporales
+from utils.agregados import calcular_cubo, sumar_cubos
+from utils.comentarios import detectar_columnas_comentarios, crear_indice_comentarios, sumar_indices
+from utils.etiquetas import sumar_informes
+from utils.muestreo import muestra_estratificada
+
+
+def crear_dataset(df, tiene_modulo, columnas_excluir, origen=None, etiquetas=None):
+    """
+    Crea el dataset con los conteos y particiones precalculados
+
+    Args:
+        df: DataFrame limpio con las columnas de agrupación
+        tiene_modulo: Si existe la columna de módulo
+        columnas_excluir: Columnas a excluir del análisis
+        origen: Identificador del archivo del que se cargó
+        etiquetas: Informe de etiquetas unificadas (ver utils.etiquetas.normalizar_grupos)
+
+    Returns:
+        dict: Dataset con claves df, tiene_modulo, columnas_excluir,
+              tokens, conteos, particiones, comentarios (índice de términos
+              de las columnas de texto libre), cubo (agregados por grupo,
+              ver utils.agregados.calcular_cubo), etiquetas y origen
+    """
+    columna_token = COLUMNAS['token']
+    tokens = set(df[columna_token].dropna()) if columna_token in df.columns else set()
+
+    return {
+        'df': df,
+        'tiene_modulo': tiene_modulo,
+        'columnas_excluir': columnas_excluir,
+        'tokens': tokens,
+        'conteos': _calcular_conteos(df, tiene_modulo),
+        'particiones': crear_particiones_temporales(df),
+        'comentarios': crear_indice_comentarios(df, detectar_columnas_comentarios(df, columnas_excluir)),
+        'cubo': calcular_cubo(df, tiene_modulo, columnas_excluir),
+        'etiquetas': etiquetas or [],
+        'origen': origen
+    }
+
+
+def crear_dataset_provisional(df, tiene_modulo, columnas_excluir, tamano, origen=None, etiquetas=None):
+    """
+    Crea un dataset sobre una muestra estratificada por promoción (y
+    módulo) para mostrar resultados mientras se calcula el completo.
+    Porcentajes y estadísticas por grupo son estimaciones; los registros
+    por grupo (conteos) son los exactos del df completo
+
+    Args:
+        df: DataFrame limpio completo, con las columnas de agrupación
+        tiene_modulo: Si existe la columna de módulo
+        columnas_excluir: Columnas a excluir del análisis
+        tamano: Filas de la muestra
+        origen: Identificador del archivo; el dataset se identifica con
+                ('provisional', origen) para no confundirlo con el completo
+                ni con el provisional de otro archivo
+        etiquetas: Informe de etiquetas unificadas
+
+    Returns:
+        dict: Dataset (ver crear_dataset) con la clave provisional
+              {'muestra': filas de la muestra, 'total': filas del df}
+    """
+    claves = [COLUMNAS['promocion']] + ([COLUMNAS['modulo']] if tiene_modulo else [])
+    muestra = muestra_estratificada(df, claves, tamano)
+
+    dataset = crear_dataset(muestra, tiene_modulo, columnas_excluir, origen=('provisional', origen),
+                            etiquetas=etiquetas)
+    dataset['conteos'] = _calcular_conteos(df, tiene_modulo)
+    dataset['provisional'] = {'muestra': len(muestra), 'total': len(df)}
+    return dataset
+
+
+def actualizar_dataset(dataset, df_delta, origen=None, etiquetas=None):
+    """
+    Añade filas nuevas al dataset y actualiza sus agregados sin recalcular
+    sobre las filas que ya estaban: solo se tokenizan y agregan las filas
+    del delta. Lo único proporcional al total es copiar el DataFrame y el
+    conjunto de tokens (el dataset anterior puede estar compartido)
+
+    Args:
+        dataset: Dataset creado con crear_dataset (no se modifica, puede
+                 estar compartido entre sesiones)
+        df_delta: DataFrame limpio con las filas nuevas
+        origen: Identificador del archivo del que se cargó el delta
+        etiquetas: Informe de etiquetas unificadas en el delta
+
+    Returns:
+        dict: Nuevo dataset con las filas y agregados actualizados
+    """
+    dataset = dict(dataset)
+    if origen is not None:
+        dataset['origen'] = origen
+
+    if len(df_delta) == 0:
+        return dataset
+
+    if etiquetas:
+        dataset['etiquetas'] = sumar_informes(dataset.get('etiquetas', []), etiquetas)
+
+    df = dataset['df']
+    offset = len(df)
+
+    # Igualar tipos: un delta pequeño puede inferir tipos distintos
+    df_delta = df_delta.reindex(columns=df.columns)
+    for columna in df.columns:
+        if df_delta[columna].dtype != df[columna].dtype:
+            try:
+                df_delta[columna] = df_delta[columna].astype(df[columna].dtype)
+            except (TypeError, ValueError):
+                pass
+
+    dataset['df'] = pd.concat([df, df_delta], ignore_index=True)
+
+    columna_token = COLUMNAS['token']
+    if columna_token in df_delta.columns:
+        dataset['tokens'] = dataset['tokens'] | set(df_delta[columna_token].dropna())
+
+    # Conteos por grupo: sumar los del delta
+    conteos = {clave: dict(conteo) for clave, conteo in dataset['conteos'].items()}
+    for clave, conteo_delta in _calcular_conteos(df_delta, dataset['tiene_modulo']).items():
+        conteo = conteos[clave]
+        for valor, cantidad in conteo_delta.items():
+            conteo[valor] = conteo.get(valor, 0) + cantidad
+    dataset['conteos'] = conteos
+
+    # Particiones: desplazar las posiciones del delta y unirlas
+    particiones = dict(dataset['particiones'])
+    for periodo, posiciones in crear_particiones_temporales(df_delta).items():
+        posiciones = posiciones + offset
+        if periodo in particiones:
+            particiones[periodo] = np.concatenate([particiones[periodo], posiciones])
+        else:
+            particiones[periodo] = posiciones
+    dataset['particiones'] = dict(sorted(particiones.items()))
+
+    # Índice de comentarios: tokenizar solo las filas nuevas
+    comentarios = dataset.get('comentarios', {})
+    dataset['comentarios'] = sumar_indices(comentarios, crear_indice_comentarios(df_delta, list(comentarios)))
+
+    # Cubo de agregados: sumar el del delta
+    dataset['cubo'] = sumar_cubos(
+        dataset['cubo'],
+        calcular_cubo(df_delta, dataset['tiene_modulo'], dataset['columnas_excluir'])
+    )
+
+    return dataset
+
+
+def obtener_cubo(dataset):
+    """
+    Devuelve el cubo de agregados por grupo del dataset. Se calcula al
+    crear el dataset, antes de guardarlo en la caché: los datasets
+    cacheados son de solo lectura
+
+    Args:
+        dataset: Dataset creado con crear_dataset
+
+    Returns:
+        dict: Cubo (ver utils.agregados.calcular_cubo)
+    """
+    return dataset['cubo']
+
+
+def _calcular_conteos(df, tiene_modulo):
+    """Cuenta registros por promoción y por módulo, en orden de aparición"""
+    columnas = {'promocion': COLUMNAS['promocion']}
+    if tiene_modulo:
+        columnas['modulo'] = COLUMNAS['modulo']
+
+    return {
+        clave: df[columna].value_counts(sort=False, dropna=False).to_dict()
+        for clave, columna in columnas.items()
+    }
@@ -0,0 +1,113 @@
+"""
+Diferencias entre dos exports de la misma encuesta
+
+Se comparan los cubos de agregados (utils.agregados) de los dos datasets en
+lugar de cruzar sus filas: cada diferencia se calcula sobre una tabla por
+celda promoción x módulo, así que el coste no depende del número de
+respuestas de cada archivo. El cubo de cada export se calcula una vez y
+queda guardado en su dataset.
+"""
+import pandas as pd
+from config.settings import COLUMNAS
+from utils.agregados import filtrar_cubo, medias_desde_cubo
+
+
+def diferencias_registros(cubo_actual, cubo_referencia, grupo_cols, filtro_promocion=None, filtro_modulo=None):
+    """
+    Número de respuestas por grupo en cada export y su diferencia
+
+    Args:
+        cubo_actual: Cubo del export actual
+        cubo_referencia: Cubo del export de referencia
+        grupo_cols: Columnas por las que agrupar (subconjunto de las claves)
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+
+    Returns:
+        pd.DataFrame: Columnas grupo_cols + ['Referencia', 'Actual', 'Δ', 'Δ %']
+                      ('Δ %' es NaN para los grupos nuevos)
+    """
+    actual = filtrar_cubo(cubo_actual['tamanos'], filtro_promocion, filtro_modulo).groupby(grupo_cols).sum()
+    referencia = filtrar_cubo(cubo_referencia['tamanos'], filtro_promocion, filtro_modulo).groupby(grupo_cols).sum()
+
+    tabla = pd.DataFrame({'Referencia': referencia, 'Actual': actual}).fillna(0).astype(int)
+    tabla['Δ'] = tabla['Actual'] - tabla['Referencia']
+    tabla['Δ %'] = tabla['Δ'] / tabla['Referencia'].where(tabla['Referencia'] > 0) * 100
+    return tabla.reset_index()
+
+
+def diferencias_medias(cubo_actual, cubo_referencia, grupo_cols, filtro_promocion=None, filtro_modulo=None):
+    """
+    Medias de las columnas numéricas comunes por grupo en cada export
+
+    Args:
+        cubo_actual: Cubo del export actual
+        cubo_referencia: Cubo del export de referencia
+        grupo_cols: Columnas por las que agrupar (subconjunto de las claves)
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+
+    Returns:
+        tuple: (medias actuales, medias de referencia, diferencias), tres
+               DataFrames grupo x pregunta con los mismos índices y columnas.
+               Los grupos que solo están en un export tienen NaN en el otro.
+    """
+    medias_actual, _ = medias_desde_cubo(cubo_actual, grupo_cols, filtro_promocion, filtro_modulo)
+    medias_referencia, _ = medias_desde_cubo(cubo_referencia, grupo_cols, filtro_promocion, filtro_modulo)
+
+    columnas = [col for col in medias_actual.columns if col in medias_referencia.columns]
+    grupos = medias_actual.index.union(medias_referencia.index)
+    medias_actual = medias_actual.reindex(index=grupos, columns=columnas)
+    medias_referencia = medias_referencia.reindex(index=grupos, columns=columnas)
+
+    return medias_actual, medias_referencia, medias_actual - medias_referencia
+
+
+def diferencias_porcentajes(cubo_actual, cubo_referencia, pregunta, grupo_cols,
+                            filtro_promocion=None, filtro_modulo=None, modulo_especial=None):
+    """
+    Porcentaje de cada respuesta dentro de cada grupo en los dos exports y
+    su diferencia en puntos porcentuales
+
+    Args:
+        cubo_actual: Cubo del export actual
+        cubo_referencia: Cubo del export de referencia
+        pregunta: Pregunta de satisfacción a comparar
+        grupo_cols: Columnas por las que agrupar (subconjunto de las claves)
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+        modulo_especial: Valor del módulo al que se restringe la pregunta (ej: 'Módulo 4')
+
+    Returns:
+        pd.DataFrame: Columnas grupo_cols + [pregunta, 'Respuestas ref.',
+                      'Respuestas actual', '% ref.', '% actual', 'Δ pp'], o
+                      None si la pregunta no está en alguno de los exports
+    """
+    if pregunta not in cubo_actual['respuestas'] or pregunta not in cubo_referencia['respuestas']:
+        return None
+
+    lados = {}
+    for nombre, cubo in (('ref.', cubo_referencia), ('actual', cubo_actual)):
+        conteo = filtrar_cubo(cubo['respuestas'][pregunta], filtro_promocion, filtro_modulo)
+        if modulo_especial and COLUMNAS['modulo'] in conteo.index.names:
+            conteo = filtrar_cubo(conteo, filtro_modulo=[modulo_especial])
+        conteo = conteo.groupby(grupo_cols + [pregunta]).sum()
+        lados[f'Respuestas {nombre}'] = conteo
+        lados[f'% {nombre}'] = conteo / conteo.groupby(level=grupo_cols).transform('sum') * 100
+
+    tabla = pd.DataFrame(lados)
+    if len(tabla) == 0:
+        return None
+
+    # Una respuesta que falta en un grupo presente es un 0%; si falta el
+    # grupo entero (promoción nueva o desaparecida) no hay porcentaje
+    grupos = tabla.index.droplevel(pregunta)
+    for nombre in ('ref.', 'actual'):
+        presentes = lados[f'Respuestas {nombre}'].index.droplevel(pregunta).unique()
+        en_export = grupos.isin(presentes)
+        tabla.loc[en_export, [f'Respuestas {nombre}', f'% {nombre}']] = (
+            tabla.loc[en_export, [f'Respuestas {nombre}', f'% {nombre}']].fillna(0)
+        )
+
+    tabla['Δ pp'] = tabla['% actual'] - tabla['% ref.']
+    return tabla.reset_index()
@@ -0,0 +1,156 @@
+"""
+Normalización de las etiquetas de promoción y módulo
+
+Las etiquetas llegan escritas de formas distintas ('Módulo 4', 'modulo 4 ',
+'Modulo 4') y cada variante forma su propio grupo, además de no coincidir
+con los módulos de KPIS y FILTROS_ESPECIALES, que se comparan por igualdad.
+La normalización trabaja solo sobre los valores distintos: se codifica la
+columna una vez (pd.factorize), se pliega cada etiqueta distinta (espacios,
+mayúsculas y tildes) y se aplica ETIQUETAS_ALIAS, y los códigos de todas
+las filas se traducen de una vez. El coste de la parte en Python depende
+del número de etiquetas distintas, no del de filas.
+"""
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+from config.settings import COLUMNAS, ETIQUETAS_ALIAS, KPIS, FILTROS_ESPECIALES
+
+
+def plegar(etiqueta):
+    """
+    Forma de comparación de una etiqueta: sin espacios sobrantes, en
+    minúsculas y sin tildes
+
+    Args:
+        etiqueta: Texto de la etiqueta
+
+    Returns:
+        str: Etiqueta plegada
+    """
+    etiqueta = re.sub(r'\s+', ' ', etiqueta).strip().casefold()
+    descompuesta = unicodedata.normalize('NFKD', etiqueta)
+    return ''.join(caracter for caracter in descompuesta if not unicodedata.combining(caracter))
+
+
+def etiquetas_configuradas():
+    """
+    Etiquetas de módulo que usan KPIS y FILTROS_ESPECIALES
+
+    Returns:
+        list: Etiquetas que se conservan tal cual al normalizar
+    """
+    modulos = [kpi.get('modulo') for kpi in KPIS] + [filtro.get('modulo') for filtro in FILTROS_ESPECIALES.values()]
+    return list(dict.fromkeys(modulo for modulo in modulos if modulo))
+
+
+def normalizar_etiquetas(serie, canonicas=(), alias=None):
+    """
+    Unifica las variantes de una columna de etiquetas
+
+    Args:
+        serie: Columna con las etiquetas
+        canonicas: Etiquetas preferidas cuando una variante coincide con
+                   ellas al plegarlas (las ya cargadas, las configuradas)
+        alias: dict {variante: etiqueta} (por defecto ETIQUETAS_ALIAS)
+
+    Returns:
+        tuple: (serie normalizada, lista de fusiones). Cada fusión es un dict
+               con 'etiqueta' (la que se conserva), 'variantes' (las que se
+               sustituyen) y 'filas' (filas modificadas)
+    """
+    alias = ETIQUETAS_ALIAS if alias is None else alias
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    if len(unicos) == 0:
+        return serie, []
+    unicos = np.asarray(unicos, dtype=object)
+    filas = np.bincount(codigos[codigos >= 0], minlength=len(unicos))
+
+    # Etiqueta preferida por forma plegada: alias, canónicas y, si no hay
+    # ninguna, la variante más frecuente sin espacios sobrantes (a igualdad,
+    # la primera que aparece)
+    preferidas = {}
+    for etiqueta in [*alias.values(), *canonicas]:
+        if isinstance(etiqueta, str):
+            preferidas.setdefault(plegar(etiqueta), etiqueta)
+    preferidas.update({plegar(variante): etiqueta for variante, etiqueta in alias.items()})
+
+    claves = [plegar(etiqueta) if isinstance(etiqueta, str) else etiqueta for etiqueta in unicos]
+    for codigo in np.argsort(-filas, kind='stable'):
+        if isinstance(unicos[codigo], str):
+            preferidas.setdefault(claves[codigo], re.sub(r'\s+', ' ', unicos[codigo]).strip())
+
+    destino = np.array(
+        [preferidas.get(clave, etiqueta) if isinstance(etiqueta, str) else etiqueta
+         for clave, etiqueta in zip(claves, unicos)],
+        dtype=object
+    )
+    cambian = destino != unicos
+    if not cambian.any():
+        return serie, []
+
+    # Una sola traducción de códigos para todas las filas (los nulos se mantienen)
+    try:
+        etiquetas = pd.array(destino, dtype=serie.dtype)
+    except (TypeError, ValueError):
+        etiquetas = pd.array(destino, dtype=object)
+    normalizada = pd.Series(etiquetas.take(codigos, allow_fill=True), index=serie.index, name=serie.name)
+
+    fusiones = {}
+    for codigo in np.flatnonzero(cambian):
+        fusion = fusiones.setdefault(destino[codigo], {'etiqueta': destino[codigo], 'variantes': [], 'filas': 0})
+        fusion['variantes'].append(unicos[codigo])
+        fusion['filas'] += int(filas[codigo])
+    return normalizada, list(fusiones.values())
+
+
+def normalizar_grupos(df, tiene_modulo, canonicas=None):
+    """
+    Normaliza las columnas de promoción y módulo de un DataFrame
+
+    Args:
+        df: DataFrame limpio (se modifica)
+        tiene_modulo: Si existe la columna de módulo
+        canonicas: dict {'promocion'/'modulo': etiquetas preferidas}, por
+                   ejemplo las del dataset al que se añaden filas. Las de
+                   módulo se completan con etiquetas_configuradas()
+
+    Returns:
+        tuple: (df, informe). El informe es una lista de fusiones (ver
+               normalizar_etiquetas) con la clave 'columna' ('promocion' o 'modulo')
+    """
+    canonicas = canonicas or {}
+    claves = ['promocion', 'modulo'] if tiene_modulo else ['promocion']
+
+    informe = []
+    for clave in claves:
+        preferidas = list(canonicas.get(clave, []))
+        if clave == 'modulo':
+            preferidas += etiquetas_configuradas()
+        df[COLUMNAS[clave]], fusiones = normalizar_etiquetas(df[COLUMNAS[clave]], preferidas)
+        informe.extend({'columna': clave, **fusion} for fusion in fusiones)
+    return df, informe
+
+
+def sumar_informes(informe, informe_delta):
+    """
+    Une el informe de fusiones de un delta con el del dataset
+
+    Args:
+        informe: Lista de fusiones del dataset
+        informe_delta: Lista de fusiones de las filas nuevas
+
+    Returns:
+        list: Nueva lista de fusiones (no modifica las de entrada)
+    """
+    fusiones = {(fusion['columna'], fusion['etiqueta']): dict(fusion, variantes=list(fusion['variantes']))
+                for fusion in informe}
+    for fusion in informe_delta:
+        clave = (fusion['columna'], fusion['etiqueta'])
+        if clave not in fusiones:
+            fusiones[clave] = dict(fusion, variantes=list(fusion['variantes']))
+            continue
+        existente = fusiones[clave]
+        existente['variantes'] += [v for v in fusion['variantes'] if v not in existente['variantes']]
+        existente['filas'] += fusion['filas']
+    return list(fusiones.values())
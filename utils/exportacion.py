@@ -0,0 +1,220 @@
+"""
+Exportación de todas las tablas agrupadas en un solo archivo
+
+Calcula de una vez todas las combinaciones agrupación x agregación de la
+pestaña de Datos Agrupados y las tablas de los KPIs de satisfacción:
+
+- Suma, conteo, mínimo y máximo se calculan en una sola agrupación por la
+  combinación más fina (promoción x módulo); las agrupaciones por promoción
+  o por módulo se obtienen combinando esas celdas, sin volver a recorrer
+  las filas. La media es suma / conteo.
+- La mediana no se puede combinar por celdas: se calcula una vez por
+  agrupación.
+- Los KPIs salen del plan de utils.kpis sobre el cubo del dataset.
+
+Las tablas se escriben en un único libro Excel con el modo write_only de
+openpyxl (fila a fila, sin mantener el libro en memoria) o en un zip con un
+Parquet por tabla.
+"""
+import io
+import re
+import zipfile
+from datetime import datetime
+from config.settings import COLUMNAS, AGREGACIONES
+from utils.kpis import compilar_plan, evaluar_plan, titulo_kpi
+
+# Agrupaciones de la pestaña de Datos Agrupados: nombre -> columnas
+AGRUPACIONES = {
+    'Promoción': [COLUMNAS['promocion']],
+    'Módulo': [COLUMNAS['modulo']],
+    'Promoción + Módulo': [COLUMNAS['promocion'], COLUMNAS['modulo']]
+}
+
+# Formatos de exportación: nombre -> (extensión, tipo MIME)
+FORMATOS = {
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet (zip)': ('zip', 'application/zip')
+}
+
+# Operaciones que se combinan celda a celda: agregación de pandas -> combinación
+_COMBINABLES = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def calcular_agrupados(df, columnas, tiene_modulo):
+    """
+    Todas las combinaciones agrupación x agregación (AGREGACIONES) de las
+    columnas numéricas, con el mismo formato que la pestaña de Datos Agrupados
+
+    Args:
+        df: DataFrame filtrado (basta con las columnas de grupo y `columnas`)
+        columnas: Columnas numéricas a agregar
+        tiene_modulo: Si existe la columna de módulo
+
+    Returns:
+        dict: {(agrupación, agregación): DataFrame con las columnas de grupo y
+              una columna '{columna} ({agregación})' por columna numérica}
+    """
+    agrupaciones = {nombre: claves for nombre, claves in AGRUPACIONES.items()
+                    if tiene_modulo or COLUMNAS['modulo'] not in claves}
+    claves_finas = list(dict.fromkeys(clave for claves in agrupaciones.values() for clave in claves))
+
+    # Una sola agrupación por la combinación más fina para todo lo combinable
+    # (las filas sin módulo cuentan en la agrupación por promoción)
+    agrupado = df.groupby(claves_finas, dropna=False)[columnas]
+    celdas = {operacion: getattr(agrupado, operacion)() for operacion in _COMBINABLES}
+
+    resultado = {}
+    for agrupacion, claves in agrupaciones.items():
+        combinadas = {
+            operacion: getattr(celdas[operacion].groupby(level=claves), combinacion)()
+            for operacion, combinacion in _COMBINABLES.items()
+        }
+        calculadas = {
+            'mean': combinadas['sum'] / combinadas['count'].where(combinadas['count'] > 0),
+            'median': df.groupby(claves)[columnas].median(),
+            'max': combinadas['max'],
+            'min': combinadas['min'],
+            'count': combinadas['count']
+        }
+        for agregacion, funcion in AGREGACIONES.items():
+            tabla = calculadas[funcion].reindex(columns=columnas)
+            tabla.columns = [f"{col} ({agregacion})" for col in columnas]
+            resultado[(agrupacion, agregacion)] = tabla.reset_index()
+    return resultado
+
+
+def calcular_tablas_satisfaccion(cubo, filtro_promocion=None, filtro_modulo=None):
+    """
+    Tablas de los KPIs declarados (KPIS) para la selección actual
+
+    Args:
+        cubo: Cubo de agregados del dataset
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+
+    Returns:
+        dict: {título del KPI por agrupación: DataFrame}
+    """
+    tablas = {}
+    for evaluado in evaluar_plan(compilar_plan(), cubo, filtro_promocion, filtro_modulo):
+        if not evaluado['disponible']:
+            continue
+        for agrupacion, tabla in evaluado['resultados'].items():
+            if tabla is not None:
+                tablas[titulo_kpi(evaluado['kpi'], agrupacion, evaluado['modulo'])] = tabla
+    return tablas
+
+
+def crear_exportacion(df, columnas, tiene_modulo, cubo, filtro_promocion=None, filtro_modulo=None,
+                      formato='Excel'):
+    """
+    Crea el archivo con todas las tablas agrupadas y de satisfacción
+
+    Args:
+        df: DataFrame filtrado (columnas de grupo y `columnas`)
+        columnas: Columnas numéricas a agregar
+        tiene_modulo: Si existe la columna de módulo
+        cubo: Cubo de agregados del dataset
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+        formato: Clave de FORMATOS
+
+    Returns:
+        bytes: Contenido del archivo
+    """
+    tablas = {
+        f"{agrupacion} - {agregacion}": tabla
+        for (agrupacion, agregacion), tabla in calcular_agrupados(df, columnas, tiene_modulo).items()
+    }
+    tablas.update(calcular_tablas_satisfaccion(cubo, filtro_promocion, filtro_modulo))
+
+    if formato == 'Excel':
+        return escribir_excel(tablas)
+    return escribir_parquet_zip(tablas)
+
+
+def escribir_excel(tablas):
+    """
+    Escribe las tablas en un libro Excel, una hoja por tabla, más una hoja
+    'Índice' con el título completo de cada una (los nombres de hoja tienen
+    como mucho 31 caracteres)
+
+    Args:
+        tablas: dict {título: DataFrame}
+
+    Returns:
+        bytes: Contenido del .xlsx
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    indice = libro.create_sheet('Índice')
+    indice.append(['Hoja', 'Contenido', 'Filas'])
+
+    usados = {'Índice'}
+    for titulo, tabla in tablas.items():
+        nombre = _nombre_hoja(titulo, usados)
+        indice.append([nombre, titulo, len(tabla)])
+
+        hoja = libro.create_sheet(nombre)
+        hoja.append([str(col) for col in tabla.columns])
+        for fila in _filas(tabla):
+            hoja.append(fila)
+
+    buffer = io.BytesIO()
+    libro.save(buffer)
+    return buffer.getvalue()
+
+
+def escribir_parquet_zip(tablas):
+    """
+    Escribe cada tabla en un Parquet dentro de un zip
+
+    Args:
+        tablas: dict {título: DataFrame}
+
+    Returns:
+        bytes: Contenido del .zip
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archivo_zip:
+        for titulo, tabla in tablas.items():
+            # Parquet ya va comprimido: el zip solo los agrupa
+            tabla = tabla.copy()
+            tabla.columns = [str(col) for col in tabla.columns]
+            archivo_zip.writestr(f"{_nombre_archivo(titulo)}.parquet", tabla.to_parquet(index=False))
+    return buffer.getvalue()
+
+
+def nombre_exportacion(formato):
+    """
+    Nombre del archivo de exportación con la fecha y hora actuales
+
+    Args:
+        formato: Clave de FORMATOS
+
+    Returns:
+        str: Nombre del archivo
+    """
+    return f"exportacion_completa_{datetime.now():%Y%m%d_%H%M%S}.{FORMATOS[formato][0]}"
+
+
+def _filas(tabla):
+    """Filas de una tabla con tipos de Python (NaN -> celda vacía)"""
+    valores = tabla.astype(object).where(tabla.notna(), None)
+    return valores.itertuples(index=False, name=None)
+
+
+def _nombre_hoja(titulo, usados):
+    """Nombre de hoja válido (31 caracteres, sin []:*?/\\) y no repetido"""
+    base = re.sub(r'[\[\]:*?/\\]', '-', titulo)[:31]
+    nombre, contador = base, 2
+    while nombre in usados:
+        sufijo = f" ({contador})"
+        nombre, contador = base[:31 - len(sufijo)] + sufijo, contador + 1
+    usados.add(nombre)
+    return nombre
+
+
+def _nombre_archivo(titulo):
+    return re.sub(r'[^0-9A-Za-zÁÉÍÓÚÜÑáéíóúüñ]+', '_', str(titulo)).strip('_') or 'tabla'
@@ -0,0 +1,89 @@
+"""
+Valores más frecuentes de columnas con muchos valores distintos
+
+Las columnas de texto libre (comentarios, emails...) pueden tener tantos
+valores distintos como filas. Para que las tablas y los gráficos tengan un
+tamaño acotado se muestran solo los K valores más frecuentes y el resto se
+agrupa en 'Otros'.
+
+Los candidatos se obtienen con un resumen Space-Saving de TOPK_CAPACIDAD
+contadores que recorre la columna por bloques: la memoria no depende del
+número de valores distintos y cualquier valor que aparezca en más de
+N / TOPK_CAPACIDAD filas está garantizado en el resumen. El mismo resumen
+sirve para detectar la cardinalidad alta: mientras no se llena, contiene
+exactamente los valores distintos de la columna.
+"""
+import numpy as np
+import pandas as pd
+from config.settings import TOPK_CAPACIDAD, TOPK_BLOQUE, TOPK_ETIQUETA_OTROS
+
+
+def resumen_frecuentes(valores, capacidad=TOPK_CAPACIDAD, bloque=TOPK_BLOQUE):
+    """
+    Resumen Space-Saving de los valores más frecuentes de una columna
+
+    Cada bloque se cuenta de forma exacta, se recorta a sus `capacidad`
+    valores más frecuentes y se fusiona con el resumen acumulado: un valor
+    que falta en uno de los dos lados puede haber aparecido como mucho
+    tantas veces como el mínimo de ese lado, que se suma a su estimación.
+
+    Args:
+        valores: pd.Series con los valores (los nulos se ignoran)
+        capacidad: Número máximo de contadores
+        bloque: Filas procesadas en cada paso
+
+    Returns:
+        pd.DataFrame: Una fila por valor candidato, de mayor a menor
+                      'Estimación' (cota superior de su frecuencia), con el
+                      'Error' máximo de esa estimación
+    """
+    valores = valores.dropna()
+    estimaciones = pd.Series(dtype='int64')
+    errores = pd.Series(dtype='int64')
+
+    for inicio in range(0, len(valores), bloque):
+        conteo = valores.iloc[inicio:inicio + bloque].value_counts()
+        error_bloque = int(conteo.iloc[capacidad]) if len(conteo) > capacidad else 0
+        conteo = conteo.iloc[:capacidad]
+        minimo = int(estimaciones.min()) if len(estimaciones) >= capacidad else 0
+
+        indice = estimaciones.index.union(conteo.index, sort=False)
+        estimacion = estimaciones.reindex(indice, fill_value=minimo) + conteo.reindex(indice, fill_value=error_bloque)
+        error = errores.reindex(indice, fill_value=minimo) + np.where(indice.isin(conteo.index), 0, error_bloque)
+
+        mayores = estimacion.nlargest(capacidad).index
+        estimaciones, errores = estimacion[mayores], error[mayores]
+
+    resumen = pd.DataFrame({'Estimación': estimaciones, 'Error': errores})
+    return resumen.sort_values('Estimación', ascending=False, kind='stable')
+
+
+def conteos_por_grupo(df, columna, grupo_col, frecuentes=None):
+    """
+    Tabla de conteos grupo x valor, opcionalmente limitada a unos valores
+
+    Args:
+        df: DataFrame con los datos
+        columna: Columna categórica
+        grupo_col: Columna por la que agrupar (filas de la tabla)
+        frecuentes: Valores a conservar; el resto se agrupa en 'Otros'.
+                    None para conservar todos
+
+    Returns:
+        pd.DataFrame: Conteos exactos por grupo, con los valores ordenados de
+                      más a menos frecuente y 'Otros' al final
+    """
+    valores = df[columna]
+    if frecuentes is not None:
+        valores = valores.where(valores.isna() | valores.isin(frecuentes), TOPK_ETIQUETA_OTROS)
+
+    tabla = pd.crosstab(df[grupo_col], valores)
+    if frecuentes is None:
+        return tabla
+
+    columnas = tabla.drop(columns=TOPK_ETIQUETA_OTROS, errors='ignore').sum().sort_values(
+        ascending=False, kind='stable'
+    ).index.tolist()
+    if TOPK_ETIQUETA_OTROS in tabla.columns:
+        columnas.append(TOPK_ETIQUETA_OTROS)
+    return tabla[columnas]
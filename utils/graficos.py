@@ -0,0 +1,289 @@
+"""
+Construcción de las figuras del dashboard
+
+Funciones puras (sin Streamlit) que usan tanto las pestañas como la
+exportación de informes HTML.
+"""
+import plotly.express as px
+from config.settings import COLOR_SCALES
+
+
+def crear_figura_porcentajes(porcentajes_df, columna_grupo, columna_analizada, titulo):
+    """
+    Gráfico de barras agrupadas con el porcentaje de cada respuesta por grupo
+
+    Args:
+        porcentajes_df: DataFrame con columnas [Grupo, Respuesta, Porcentaje]
+                        (y opcionalmente 'IC inf.' e 'IC sup.' para las barras de error)
+        columna_grupo: Columna de grupo (eje x)
+        columna_analizada: Columna de respuestas (color)
+        titulo: Título del gráfico
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    porcentajes_df, barras_error = _barras_error(porcentajes_df, 'Porcentaje', 'IC inf.', 'IC sup.')
+    fig = px.bar(
+        porcentajes_df,
+        x=columna_grupo,
+        y='Porcentaje',
+        color=columna_analizada,
+        title=titulo,
+        text='Porcentaje',
+        barmode='group',
+        color_discrete_sequence=px.colors.sequential.Blues,
+        **barras_error
+    )
+
+    # Formato del texto en las barras
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+
+    # Ajustar layout
+    fig.update_layout(
+        xaxis_title=columna_grupo,
+        yaxis_title='Porcentaje (%)',
+        yaxis_range=[0, max(porcentajes_df['Porcentaje'].max() * 1.1, 100)],
+        showlegend=True,
+        legend_title=columna_analizada,
+        height=500
+    )
+    return fig
+
+
+def crear_figura_distribucion(porcentajes, nombre_grupo, col_categorica, titulo):
+    """
+    Gráfico de barras apiladas con la distribución (%) de respuestas por grupo
+
+    Args:
+        porcentajes: DataFrame con columnas [nombre_grupo, col_categorica, Porcentaje]
+        nombre_grupo: Columna de grupo (eje x)
+        col_categorica: Columna de respuestas (color)
+        titulo: Título del gráfico
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    fig = px.bar(
+        porcentajes,
+        x=nombre_grupo,
+        y='Porcentaje',
+        color=col_categorica,
+        title=titulo,
+        text='Porcentaje',
+        barmode='stack'
+    )
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='inside')
+    fig.update_layout(yaxis_title="Porcentaje (%)", yaxis_range=[0, 100])
+    return fig
+
+
+def crear_figura_estadistica(stats, nombre_grupo, metrica, titulo, escala):
+    """
+    Gráfico de barras de una estadística (Media, Mediana...) por grupo
+
+    Args:
+        stats: DataFrame con columnas [nombre_grupo, metrica] (y opcionalmente
+               '<metrica> IC inf.' y '<metrica> IC sup.' para las barras de error)
+        nombre_grupo: Columna de grupo (eje x)
+        metrica: Columna a representar
+        titulo: Título del gráfico
+        escala: Clave de COLOR_SCALES
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    stats, barras_error = _barras_error(stats, metrica, f'{metrica} IC inf.', f'{metrica} IC sup.')
+    return px.bar(
+        stats,
+        x=nombre_grupo,
+        y=metrica,
+        title=titulo,
+        color=metrica,
+        color_continuous_scale=COLOR_SCALES[escala],
+        **barras_error
+    )
+
+
+def crear_figura_kpi(resultado, metrica, pregunta, nombre_grupo, titulo, escala):
+    """
+    Gráfico de un KPI declarado (ver utils.kpis) según su tipo de métrica
+
+    Args:
+        resultado: DataFrame del KPI para una agrupación
+        metrica: 'distribucion', 'top_box', 'media' o 'nps'
+        pregunta: Columna de la pregunta (respuestas en las distribuciones)
+        nombre_grupo: Columna de grupo (eje x)
+        titulo: Título del gráfico (sin unidades)
+        escala: Clave de COLOR_SCALES
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    if metrica == 'distribucion':
+        return crear_figura_porcentajes(resultado, nombre_grupo, pregunta, f"{titulo} (%)")
+
+    valor, sufijo = {
+        'top_box': ('Porcentaje', ' (%)'),
+        'media': ('Media', ''),
+        'nps': ('NPS', ' (NPS)')
+    }[metrica]
+    return crear_figura_estadistica(resultado, nombre_grupo, valor, titulo + sufijo, escala)
+
+
+def crear_figura_combinada(stats_combinado, col_analizar):
+    """
+    Gráfico de barras agrupadas de la media por Promoción y Módulo
+
+    Args:
+        stats_combinado: DataFrame con columnas ['Promoción', 'Módulo', 'Media']
+        col_analizar: Columna analizada (para el título)
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    fig = px.bar(
+        stats_combinado,
+        x='Promoción',
+        y='Media',
+        color='Módulo',
+        title=f'Media de {col_analizar} por Promoción y Módulo',
+        barmode='group',
+        text='Media'
+    )
+    fig.update_traces(texttemplate='%{text:.2f}', textposition='outside')
+    return fig
+
+
+def crear_figura_mapa_calor(tabla, etiqueta_x, etiqueta_y, etiqueta_color, titulo, text_auto='.2f'):
+    """
+    Mapa de calor a partir de una tabla pivotada
+
+    Args:
+        tabla: DataFrame pivotado (filas = eje y, columnas = eje x)
+        etiqueta_x: Nombre del eje x
+        etiqueta_y: Nombre del eje y
+        etiqueta_color: Nombre de la escala de color
+        titulo: Título del gráfico
+        text_auto: Formato de los valores en las celdas, o False
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    return px.imshow(
+        tabla,
+        labels=dict(x=etiqueta_x, y=etiqueta_y, color=etiqueta_color),
+        title=titulo,
+        color_continuous_scale=COLOR_SCALES['heatmap'],
+        text_auto=text_auto
+    )
+
+
+def crear_figura_resumen_preguntas(tabla, nombre_grupo, metrica, longitud_etiqueta=60):
+    """
+    Mapa de calor pregunta x grupo del resumen de todas las preguntas
+
+    Args:
+        tabla: DataFrame pivotado (filas = preguntas, columnas = grupos)
+        nombre_grupo: Nombre del grupo ('Promoción' o 'Módulo')
+        metrica: Métrica representada
+        longitud_etiqueta: Longitud máxima de las etiquetas de pregunta
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    etiquetas = [
+        pregunta if len(str(pregunta)) <= longitud_etiqueta else f"{str(pregunta)[:longitud_etiqueta]}…"
+        for pregunta in tabla.index
+    ]
+    fig = px.imshow(
+        tabla.values,
+        x=[str(col) for col in tabla.columns],
+        y=etiquetas,
+        labels=dict(x=nombre_grupo, y="Pregunta", color=metrica),
+        title=f"{metrica} por pregunta y {nombre_grupo.lower()}",
+        color_continuous_scale=COLOR_SCALES['heatmap'],
+        text_auto='.2f' if tabla.size <= 400 else False,
+        aspect='auto'
+    )
+    fig.update_layout(height=max(400, 22 * len(tabla)))
+    return fig
+
+
+def crear_figura_terminos(terminos, nombre_grupo, titulo, columnas=3):
+    """
+    Barras horizontales con los términos más mencionados, un panel por grupo
+
+    Args:
+        terminos: DataFrame con columnas [nombre_grupo, 'Término', '% comentarios']
+        nombre_grupo: Columna de grupo (un panel por valor)
+        titulo: Título del gráfico
+        columnas: Paneles por fila
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    grupos = terminos[nombre_grupo].nunique()
+    fig = px.bar(
+        terminos,
+        x='% comentarios',
+        y='Término',
+        facet_col=nombre_grupo,
+        facet_col_wrap=columnas,
+        orientation='h',
+        title=titulo,
+        color='% comentarios',
+        color_continuous_scale=COLOR_SCALES['promocion'],
+        facet_row_spacing=0.08
+    )
+    # Cada panel muestra sus propios términos, de más a menos mencionado
+    fig.update_yaxes(matches=None, showticklabels=True, autorange='reversed', title=None)
+    fig.for_each_annotation(lambda anotacion: anotacion.update(text=anotacion.text.split('=', 1)[-1]))
+    fig.update_layout(height=max(400, 320 * -(-grupos // columnas)), coloraxis_showscale=False)
+    return fig
+
+
+def crear_figura_diferencias(datos, columna_x, columna_delta, titulo, color=None, unidad=''):
+    """
+    Barras con la diferencia entre dos exports (positivas hacia arriba)
+
+    Args:
+        datos: DataFrame con las diferencias
+        columna_x: Columna del eje x (grupo)
+        columna_delta: Columna con la diferencia
+        titulo: Título del gráfico
+        color: Columna para separar barras (ej: la respuesta), o None
+        unidad: Sufijo de los valores (ej: ' pp')
+
+    Returns:
+        plotly.graph_objects.Figure
+    """
+    fig = px.bar(
+        datos,
+        x=columna_x,
+        y=columna_delta,
+        color=color,
+        barmode='group',
+        title=titulo,
+        text=columna_delta
+    )
+    fig.update_traces(texttemplate=f'%{{text:+.1f}}{unidad}', textposition='outside')
+    fig.add_hline(y=0, line_color='gray', line_width=1)
+    fig.update_layout(xaxis_title=columna_x, yaxis_title=columna_delta, height=450)
+    return fig
+
+
+def _barras_error(datos, valor, inferior, superior):
+    """
+    Prepara las barras de error de un intervalo de confianza, si los datos lo traen
+
+    Returns:
+        tuple: (datos con las columnas de error, argumentos error_y/error_y_minus para px.bar)
+    """
+    if inferior not in datos.columns or superior not in datos.columns:
+        return datos, {}
+
+    datos = datos.assign(**{
+        '_error_sup': (datos[superior] - datos[valor]).clip(lower=0),
+        '_error_inf': (datos[valor] - datos[inferior]).clip(lower=0)
+    })
+    return datos, {'error_y': '_error_sup', 'error_y_minus': '_error_inf'}
@@ -0,0 +1,249 @@
+"""
+Informes HTML estáticos del dashboard
+
+Genera un archivo HTML autocontenido por selección de filtros con las
+figuras de las pestañas de KPIs, Promoción, Módulo y Datos Agrupados.
+Todas las figuras se calculan a partir del cubo de agregados del dataset
+(sin recorrer las filas) y se construyen en paralelo en un pool de procesos.
+"""
+import html
+import io
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from datetime import datetime
+from config.settings import COLUMNAS, INFORMES_PROCESOS
+from utils.agregados import filtrar_cubo, medias_desde_cubo
+from utils.calculations import obtener_columna_destacada
+from utils.dataset import obtener_cubo
+from utils.kpis import AGRUPACIONES, compilar_plan, evaluar_plan, titulo_kpi
+from utils.graficos import (
+    crear_figura_kpi,
+    crear_figura_estadistica,
+    crear_figura_combinada,
+    crear_figura_mapa_calor,
+    crear_figura_resumen_preguntas
+)
+
+_PLANTILLA = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>{titulo}</title>
+<script type="text/javascript">{plotlyjs}</script>
+<style>
+body {{ font-family: sans-serif; margin: 2rem auto; max-width: 1200px; color: #262730; }}
+h1 {{ border-bottom: 2px solid #eee; padding-bottom: .5rem; }}
+h2 {{ margin-top: 2.5rem; }}
+.metricas {{ display: flex; gap: 2rem; }}
+.metrica {{ background: #f6f6f9; padding: 1rem 1.5rem; border-radius: .5rem; }}
+.metrica b {{ display: block; font-size: 1.6rem; }}
+.tabla {{ overflow-x: auto; font-size: .85rem; }}
+.tabla table {{ border-collapse: collapse; }}
+.tabla td, .tabla th {{ border: 1px solid #ddd; padding: .25rem .5rem; text-align: right; }}
+</style>
+</head>
+<body>
+<h1>📊 {titulo}</h1>
+<p>Generado el {fecha}</p>
+{cuerpo}
+</body>
+</html>
+"""
+
+
+def generar_informes(dataset, selecciones, max_workers=INFORMES_PROCESOS):
+    """
+    Genera un informe HTML autocontenido por selección
+
+    Args:
+        dataset: Dataset creado con utils.dataset.crear_dataset
+        selecciones: dict {título: (promociones, módulos)}; None = sin filtrar
+        max_workers: Número de procesos para construir las figuras
+
+    Returns:
+        dict: {nombre de archivo: contenido HTML}
+    """
+    from plotly.offline import get_plotlyjs
+
+    cubo = obtener_cubo(dataset)
+    tiene_modulo = dataset['tiene_modulo']
+
+    # Secciones de todos los informes: (título, [tareas]) en orden
+    planes = {
+        titulo: _planificar_informe(cubo, tiene_modulo, promociones, modulos)
+        for titulo, (promociones, modulos) in selecciones.items()
+    }
+
+    # Construir todas las figuras en paralelo. Plotly es Python puro (no
+    # libera el GIL), así que se reparten en procesos y no en hilos
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futuros = {
+                titulo: [(seccion, [pool.submit(tarea) for tarea in tareas]) for seccion, tareas in plan]
+                for titulo, plan in planes.items()
+            }
+            fragmentos = {
+                titulo: [(seccion, [futuro.result() for futuro in lista]) for seccion, lista in secciones]
+                for titulo, secciones in futuros.items()
+            }
+    else:
+        fragmentos = {
+            titulo: [(seccion, [tarea() for tarea in tareas]) for seccion, tareas in plan]
+            for titulo, plan in planes.items()
+        }
+
+    plotlyjs = get_plotlyjs()
+    fecha = datetime.now().strftime("%d/%m/%Y %H:%M")
+
+    informes = {}
+    for titulo, secciones in fragmentos.items():
+        cuerpo = "\n".join(
+            f"<h2>{html.escape(seccion)}</h2>\n" + "\n".join(partes)
+            for seccion, partes in secciones
+        )
+        informes[f"informe_{_nombre_archivo(titulo)}.html"] = _PLANTILLA.format(
+            titulo=html.escape(f"Dashboard de KPIs - {titulo}"),
+            plotlyjs=plotlyjs,
+            fecha=fecha,
+            cuerpo=cuerpo
+        )
+
+    return informes
+
+
+def comprimir_informes(informes):
+    """
+    Empaqueta los informes en un archivo zip
+
+    Args:
+        informes: dict {nombre de archivo: contenido HTML}
+
+    Returns:
+        bytes: Contenido del zip
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archivo_zip:
+        for nombre, contenido in informes.items():
+            archivo_zip.writestr(nombre, contenido)
+    return buffer.getvalue()
+
+
+def _planificar_informe(cubo, tiene_modulo, promociones, modulos):
+    """Devuelve las secciones del informe como listas de tareas que generan HTML"""
+    columna_promocion = COLUMNAS['promocion']
+    columna_modulo = COLUMNAS['modulo']
+    filtros = dict(filtro_promocion=promociones, filtro_modulo=modulos if tiene_modulo else None)
+
+    tamanos = filtrar_cubo(cubo['tamanos'], **filtros)
+    numericas = list(cubo['sumas'].columns)
+    destacada = obtener_columna_destacada(numericas)
+
+    medias_promo, _ = medias_desde_cubo(cubo, [columna_promocion], **filtros)
+
+    # ========== KPIs ==========
+    metricas = [("Total Registros", int(tamanos.sum())),
+                ("Promociones", tamanos.index.get_level_values(columna_promocion).nunique())]
+    if tiene_modulo:
+        metricas.append(("Módulos", tamanos.index.get_level_values(columna_modulo).nunique()))
+    if destacada is not None:
+        medias_total, _ = medias_desde_cubo(cubo, lambda _: 'Total', **filtros)
+        metricas.append((f"Media {destacada}", f"{medias_total[destacada].iloc[0]:,.2f}"))
+
+    # KPIs declarados: se evalúan aquí (un único plan) y los procesos solo dibujan
+    kpis = [partial(_html_metricas, metricas)]
+    for evaluado in evaluar_plan(compilar_plan(), cubo, **filtros):
+        if not evaluado['disponible']:
+            continue
+        kpi = evaluado['kpi']
+        for agrupacion, resultado in evaluado['resultados'].items():
+            if resultado is None:
+                kpis.append(partial(_html_sin_datos))
+                continue
+            kpis.append(_tarea_figura(
+                crear_figura_kpi, resultado, kpi['metrica'], kpi['pregunta'], AGRUPACIONES[agrupacion][1],
+                titulo_kpi(kpi, agrupacion, evaluado['modulo']), agrupacion
+            ))
+
+    secciones = [("📈 KPIs Principales", kpis)]
+
+    # ========== PROMOCIÓN ==========
+    promocion = []
+    if destacada is not None:
+        stats = medias_promo[[destacada]].rename(columns={destacada: 'Media'})
+        stats = stats.rename_axis('Promoción').reset_index()
+        promocion.append(_tarea_figura(
+            crear_figura_estadistica, stats, 'Promoción', 'Media', f'Media de {destacada} por Promoción', 'media'
+        ))
+    if numericas:
+        promocion.append(_tarea_figura(
+            crear_figura_resumen_preguntas, medias_promo.T.reindex(numericas), 'Promoción', 'Media'
+        ))
+    secciones.append(("📊 Análisis por Promoción", promocion))
+
+    # ========== MÓDULO ==========
+    if tiene_modulo and numericas:
+        medias_modulo, _ = medias_desde_cubo(cubo, [columna_modulo], **filtros)
+        medias_comb, _ = medias_desde_cubo(cubo, [columna_promocion, columna_modulo], **filtros)
+
+        modulo = []
+        if destacada is not None:
+            stats = medias_modulo[[destacada]].rename(columns={destacada: 'Media'})
+            stats = stats.rename_axis('Módulo').reset_index()
+            modulo.append(_tarea_figura(
+                crear_figura_estadistica, stats, 'Módulo', 'Media', f'Media de {destacada} por Módulo', 'modulo_media'
+            ))
+
+            stats_combinado = medias_comb[[destacada]].rename(columns={destacada: 'Media'})
+            stats_combinado = stats_combinado.rename_axis(['Promoción', 'Módulo']).reset_index()
+            modulo.append(_tarea_figura(crear_figura_combinada, stats_combinado, destacada))
+            modulo.append(_tarea_figura(
+                crear_figura_mapa_calor,
+                stats_combinado.pivot(index='Promoción', columns='Módulo', values='Media'),
+                "Módulo", "Promoción", "Media", f"Mapa de Calor: Media de {destacada}"
+            ))
+
+        modulo.append(_tarea_figura(
+            crear_figura_resumen_preguntas, medias_modulo.T.reindex(numericas), 'Módulo', 'Media'
+        ))
+        secciones.append(("📚 Análisis por Módulo", modulo))
+
+    # ========== DATOS AGRUPADOS ==========
+    if numericas:
+        claves = [columna_promocion, columna_modulo] if tiene_modulo else [columna_promocion]
+        medias_grupo, _ = medias_desde_cubo(cubo, claves, **filtros)
+        secciones.append(("🔢 Datos Agrupados (Media)", [partial(_html_tabla, medias_grupo)]))
+
+    return secciones
+
+
+def _tarea_figura(funcion, *args):
+    """Crea una tarea (serializable) que construye una figura y la convierte a HTML"""
+    return partial(_figura_html, funcion, *args)
+
+
+def _figura_html(funcion, *args):
+    fig = funcion(*args)
+    if fig is None:
+        return _html_sin_datos()
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+
+def _html_sin_datos():
+    return "<p>⚠️ No hay datos suficientes para mostrar el gráfico</p>"
+
+
+def _html_metricas(metricas):
+    return '<div class="metricas">' + "".join(
+        f'<div class="metrica">{html.escape(str(nombre))}<b>{html.escape(str(valor))}</b></div>'
+        for nombre, valor in metricas
+    ) + '</div>'
+
+
+def _html_tabla(tabla):
+    return f'<div class="tabla">{tabla.round(2).to_html(na_rep="-")}</div>'
+
+
+def _nombre_archivo(titulo):
+    return re.sub(r'[^0-9A-Za-zÁÉÍÓÚÜÑáéíóúüñ]+', '_', str(titulo)).strip('_') or 'informe'
@@ -0,0 +1,252 @@
+"""
+Ingesta en segundo plano con progreso, cancelación y trabajos compartidos
+
+Junto con utils.cache_datasets garantiza que cada archivo se procesa una
+sola vez aunque lo suban varias sesiones a la vez (single-flight): el
+trabajo en curso se comparte y, al terminar, el dataset queda en caché.
+"""
+import hashlib
+import io
+import threading
+import time
+from config.settings import (
+    COLUMNAS,
+    INGESTA_SEGUNDOS_RETENCION,
+    PROGRESIVO_MIN_FILAS,
+    PROGRESIVO_TAMANO_MUESTRA
+)
+from utils.cache_datasets import obtener_dataset, guardar_dataset
+from utils.metricas import contar, medir, observar
+
+# Trabajos en curso (o recién terminados) por hash del contenido, compartidos
+# por todas las sesiones del proceso
+_TRABAJOS = {}
+_BLOQUEO = threading.Lock()
+
+
+class TrabajoIngesta:
+    """
+    Carga de un archivo en un hilo de fondo
+
+    El estado es uno de 'en_curso', 'terminado', 'cancelado' o 'error'.
+    El resultado es un dataset (ver utils.dataset.crear_dataset) compartido
+    entre las sesiones que subieron el mismo archivo: no se debe modificar.
+    En los archivos de más de PROGRESIVO_MIN_FILAS filas, mientras se
+    calcula el resultado ya hay un dataset provisional sobre una muestra
+    estratificada (ver utils.dataset.crear_dataset_provisional).
+    """
+
+    def __init__(self, clave, contenido, nombre):
+        self.clave = clave
+        self.nombre = nombre
+        self.estado = 'en_curso'
+        self.filas_leidas = 0
+        self.filas_estimadas = None
+        self.cabecera = None
+        self.conteos_parciales = {}
+        self._posiciones_grupo = {}
+        self.resultado = None
+        self.provisional = None
+        self.error = None
+        self.terminado_en = None
+        self._suscriptores = 0
+        self._cancelar = threading.Event()
+        self._contenido = contenido
+        self._hilo = threading.Thread(target=self._ejecutar, name=f"ingesta-{clave[:8]}", daemon=True)
+
+    @property
+    def activo(self):
+        return self.estado == 'en_curso'
+
+    @property
+    def progreso(self):
+        """Fracción leída (0-1), o None si no se conoce el total"""
+        if not self.filas_estimadas:
+            return None
+        return min(self.filas_leidas / self.filas_estimadas, 1.0)
+
+    def cancelar(self):
+        """Retira una suscripción; el trabajo se cancela cuando no queda ninguna"""
+        with _BLOQUEO:
+            self._suscriptores = max(self._suscriptores - 1, 0)
+            if self._suscriptores == 0 and self.activo:
+                self._cancelar.set()
+
+    def esperar(self, timeout=None):
+        """
+        Bloquea hasta que el trabajo termine (para usos fuera de Streamlit)
+
+        Args:
+            timeout: Segundos máximos de espera, o None para esperar siempre
+
+        Returns:
+            bool: True si el trabajo ya no está en curso
+        """
+        if self._hilo.is_alive():
+            self._hilo.join(timeout)
+        return not self.activo
+
+    def _terminar_con(self, dataset):
+        """Marca el trabajo como terminado con un dataset ya disponible"""
+        self.resultado = dataset
+        self.estado = 'terminado'
+        self.terminado_en = time.monotonic()
+        self._contenido = None
+
+    def _al_leer_cabecera(self, cabecera):
+        self.cabecera = cabecera
+        self._posiciones_grupo = {
+            clave: cabecera.index(COLUMNAS[clave])
+            for clave in ('promocion', 'modulo')
+            if COLUMNAS[clave] in cabecera
+        }
+        self.conteos_parciales = {clave: {} for clave in self._posiciones_grupo}
+
+    def _al_progresar(self, filas, filas_leidas, filas_estimadas):
+        # Se sustituyen los conteos completos para que la interfaz nunca
+        # lea un diccionario a medio actualizar
+        conteos = {}
+        for clave, posicion in self._posiciones_grupo.items():
+            conteo = dict(self.conteos_parciales[clave])
+            for fila in filas:
+                valor = fila[posicion] if posicion < len(fila) else None
+                conteo[valor] = conteo.get(valor, 0) + 1
+            conteos[clave] = conteo
+        self.conteos_parciales = conteos
+        self.filas_leidas = filas_leidas
+        self.filas_estimadas = filas_estimadas
+
+    def _ejecutar(self):
+        from utils.lectores import leer_archivo
+        from utils.data_processor import (
+            limpiar_datos,
+            validar_columnas,
+            crear_columnas_agrupacion
+        )
+        from utils.etiquetas import normalizar_grupos
+        from utils.dataset import crear_dataset, crear_dataset_provisional
+
+        inicio = time.perf_counter()
+        try:
+            # El lector depende del formato; solo .xlsx informa del progreso
+            # durante la lectura, el resto lee el archivo de una vez
+            with medir('dashboard_etapa_segundos', etapa='lectura'):
+                df = leer_archivo(
+                    io.BytesIO(self._contenido),
+                    self.nombre,
+                    al_leer_cabecera=self._al_leer_cabecera,
+                    al_progresar=self._al_progresar,
+                    cancelar=self._cancelar
+                )
+
+            if df is None:
+                self.estado = 'cancelado'
+                return
+
+            with medir('dashboard_etapa_segundos', etapa='limpieza'):
+                df = limpiar_datos(df)
+                es_valido, mensaje_error, tiene_modulo = validar_columnas(df)
+            if not es_valido:
+                self.error = mensaje_error
+                self.estado = 'error'
+                return
+
+            with medir('dashboard_etapa_segundos', etapa='etiquetas'):
+                df, etiquetas = normalizar_grupos(df, tiene_modulo)
+            df, _, columnas_excluir = crear_columnas_agrupacion(df, tiene_modulo)
+
+            if len(df) > PROGRESIVO_MIN_FILAS:
+                # Resultados provisionales mientras se calcula el dataset completo
+                with medir('dashboard_etapa_segundos', etapa='provisional'):
+                    self.provisional = crear_dataset_provisional(
+                        df, tiene_modulo, columnas_excluir, PROGRESIVO_TAMANO_MUESTRA,
+                        origen=self.clave, etiquetas=etiquetas
+                    )
+
+            with medir('dashboard_etapa_segundos', etapa='dataset'):
+                self.resultado = crear_dataset(df, tiene_modulo, columnas_excluir, origen=self.clave,
+                                               etiquetas=etiquetas)
+            guardar_dataset(self.clave, self.resultado)
+            self.estado = 'terminado'
+        except Exception as e:
+            self.error = f"❌ Error al leer el archivo: {str(e)}"
+            self.estado = 'error'
+        finally:
+            self._contenido = None
+            self.terminado_en = time.monotonic()
+            contar('dashboard_ingestas_total', estado=self.estado)
+            observar('dashboard_etapa_segundos', time.perf_counter() - inicio, etapa='total')
+
+
+def calcular_clave(contenido):
+    """
+    Calcula la clave de un archivo a partir de su contenido
+
+    Args:
+        contenido: bytes del archivo
+
+    Returns:
+        str: Hash SHA-256 en hexadecimal
+    """
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def iniciar_ingesta(contenido, nombre, clave=None):
+    """
+    Inicia la carga de un archivo en segundo plano, o se une a la carga
+    en curso si otra petición ya está procesando el mismo contenido.
+    Si el dataset ya está en caché, el trabajo se devuelve terminado.
+
+    Args:
+        contenido: bytes del archivo
+        nombre: Nombre del archivo (para elegir el lector)
+        clave: Hash del contenido, si ya se calculó
+
+    Returns:
+        TrabajoIngesta: Trabajo nuevo o existente
+    """
+    clave = clave or calcular_clave(contenido)
+
+    with _BLOQUEO:
+        _purgar_trabajos()
+        trabajo = _TRABAJOS.get(clave)
+
+        # Un trabajo cancelado (o a punto de detenerse) no se reutiliza
+        if trabajo is None or trabajo.estado in ('cancelado', 'error') or trabajo._cancelar.is_set():
+            trabajo = TrabajoIngesta(clave, contenido, nombre)
+            _TRABAJOS[clave] = trabajo
+
+            dataset = obtener_dataset(clave)
+            if dataset is not None:
+                trabajo._terminar_con(dataset)
+            else:
+                trabajo._hilo.start()
+
+        trabajo._suscriptores += 1
+
+    return trabajo
+
+
+def obtener_trabajo(clave):
+    """
+    Devuelve el trabajo registrado para una clave
+
+    Args:
+        clave: Hash del contenido
+
+    Returns:
+        TrabajoIngesta: Trabajo o None si no existe
+    """
+    with _BLOQUEO:
+        return _TRABAJOS.get(clave)
+
+
+def _purgar_trabajos():
+    """Olvida los trabajos terminados hace más de INGESTA_SEGUNDOS_RETENCION"""
+    ahora = time.monotonic()
+    for clave in [
+        clave for clave, trabajo in _TRABAJOS.items()
+        if trabajo.terminado_en is not None
+        and ahora - trabajo.terminado_en > INGESTA_SEGUNDOS_RETENCION
+    ]:
+        del _TRABAJOS[clave]
@@ -0,0 +1,287 @@
+"""
+KPIs declarativos (KPIS en config/settings.py) y su plan de evaluación
+
+compilar_plan agrupa todos los KPIs declarados en un conjunto mínimo de
+pasos: uno por cada combinación distinta de restricción de módulo y
+agrupación. evaluar_plan recorre el cubo una sola vez para aplicar los
+filtros de la selección, aplica cada restricción una sola vez (aunque la
+compartan varios KPIs, como 'Módulo 4') y resuelve cada paso con una
+única agrupación para todas sus preguntas. Cada KPI es después una
+porción del resultado de su paso.
+"""
+import numpy as np
+import pandas as pd
+from config.settings import COLUMNAS, KPIS
+from utils.agregados import filtrar_cubo
+from utils.calculations import necesita_filtro_modulo
+
+METRICAS = ('distribucion', 'top_box', 'media', 'nps')
+
+# Agrupaciones admitidas: nombre en la declaración -> (columna, nombre en el resultado)
+AGRUPACIONES = {
+    'promocion': (COLUMNAS['promocion'], 'Promoción'),
+    'modulo': (COLUMNAS['modulo'], 'Módulo')
+}
+
+
+def compilar_plan(kpis=KPIS):
+    """
+    Compila los KPIs declarados en un plan de evaluación
+
+    Args:
+        kpis: Lista de KPIs declarados (ver KPIS en config/settings.py)
+
+    Returns:
+        dict: Plan con claves 'kpis' (normalizados), 'pasos' (uno por
+              restricción y agrupación, con las preguntas que resuelve) y
+              'restricciones' (módulos distintos)
+
+    Raises:
+        ValueError: Si algún KPI está mal declarado
+    """
+    normalizados = []
+    pasos = {}
+
+    for kpi in kpis:
+        kpi = _normalizar(kpi)
+        normalizados.append(kpi)
+        tabla = 'medias' if kpi['metrica'] == 'media' else 'respuestas'
+
+        for agrupacion in kpi['agrupaciones']:
+            paso = pasos.setdefault((kpi['modulo'], agrupacion), {
+                'modulo': kpi['modulo'],
+                'agrupacion': agrupacion,
+                'respuestas': [],
+                'medias': []
+            })
+            if kpi['pregunta'] not in paso[tabla]:
+                paso[tabla].append(kpi['pregunta'])
+
+    return {
+        'kpis': normalizados,
+        'pasos': list(pasos.values()),
+        'restricciones': list(dict.fromkeys(kpi['modulo'] for kpi in normalizados))
+    }
+
+
+def evaluar_plan(plan, cubo, filtro_promocion=None, filtro_modulo=None):
+    """
+    Evalúa todos los KPIs de un plan sobre el cubo de agregados
+
+    Sin columna de módulo en los datos se ignoran las restricciones de
+    módulo y las agrupaciones por módulo.
+
+    Args:
+        plan: Plan creado con compilar_plan
+        cubo: Cubo calculado con utils.agregados.calcular_cubo
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+
+    Returns:
+        list: Un dict por KPI con claves 'kpi', 'modulo' (restricción
+              aplicada o None), 'disponible' (si la pregunta está en los
+              datos) y 'resultados' ({agrupación: DataFrame o None})
+    """
+    tiene_modulo = COLUMNAS['modulo'] in cubo['claves']
+
+    # Filtros de la selección: una sola vez para todas las tablas
+    preguntas = [pregunta for pregunta in dict.fromkeys(p for paso in plan['pasos'] for p in paso['respuestas'])
+                 if pregunta in cubo['respuestas']]
+    numericas = [pregunta for pregunta in dict.fromkeys(p for paso in plan['pasos'] for p in paso['medias'])
+                 if pregunta in cubo['sumas'].columns]
+    tablas = {
+        'tamanos': filtrar_cubo(cubo['tamanos'], filtro_promocion, filtro_modulo),
+        'respuestas': filtrar_cubo(_respuestas_largas(cubo, preguntas), filtro_promocion, filtro_modulo),
+        'sumas': filtrar_cubo(cubo['sumas'][numericas], filtro_promocion, filtro_modulo),
+        'conteos': filtrar_cubo(cubo['conteos'][numericas], filtro_promocion, filtro_modulo)
+    }
+
+    # Restricciones de módulo: una sola vez aunque las compartan varios KPIs
+    restringidas = {None: tablas}
+    if tiene_modulo:
+        for modulo in plan['restricciones']:
+            if modulo is not None:
+                restringidas[modulo] = {
+                    nombre: filtrar_cubo(tabla, filtro_modulo=[modulo])
+                    for nombre, tabla in tablas.items()
+                }
+
+    # Pasos: una agrupación por tabla para todas las preguntas del paso
+    resueltos = {}
+    for paso in plan['pasos']:
+        modulo = paso['modulo'] if tiene_modulo else None
+        clave = (modulo, paso['agrupacion'])
+        if paso['agrupacion'] == 'modulo' and not tiene_modulo:
+            continue
+        if clave in resueltos:
+            continue
+        resueltos[clave] = _resolver_paso(restringidas[modulo], paso, AGRUPACIONES[paso['agrupacion']][0])
+
+    evaluados = []
+    for kpi in plan['kpis']:
+        modulo = kpi['modulo'] if tiene_modulo else None
+        resultados = {}
+        for agrupacion in kpi['agrupaciones']:
+            if (modulo, agrupacion) in resueltos:
+                resultados[agrupacion] = _calcular_kpi(
+                    kpi, resueltos[(modulo, agrupacion)], AGRUPACIONES[agrupacion], restringido=modulo is not None
+                )
+        if kpi['metrica'] == 'media':
+            disponible = kpi['pregunta'] in cubo['sumas'].columns
+        else:
+            disponible = kpi['pregunta'] in cubo['respuestas']
+        evaluados.append({'kpi': kpi, 'modulo': modulo, 'disponible': disponible, 'resultados': resultados})
+    return evaluados
+
+
+def titulo_kpi(kpi, agrupacion, modulo=None):
+    """
+    Título de un KPI para una agrupación (ej: 'Recomendación de Adalab por
+    Promoción - Módulo 4')
+
+    Args:
+        kpi: KPI normalizado (de compilar_plan)
+        agrupacion: Clave de AGRUPACIONES
+        modulo: Restricción de módulo aplicada, o None
+
+    Returns:
+        str: Título sin unidades
+    """
+    return f"{kpi['titulo']} por {AGRUPACIONES[agrupacion][1]}" + (f" - {modulo}" if modulo else "")
+
+
+def _normalizar(kpi):
+    """Valida un KPI declarado y completa los valores por defecto"""
+    titulo = kpi.get('titulo', kpi.get('pregunta'))
+    if not kpi.get('pregunta'):
+        raise ValueError(f"El KPI '{titulo}' no indica la pregunta")
+    if kpi.get('metrica') not in METRICAS:
+        raise ValueError(f"El KPI '{titulo}' tiene una métrica no válida: {kpi.get('metrica')!r} "
+                         f"(admitidas: {', '.join(METRICAS)})")
+    if kpi['metrica'] == 'top_box' and not kpi.get('positivas'):
+        raise ValueError(f"El KPI '{titulo}' es de tipo top_box y no indica las respuestas positivas")
+
+    agrupaciones = list(kpi.get('agrupaciones') or ['promocion'])
+    no_validas = [agrupacion for agrupacion in agrupaciones if agrupacion not in AGRUPACIONES]
+    if no_validas:
+        raise ValueError(f"El KPI '{titulo}' tiene agrupaciones no válidas: {', '.join(no_validas)}")
+
+    # La restricción de módulo de la pregunta está en FILTROS_ESPECIALES,
+    # igual que en el resto de pestañas; el KPI solo la declara para cambiarla
+    _, modulo, descripcion = necesita_filtro_modulo(kpi['pregunta'])
+    if 'modulo' in kpi:
+        modulo, descripcion = kpi['modulo'], kpi.get('descripcion')
+    return {
+        'titulo': titulo,
+        'icono': kpi.get('icono', '📊'),
+        'pregunta': kpi['pregunta'],
+        'metrica': kpi['metrica'],
+        'modulo': modulo,
+        'descripcion': descripcion or (f"Esta pregunta se calcula solo para el {modulo}" if modulo else None),
+        'agrupaciones': agrupaciones,
+        'positivas': list(kpi.get('positivas') or [])
+    }
+
+
+def _respuestas_largas(cubo, preguntas):
+    """Une los conteos de respuestas de varias preguntas en una sola Series larga"""
+    claves = cubo['claves']
+    partes = {
+        pregunta: cubo['respuestas'][pregunta].rename_axis(claves + ['Respuesta'])
+        for pregunta in preguntas
+    }
+    if not partes:
+        indice = pd.MultiIndex.from_arrays([[]] * (len(claves) + 2), names=['Pregunta'] + claves + ['Respuesta'])
+        return pd.Series([], index=indice, dtype=float)
+    return pd.concat(partes, names=['Pregunta'])
+
+
+def _resolver_paso(tablas, paso, grupo_col):
+    """
+    Agrupa las tablas (ya filtradas y restringidas) por la columna del paso y
+    prepara lo que comparten sus KPIs: respuestas por grupo en formato largo,
+    total de respuestas de cada pregunta y grupo, y las filas de cada pregunta
+    """
+    respuestas = tablas['respuestas']
+    respuestas = respuestas[respuestas.index.get_level_values('Pregunta').isin(paso['respuestas'])]
+    respuestas = respuestas.groupby(['Pregunta', grupo_col, 'Respuesta'], sort=False).sum()
+    respuestas = respuestas[respuestas > 0].reset_index(name='Cantidad')
+    respuestas['Respondidas'] = respuestas.groupby(['Pregunta', grupo_col], sort=False)['Cantidad'].transform('sum')
+
+    medias = [pregunta for pregunta in paso['medias'] if pregunta in tablas['sumas'].columns]
+    return {
+        'grupo_col': grupo_col,
+        'tamanos': tablas['tamanos'].groupby(grupo_col).sum(),
+        'respuestas': respuestas,
+        'filas': respuestas.groupby('Pregunta', sort=False).indices,
+        'sumas': tablas['sumas'][medias].groupby(grupo_col).sum(),
+        'conteos': tablas['conteos'][medias].groupby(grupo_col).sum()
+    }
+
+
+def _calcular_kpi(kpi, paso, agrupacion, restringido):
+    """Calcula la métrica de un KPI a partir del resultado de su paso"""
+    grupo_col, nombre_grupo = agrupacion
+    pregunta = kpi['pregunta']
+
+    if kpi['metrica'] == 'media':
+        if pregunta not in paso['sumas'].columns:
+            return None
+        conteos = paso['conteos'][pregunta]
+        conteos = conteos[conteos > 0]
+        if len(conteos) == 0:
+            return None
+        return pd.DataFrame({
+            nombre_grupo: conteos.index,
+            'Media': (paso['sumas'][pregunta].reindex(conteos.index) / conteos).to_numpy(),
+            'Cantidad': conteos.to_numpy(dtype=int)
+        })
+
+    filas = paso['filas'].get(pregunta)
+    if filas is None:
+        return None
+    respuestas = paso['respuestas'].iloc[filas]
+    grupos = respuestas[grupo_col].to_numpy()
+    cantidades = respuestas['Cantidad'].to_numpy(dtype=int)
+    respondidas = respuestas['Respondidas'].to_numpy(dtype=int)
+
+    if kpi['metrica'] == 'distribucion':
+        # Sin restricción el total es el de registros del grupo (como calcular_porcentajes)
+        totales = respondidas if restringido else paso['tamanos'].reindex(grupos).to_numpy(dtype=int)
+        resultado = pd.DataFrame({
+            nombre_grupo: grupos,
+            pregunta: respuestas['Respuesta'].to_numpy(),
+            'Cantidad': cantidades,
+            'Total': totales,
+            'Porcentaje': (cantidades / totales * 100).round(2)
+        })
+        return resultado.sort_values([nombre_grupo, pregunta]).reset_index(drop=True)
+
+    # top_box y NPS: una fila por grupo, sumando las respuestas que cuentan
+    codigos, unicos = pd.factorize(grupos, sort=True)
+    total = np.bincount(codigos, weights=cantidades, minlength=len(unicos))
+
+    def _porcentaje(mascara):
+        return np.bincount(codigos[mascara], weights=cantidades[mascara], minlength=len(unicos)) / total * 100
+
+    respuesta = respuestas['Respuesta']
+    if kpi['metrica'] == 'top_box':
+        positivas = _porcentaje(respuesta.isin(kpi['positivas']).to_numpy())
+        return pd.DataFrame({
+            nombre_grupo: unicos,
+            'Cantidad': np.rint(positivas * total / 100).astype(int),
+            'Total': total.astype(int),
+            'Porcentaje': positivas.round(2)
+        })
+
+    # NPS: % de promotores (9-10) menos % de detractores (0-6)
+    nota = pd.to_numeric(respuesta.astype(object), errors='coerce').to_numpy(dtype=float)
+    promotores = _porcentaje(nota >= 9).round(2)
+    detractores = _porcentaje(nota <= 6).round(2)
+    return pd.DataFrame({
+        nombre_grupo: unicos,
+        'Promotores (%)': promotores,
+        'Detractores (%)': detractores,
+        'Total': total.astype(int),
+        'NPS': promotores - detractores
+    })
@@ -0,0 +1,243 @@
+"""
+Lectores de archivos por formato
+
+Cada formato admitido (FORMATOS_ENTRADA) tiene un lector que devuelve un
+DataFrame crudo con los mismos nombres de columna y tipos que daría
+read_excel, así que todos comparten después limpiar_datos y
+validar_columnas. Los formatos columnares (CSV, Parquet, Arrow y JSON por
+líneas) se leen con pyarrow, que reparte el trabajo entre varios hilos y
+evita pasar por objetos Python fila a fila.
+
+Todos los lectores aceptan los mismos argumentos que leer_excel_por_filas
+(al_leer_cabecera, al_progresar, cancelar); los que leen el archivo de una
+vez informan del progreso al terminar.
+"""
+import csv
+import io
+import json
+import os
+import pandas as pd
+from config.settings import FORMATOS_ENTRADA
+from utils.data_processor import leer_excel_por_filas, _nombres_unicos
+
+# Delimitadores que se prueban al detectar el formato de un CSV
+_DELIMITADORES = ',;\t|'
+
+# Bytes del principio del archivo usados para detectar el delimitador
+_MUESTRA_BYTES = 64 * 1024
+
+
+def extension(nombre):
+    """
+    Extensión de un nombre de archivo, en minúsculas y sin punto
+
+    Args:
+        nombre: Nombre o ruta del archivo
+
+    Returns:
+        str: Extensión (ej: 'csv'), o '' si no tiene
+    """
+    return os.path.splitext(str(nombre))[1].lower().lstrip('.')
+
+
+def obtener_lector(nombre):
+    """
+    Elige el lector correspondiente a la extensión de un archivo
+
+    Args:
+        nombre: Nombre o ruta del archivo
+
+    Returns:
+        function: Lector con la firma de leer_archivo (sin el nombre)
+
+    Raises:
+        ValueError: Si el formato no está admitido
+    """
+    formato = extension(nombre)
+    if formato not in LECTORES:
+        admitidos = ', '.join(f'.{f}' for f in FORMATOS_ENTRADA)
+        raise ValueError(f"Formato '.{formato}' no admitido (formatos válidos: {admitidos})")
+    return LECTORES[formato]
+
+
+def leer_archivo(fuente, nombre, al_leer_cabecera=None, al_progresar=None, cancelar=None):
+    """
+    Lee un archivo con el lector de su formato
+
+    Args:
+        fuente: Ruta o archivo binario
+        nombre: Nombre del archivo (para elegir el lector)
+        al_leer_cabecera: Función llamada con la lista de columnas al leer la cabecera
+        al_progresar: Función llamada con (filas_bloque, filas_leidas, filas_estimadas)
+        cancelar: threading.Event para interrumpir la lectura
+
+    Returns:
+        pd.DataFrame: DataFrame crudo (sin limpiar), o None si se canceló
+    """
+    lector = obtener_lector(nombre)
+    return lector(fuente, al_leer_cabecera=al_leer_cabecera, al_progresar=al_progresar, cancelar=cancelar)
+
+
+def leer_xlsx(fuente, al_leer_cabecera=None, al_progresar=None, cancelar=None):
+    """Lee un .xlsx fila a fila con progreso real (ver leer_excel_por_filas)"""
+    return leer_excel_por_filas(fuente, al_leer_cabecera, al_progresar, cancelar)
+
+
+def leer_xls(fuente, al_leer_cabecera=None, al_progresar=None, cancelar=None):
+    """Lee un .xls con read_excel (openpyxl no lee este formato)"""
+    return _terminar(pd.read_excel(fuente), al_leer_cabecera, al_progresar, cancelar)
+
+
+def leer_csv(fuente, al_leer_cabecera=None, al_progresar=None, cancelar=None):
+    """
+    Lee un CSV con el lector multihilo de pyarrow
+
+    El delimitador (',', ';', tabulador o '|') se detecta con las primeras
+    líneas del archivo. Se admite UTF-8 con o sin BOM.
+    """
+    from pyarrow import csv as pa_csv
+
+    datos = _leer_bytes(fuente)
+    if datos.startswith(b'\xef\xbb\xbf'):
+        datos = datos[3:]
+
+    tabla = pa_csv.read_csv(
+        io.BytesIO(datos),
+        read_options=pa_csv.ReadOptions(use_threads=True),
+        parse_options=pa_csv.ParseOptions(delimiter=_detectar_delimitador(datos))
+    )
+    return _terminar(_tabla_a_dataframe(tabla), al_leer_cabecera, al_progresar, cancelar)
+
+
+def leer_parquet(fuente, al_leer_cabecera=None, al_progresar=None, cancelar=None):
+    """Lee un archivo Parquet directamente a Arrow (columnas en paralelo)"""
+    from pyarrow import parquet as pa_parquet
+
+    tabla = pa_parquet.read_table(_como_archivo(fuente), use_threads=True)
+    return _terminar(_tabla_a_dataframe(tabla), al_leer_cabecera, al_progresar, cancelar)
+
+
+def leer_arrow(fuente, al_leer_cabecera=None, al_progresar=None, cancelar=None):
+    """Lee un archivo Arrow IPC / Feather"""
+    from pyarrow import feather
+
+    tabla = feather.read_table(_como_archivo(fuente), use_threads=True)
+    return _terminar(_tabla_a_dataframe(tabla), al_leer_cabecera, al_progresar, cancelar)
+
+
+def leer_json(fuente, al_leer_cabecera=None, al_progresar=None, cancelar=None):
+    """
+    Lee un export de respuestas en JSON
+
+    Se admiten tres formas habituales:
+        - Una lista de respuestas: [{"columna": valor, ...}, ...]
+        - Un objeto que contiene esa lista: {"responses": [...], ...}
+        - Una respuesta por línea (JSON Lines), leído con pyarrow
+    Los objetos anidados dentro de cada respuesta se aplanan con '.'
+    ("answers.pregunta").
+    """
+    datos = _leer_bytes(fuente)
+    if datos.startswith(b'\xef\xbb\xbf'):
+        datos = datos[3:]
+
+    try:
+        contenido = json.loads(datos)
+    except json.JSONDecodeError as error:
+        if not error.msg.startswith('Extra data'):
+            raise
+        # Varios documentos seguidos: una respuesta por línea
+        from pyarrow import json as pa_json
+        tabla = pa_json.read_json(io.BytesIO(datos), read_options=pa_json.ReadOptions(use_threads=True))
+        return _terminar(_tabla_a_dataframe(tabla.flatten()), al_leer_cabecera, al_progresar, cancelar)
+
+    registros = _registros_json(contenido)
+    if any(isinstance(valor, dict) for registro in registros[:100] for valor in registro.values()):
+        df = pd.json_normalize(registros)
+    else:
+        df = pd.DataFrame.from_records(registros)
+    df.columns = _nombres_unicos(list(df.columns))
+    return _terminar(df, al_leer_cabecera, al_progresar, cancelar)
+
+
+def _registros_json(contenido):
+    """Localiza la lista de respuestas dentro de un documento JSON"""
+    if isinstance(contenido, dict):
+        listas = [
+            valor for valor in contenido.values()
+            if isinstance(valor, list) and all(isinstance(registro, dict) for registro in valor)
+        ]
+        # Un único objeto sin listas es una sola respuesta
+        contenido = max(listas, key=len) if listas else [contenido]
+
+    if not isinstance(contenido, list) or not all(isinstance(registro, dict) for registro in contenido):
+        raise ValueError("El JSON no contiene una lista de respuestas (objetos con una clave por columna)")
+    return contenido
+
+
+def _detectar_delimitador(datos):
+    """Delimitador de un CSV según sus primeras líneas completas"""
+    muestra = datos[:_MUESTRA_BYTES].decode('utf-8', errors='ignore')
+    if len(datos) > _MUESTRA_BYTES and '\n' in muestra:
+        muestra = muestra[:muestra.rindex('\n')]
+    try:
+        return csv.Sniffer().sniff(muestra, delimiters=_DELIMITADORES).delimiter
+    except csv.Error:
+        return ','
+
+
+def _tabla_a_dataframe(tabla):
+    """
+    Convierte una tabla de Arrow en un DataFrame con las convenciones de
+    read_excel: nombres de columna únicos y columnas vacías como float
+    """
+    import pyarrow as pa
+
+    nombres = [nombre if nombre != '' else None for nombre in tabla.column_names]
+    tabla = tabla.rename_columns(_nombres_unicos(nombres))
+    for posicion, campo in enumerate(tabla.schema):
+        if pa.types.is_null(campo.type):
+            tabla = tabla.set_column(posicion, campo.name, tabla.column(posicion).cast(pa.float64()))
+    return tabla.to_pandas()
+
+
+def _terminar(df, al_leer_cabecera, al_progresar, cancelar):
+    """Avisa de la cabecera y del progreso de un archivo leído de una vez"""
+    if cancelar is not None and cancelar.is_set():
+        return None
+    if al_leer_cabecera:
+        al_leer_cabecera([str(columna) for columna in df.columns])
+    if al_progresar:
+        al_progresar([], len(df), len(df))
+    return df
+
+
+def _leer_bytes(fuente):
+    """Contenido completo de una ruta o de un archivo binario"""
+    if isinstance(fuente, (str, os.PathLike)):
+        with open(fuente, 'rb') as archivo:
+            return archivo.read()
+    fuente.seek(0)
+    return fuente.read()
+
+
+def _como_archivo(fuente):
+    """Ruta tal cual, o archivo binario rebobinado"""
+    if isinstance(fuente, (str, os.PathLike)):
+        return fuente
+    fuente.seek(0)
+    return fuente
+
+
+# Lector por extensión. Para admitir un formato nuevo basta con añadir aquí
+# su lector y la extensión a FORMATOS_ENTRADA.
+LECTORES = {
+    'xlsx': leer_xlsx,
+    'xls': leer_xls,
+    'csv': leer_csv,
+    'tsv': leer_csv,
+    'parquet': leer_parquet,
+    'feather': leer_arrow,
+    'arrow': leer_arrow,
+    'json': leer_json,
+    'jsonl': leer_json,
+}
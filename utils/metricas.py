@@ -0,0 +1,288 @@
+"""
+Métricas de operación en formato de texto de Prometheus
+
+Contadores e histogramas de latencia en memoria, compartidos por todas las
+sesiones del proceso. Registrar un valor es una suma bajo un candado (sin
+dependencias ni hilos extra), así que se puede medir cada rerun, cada etapa
+de la ingesta y cada pestaña sin coste apreciable. Los valores que ya lleva
+otro módulo (caché de datasets, sesiones, memoria) se leen al exportar con
+recolectores registrados por ese módulo.
+
+Las métricas se exportan con exportar_prometheus(); iniciar_exportacion()
+las sirve en METRICAS_PUERTO (/metrics) y/o las escribe en METRICAS_ARCHIVO.
+Ejemplo de alerta con el p95 de los reruns:
+    histogram_quantile(0.95, rate(dashboard_rerun_segundos_bucket[5m])) > 2
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from config.settings import (
+    METRICAS_HOST,
+    METRICAS_PUERTO,
+    METRICAS_ARCHIVO,
+    METRICAS_INTERVALO_ARCHIVO,
+    METRICAS_CUBETAS
+)
+
+# Métricas conocidas: nombre -> (tipo, ayuda)
+METRICAS = {
+    'dashboard_reruns_total': ('counter', "Ejecuciones completas del script de la app"),
+    'dashboard_rerun_segundos': ('histogram', "Duración de los reruns que dibujan el dashboard (completo o provisional) o la portada"),
+    'dashboard_seccion_segundos': ('histogram', "Duración de cada pestaña o sección (también al relanzarse sola)"),
+    'dashboard_etapa_segundos': ('histogram', "Duración de cada etapa de la carga de datos"),
+    'dashboard_ingestas_total': ('counter', "Cargas de archivos terminadas, por estado"),
+    'dashboard_cache_consultas_total': ('counter', "Consultas a cada caché, por resultado (acierto o fallo)"),
+    'dashboard_cache_expulsiones_total': ('counter', "Entradas expulsadas de cada caché"),
+    'dashboard_cache_entradas': ('gauge', "Entradas en cada caché"),
+    'dashboard_cache_memoria_bytes': ('gauge', "Memoria estimada de cada caché"),
+    'dashboard_sesiones': ('gauge', "Sesiones registradas, por estado de sus datos (memoria, volcada, sin_datos)"),
+    'dashboard_sesiones_memoria_bytes': ('gauge', "Memoria estimada de los datasets de las sesiones en memoria (los compartidos cuentan una vez)"),
+    'dashboard_proceso_memoria_bytes': ('gauge', "Memoria residente del proceso"),
+    'api_peticiones_total': ('counter', "Peticiones a la API, por ruta y código de respuesta"),
+    'api_peticion_segundos': ('histogram', "Duración de las peticiones a la API"),
+}
+
+# nombre -> {etiquetas (tupla ordenada): valor}; en los histogramas el valor
+# es [conteos por cubeta..., conteo +Inf, suma]
+_VALORES = {}
+_RECOLECTORES = []
+_BLOQUEO = threading.Lock()
+_EXPORTADORES = []
+
+
+def contar(nombre, valor=1, **etiquetas):
+    """
+    Suma un valor a un contador
+
+    Args:
+        nombre: Nombre de la métrica (ver METRICAS)
+        valor: Cantidad a sumar
+        **etiquetas: Etiquetas de la serie
+    """
+    clave = tuple(sorted(etiquetas.items()))
+    with _BLOQUEO:
+        serie = _VALORES.setdefault(nombre, {})
+        serie[clave] = serie.get(clave, 0) + valor
+
+
+def observar(nombre, segundos, **etiquetas):
+    """
+    Registra una duración en un histograma
+
+    Args:
+        nombre: Nombre de la métrica (ver METRICAS)
+        segundos: Duración observada
+        **etiquetas: Etiquetas de la serie
+    """
+    clave = tuple(sorted(etiquetas.items()))
+    cubeta = bisect.bisect_left(METRICAS_CUBETAS, segundos)
+    with _BLOQUEO:
+        serie = _VALORES.setdefault(nombre, {})
+        valores = serie.get(clave)
+        if valores is None:
+            valores = serie[clave] = [0] * (len(METRICAS_CUBETAS) + 2)
+        valores[cubeta] += 1
+        valores[-1] += segundos
+
+
+@contextmanager
+def medir(nombre, **etiquetas):
+    """
+    Mide la duración de un bloque y la registra en un histograma (también
+    si el bloque termina con una excepción, como st.stop o st.rerun)
+
+    Args:
+        nombre: Nombre de la métrica (ver METRICAS)
+        **etiquetas: Etiquetas de la serie
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+
+def cronometrado(nombre, **etiquetas):
+    """
+    Decorador que mide cada llamada a la función con medir()
+
+    Args:
+        nombre: Nombre de la métrica (ver METRICAS)
+        **etiquetas: Etiquetas de la serie
+
+    Returns:
+        function: Decorador
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with medir(nombre, **etiquetas):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def registrar_recolector(recolector):
+    """
+    Registra una función que se llama al exportar y devuelve valores ya
+    calculados por otro módulo
+
+    Args:
+        recolector: Función sin argumentos que devuelve una lista de
+                    (nombre, etiquetas, valor)
+    """
+    with _BLOQUEO:
+        if recolector not in _RECOLECTORES:
+            _RECOLECTORES.append(recolector)
+
+
+def exportar_prometheus():
+    """
+    Métricas actuales en el formato de texto de Prometheus (0.0.4)
+
+    Returns:
+        str: Texto de la exposición
+    """
+    with _BLOQUEO:
+        valores = {nombre: {clave: list(v) if isinstance(v, list) else v for clave, v in serie.items()}
+                   for nombre, serie in _VALORES.items()}
+        recolectores = list(_RECOLECTORES)
+
+    for recolector in [_memoria_proceso] + recolectores:
+        try:
+            muestras = recolector()
+        except Exception as e:
+            print(f"[metricas] Error en el recolector {recolector.__name__}: {str(e)}")
+            continue
+        for nombre, etiquetas, valor in muestras:
+            serie = valores.setdefault(nombre, {})
+            clave = tuple(sorted(etiquetas.items()))
+            serie[clave] = serie.get(clave, 0) + valor
+
+    lineas = []
+    for nombre in sorted(valores):
+        tipo, ayuda = METRICAS.get(nombre, ('untyped', ''))
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for clave, valor in sorted(valores[nombre].items()):
+            if tipo != 'histogram':
+                lineas.append(f"{nombre}{_etiquetas(clave)} {_numero(valor)}")
+                continue
+            acumulado = 0
+            for limite, conteo in zip(METRICAS_CUBETAS + ('+Inf',), valor[:-1]):
+                acumulado += conteo
+                lineas.append(f"{nombre}_bucket{_etiquetas(clave + (('le', str(limite)),))} {acumulado}")
+            lineas.append(f"{nombre}_sum{_etiquetas(clave)} {_numero(valor[-1])}")
+            lineas.append(f"{nombre}_count{_etiquetas(clave)} {acumulado}")
+    return '\n'.join(lineas) + '\n'
+
+
+def iniciar_exportacion(puerto=METRICAS_PUERTO, archivo=METRICAS_ARCHIVO, host=METRICAS_HOST):
+    """
+    Arranca (una vez por proceso) el servidor de /metrics y/o el hilo que
+    escribe el archivo de métricas. Sin puerto ni archivo no hace nada
+
+    Args:
+        puerto: Puerto del servidor HTTP, o None
+        archivo: Ruta del archivo de métricas, o None
+        host: Interfaz en la que escucha el servidor
+    """
+    with _BLOQUEO:
+        if _EXPORTADORES or (puerto is None and archivo is None):
+            return
+
+        if puerto is not None:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            class _Manejador(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0].rstrip('/') != '/metrics':
+                        self.send_error(404)
+                        return
+                    enviar_metricas(self)
+
+                def log_message(self, *args):
+                    pass
+
+            try:
+                servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+            except OSError as e:
+                # Otro proceso (u otra instancia) ya usa el puerto
+                print(f"[metricas] No se pudo abrir el puerto {puerto}: {str(e)}")
+            else:
+                servidor.daemon_threads = True
+                _EXPORTADORES.append(threading.Thread(
+                    target=servidor.serve_forever, name='metricas-http', daemon=True
+                ))
+
+        if archivo is not None:
+            def _bucle():
+                while True:
+                    try:
+                        escribir_archivo(archivo)
+                    except OSError as e:
+                        print(f"[metricas] No se pudo escribir '{archivo}': {str(e)}")
+                    time.sleep(METRICAS_INTERVALO_ARCHIVO)
+
+            _EXPORTADORES.append(threading.Thread(target=_bucle, name='metricas-archivo', daemon=True))
+
+        for hilo in _EXPORTADORES:
+            hilo.start()
+
+
+def enviar_metricas(manejador):
+    """
+    Responde a una petición HTTP con las métricas actuales
+
+    Args:
+        manejador: BaseHTTPRequestHandler que atiende la petición
+    """
+    cuerpo = exportar_prometheus().encode('utf-8')
+    manejador.send_response(200)
+    manejador.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+    manejador.send_header('Content-Length', str(len(cuerpo)))
+    manejador.end_headers()
+    manejador.wfile.write(cuerpo)
+
+
+def escribir_archivo(archivo):
+    """
+    Escribe las métricas en un archivo de forma atómica (los lectores nunca
+    ven un archivo a medio escribir)
+
+    Args:
+        archivo: Ruta del archivo (.prom)
+    """
+    temporal = f"{archivo}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as salida:
+        salida.write(exportar_prometheus())
+    os.replace(temporal, archivo)
+
+
+def _memoria_proceso():
+    """Memoria residente del proceso (o la máxima, si no hay /proc)"""
+    try:
+        with open('/proc/self/statm') as statm:
+            residente = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        residente = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return [('dashboard_proceso_memoria_bytes', {}, residente)]
+
+
+def _etiquetas(clave):
+    if not clave:
+        return ''
+    pares = (f'{nombre}="{_escapar(valor)}"' for nombre, valor in clave)
+    return '{' + ','.join(pares) + '}'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
@@ -0,0 +1,44 @@
+"""
+Muestra estratificada de un DataFrame
+
+Cada grupo (estrato) aporta filas en proporción a su tamaño, con un mínimo
+por grupo para que los grupos pequeños no queden sin representar. La
+selección se hace con operaciones de NumPy sobre todas las filas a la vez,
+sin bucles por grupo.
+"""
+import numpy as np
+from config.settings import PROGRESIVO_MIN_POR_GRUPO, PROGRESIVO_SEMILLA
+
+
+def muestra_estratificada(df, claves, tamano, minimo=PROGRESIVO_MIN_POR_GRUPO, semilla=PROGRESIVO_SEMILLA):
+    """
+    Toma una muestra estratificada por las columnas de grupo
+
+    Args:
+        df: DataFrame completo
+        claves: Columnas que definen los estratos
+        tamano: Filas aproximadas de la muestra (el mínimo por grupo puede
+                añadir algunas más)
+        minimo: Filas mínimas de cada grupo (o todas, si tiene menos)
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        pd.DataFrame: Filas elegidas, en su orden original y con el índice
+                      reiniciado (el propio df si no hay que muestrear)
+    """
+    if len(df) <= tamano:
+        return df
+
+    codigos = df.groupby(claves, dropna=False, sort=False).ngroup().to_numpy()
+    tamanos = np.bincount(codigos)
+    cuotas = np.ceil(tamanos * (tamano / len(df))).astype(np.int64)
+    cuotas = np.minimum(np.maximum(cuotas, minimo), tamanos)
+
+    # Orden aleatorio dentro de cada grupo: se quedan las primeras `cuota` filas
+    aleatorio = np.random.default_rng(semilla).random(len(df))
+    orden = np.lexsort((aleatorio, codigos))
+    inicios = np.cumsum(tamanos) - tamanos
+    rango = np.arange(len(df)) - np.repeat(inicios, tamanos)
+    elegidas = np.sort(orden[rango < cuotas[codigos[orden]]])
+
+    return df.take(elegidas).reset_index(drop=True)
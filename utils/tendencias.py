@@ -0,0 +1,162 @@
+"""
+Funciones para el análisis de tendencias sobre particiones temporales
+"""
+import pandas as pd
+from config.settings import COLUMNAS
+
+
+def seleccionar_particiones(particiones, fecha_inicio=None, fecha_fin=None):
+    """
+    Selecciona solo las particiones que se solapan con el rango de fechas
+
+    Args:
+        particiones: dict {pd.Period: posiciones} creado al cargar los datos
+        fecha_inicio: Fecha inicial del rango (incluida) o None
+        fecha_fin: Fecha final del rango (incluida) o None
+
+    Returns:
+        list: Lista de (periodo, recortar) donde recortar indica si la
+              partición queda parcialmente fuera del rango
+    """
+    inicio = pd.Timestamp(fecha_inicio) if fecha_inicio is not None else None
+    fin = pd.Timestamp(fecha_fin) + pd.Timedelta(days=1) if fecha_fin is not None else None
+
+    seleccion = []
+    for periodo in particiones:
+        inicio_periodo = periodo.start_time
+        fin_periodo = periodo.end_time
+
+        if inicio is not None and fin_periodo < inicio:
+            continue
+        if fin is not None and inicio_periodo >= fin:
+            continue
+
+        recortar = (
+            (inicio is not None and inicio_periodo < inicio) or
+            (fin is not None and fin_periodo >= fin)
+        )
+        seleccion.append((periodo, recortar))
+
+    return seleccion
+
+
+def calcular_agregados_particiones(df, particiones, seleccion, columna, claves,
+                                   es_numerica=False, filtro_modulo=None,
+                                   fecha_inicio=None, fecha_fin=None):
+    """
+    Calcula agregados por partición y por grupo, recorriendo solo las
+    particiones seleccionadas
+
+    Args:
+        df: DataFrame completo
+        particiones: dict {pd.Period: posiciones}
+        seleccion: Resultado de seleccionar_particiones
+        columna: Columna a analizar
+        claves: Columnas de agrupación (promoción y, si existe, módulo)
+        es_numerica: True para sumas/conteos, False para conteo de respuestas
+        filtro_modulo: Valor del módulo para filtrar (ej: 'Módulo 4')
+        fecha_inicio: Fecha inicial para recortar las particiones del borde
+        fecha_fin: Fecha final para recortar las particiones del borde
+
+    Returns:
+        pd.DataFrame: Agregados con índice (Periodo, *claves[, columna]) y
+                      columnas ['Suma', 'Cantidad'] o ['Cantidad']
+    """
+    columna_fecha = COLUMNAS['fecha']
+    columna_modulo = COLUMNAS['modulo']
+    columnas_usadas = list(dict.fromkeys(claves + [columna, columna_fecha]))
+
+    agregados = {}
+    for periodo, recortar in seleccion:
+        filas = df.iloc[particiones[periodo]][columnas_usadas]
+
+        if recortar:
+            if fecha_inicio is not None:
+                filas = filas[filas[columna_fecha] >= pd.Timestamp(fecha_inicio)]
+            if fecha_fin is not None:
+                filas = filas[filas[columna_fecha] < pd.Timestamp(fecha_fin) + pd.Timedelta(days=1)]
+
+        if filtro_modulo and columna_modulo in filas.columns:
+            filas = filas[filas[columna_modulo] == filtro_modulo]
+
+        filas = filas.dropna(subset=[columna])
+        if len(filas) == 0:
+            continue
+
+        if es_numerica:
+            agregados[periodo] = filas.groupby(claves)[columna].agg(Suma='sum', Cantidad='count')
+        else:
+            agregados[periodo] = filas.groupby(claves + [columna]).size().to_frame('Cantidad')
+
+    if not agregados:
+        return None
+
+    return pd.concat(agregados, names=['Periodo'])
+
+
+def calcular_tendencia(agregados, grupo_col, nombre_grupo, ventana=1, es_numerica=False,
+                       respuesta=None, columna=None, filtro_promocion=None, filtro_modulo=None):
+    """
+    Combina los agregados por partición en una serie temporal móvil por grupo
+
+    Args:
+        agregados: Resultado de calcular_agregados_particiones
+        grupo_col: Columna por la que agrupar (promoción o módulo)
+        nombre_grupo: Nombre para la columna de grupo en el resultado
+        ventana: Número de periodos de la ventana móvil
+        es_numerica: True para medias, False para porcentajes
+        respuesta: Respuesta cuyo porcentaje se calcula (si no es numérica)
+        columna: Columna analizada (nivel de respuestas en los agregados)
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+
+    Returns:
+        pd.DataFrame: Columnas ['Periodo', nombre_grupo, 'Valor', 'Cantidad']
+    """
+    if agregados is None or len(agregados) == 0:
+        return None
+
+    columna_promocion = COLUMNAS['promocion']
+    columna_modulo = COLUMNAS['modulo']
+    niveles = agregados.index.names
+
+    # Aplicar los filtros del sidebar sobre los agregados (no sobre las filas)
+    mascara = pd.Series(True, index=agregados.index)
+    if filtro_promocion and columna_promocion in niveles:
+        mascara &= agregados.index.get_level_values(columna_promocion).isin(filtro_promocion)
+    if filtro_modulo and columna_modulo in niveles:
+        mascara &= agregados.index.get_level_values(columna_modulo).isin(filtro_modulo)
+    agregados = agregados[mascara.values]
+
+    if len(agregados) == 0:
+        return None
+
+    # Todos los periodos del rango, aunque no tengan respuestas
+    periodos = agregados.index.get_level_values('Periodo')
+    rango = pd.period_range(periodos.min(), periodos.max(), freq=periodos.freq)
+
+    def _serie_movil(valores):
+        tabla = valores.groupby(['Periodo', grupo_col]).sum().unstack(grupo_col)
+        tabla = tabla.reindex(rango, fill_value=0).fillna(0)
+        return tabla.rolling(ventana, min_periods=1).sum()
+
+    if es_numerica:
+        sumas = _serie_movil(agregados['Suma'])
+        cantidades = _serie_movil(agregados['Cantidad'])
+        valores = sumas / cantidades.where(cantidades > 0)
+    else:
+        cantidades = _serie_movil(agregados['Cantidad'])
+        es_respuesta = agregados.index.get_level_values(columna) == respuesta
+        favorables = _serie_movil(agregados['Cantidad'].where(es_respuesta, 0))
+        favorables = favorables.reindex(columns=cantidades.columns, fill_value=0)
+        valores = (favorables / cantidades.where(cantidades > 0) * 100).round(2)
+
+    resultado = pd.DataFrame({
+        'Valor': valores.stack(),
+        'Cantidad': cantidades.stack()
+    }).reset_index()
+    resultado.columns = ['Periodo', nombre_grupo, 'Valor', 'Cantidad']
+    resultado = resultado.dropna(subset=['Valor'])
+    resultado['Periodo'] = resultado['Periodo'].dt.start_time
+
+    return resultado
@@ -0,0 +1,105 @@
+"""
+Vista filtrada del dataset con proyección de columnas
+
+Filtrar el DataFrame completo en cada rerun copia todas sus columnas
+(100+ en las encuestas anchas) aunque cada pestaña solo use unas pocas
+para el estado actual de sus widgets. La vista guarda solo las posiciones
+de las filas filtradas y cada pestaña pide las columnas que necesita:
+cada columna se copia como mucho una vez por rerun y, sin filtros, las
+columnas se devuelven sin copiar. La proyección ahorra copias en memoria,
+no lecturas: un dataset volcado a disco (utils.volcado) se recarga completo
+al volver a usar la sesión.
+"""
+import numpy as np
+import pandas as pd
+from config.settings import COLUMNAS
+
+
+class VistaFiltrada:
+    """
+    Filas filtradas de un DataFrame cuyas columnas se materializan al pedirlas
+
+    Guarda el DataFrame completo (base, que no se modifica) y las posiciones
+    de las filas filtradas (None si son todas). Las columnas ya copiadas se
+    guardan para las siguientes pestañas del mismo rerun.
+    """
+
+    def __init__(self, base, posiciones=None):
+        self.base = base
+        self.posiciones = posiciones
+        self._columnas = {}
+
+    def __len__(self):
+        return len(self.base) if self.posiciones is None else len(self.posiciones)
+
+    @property
+    def columns(self):
+        """Columnas disponibles (sin materializar ninguna)"""
+        return self.base.columns
+
+    @property
+    def index(self):
+        """Índice de las filas filtradas (posiciones del dataset)"""
+        return self.base.index if self.posiciones is None else self.base.index[self.posiciones]
+
+    def columnas(self, columnas):
+        """
+        DataFrame con las filas filtradas y solo las columnas pedidas
+
+        Args:
+            columnas: Columnas necesarias (se ignoran las que no existen y
+                      los duplicados)
+
+        Returns:
+            pd.DataFrame: Filas filtradas de esas columnas, en ese orden
+        """
+        columnas = [col for col in dict.fromkeys(columnas) if col in self.base.columns]
+        if self.posiciones is None:
+            return self.base[columnas]
+
+        # Solo se copian las columnas que ninguna pestaña ha pedido todavía
+        faltan = [col for col in columnas if col not in self._columnas]
+        if faltan:
+            tomadas = self.base[faltan].take(self.posiciones)
+            self._columnas.update((col, tomadas[col]) for col in faltan)
+
+        if not columnas:
+            return pd.DataFrame(index=self.index)
+        # concat reutiliza las columnas ya copiadas
+        return pd.concat([self._columnas[col] for col in columnas], axis=1)
+
+    def completo(self):
+        """
+        DataFrame con las filas filtradas y todas las columnas
+
+        Returns:
+            pd.DataFrame: Equivalente a aplicar_filtros sobre el DataFrame base
+        """
+        return self.columnas(self.base.columns)
+
+
+def crear_vista(df, filtro_promocion, filtro_modulo=None, tiene_modulo=False):
+    """
+    Crea la vista filtrada por promoción y módulo de un DataFrame. Solo se
+    leen las columnas de los filtros; el resto se copia cuando una pestaña
+    lo pide
+
+    Args:
+        df: DataFrame original
+        filtro_promocion: Lista de promociones seleccionadas
+        filtro_modulo: Lista de módulos seleccionados
+        tiene_modulo: Si existe la columna de módulo
+
+    Returns:
+        VistaFiltrada: Vista con las filas que cumplen los filtros
+    """
+    mascara = None
+    if filtro_promocion:
+        mascara = df[COLUMNAS['promocion']].isin(filtro_promocion).to_numpy()
+    if tiene_modulo and filtro_modulo:
+        en_modulos = df[COLUMNAS['modulo']].isin(filtro_modulo).to_numpy()
+        mascara = en_modulos if mascara is None else mascara & en_modulos
+
+    if mascara is None or mascara.all():
+        return VistaFiltrada(df)
+    return VistaFiltrada(df, np.flatnonzero(mascara))
@@ -0,0 +1,368 @@
+"""
+Volcado a disco de los datasets de sesiones inactivas
+
+Cada sesión guarda su dataset en un contenedor registrado aquí. Un hilo de
+fondo vuelca a disco (Arrow IPC sin comprimir) los datasets de las sesiones
+que llevan más de SPILL_SEGUNDOS_INACTIVIDAD sin interacción y libera la
+memoria; la siguiente interacción los recarga mapeando el archivo en memoria.
+Los agregados derivados también salen de memoria: el cubo se escribe en
+Arrow junto al DataFrame, las particiones y el índice de comentarios como
+arrays de NumPy, y los tokens se vuelven a calcular a partir del DataFrame
+al recargar (sin recorrer las filas para rehacer agregados).
+"""
+import os
+import shutil
+import threading
+import time
+from config.settings import (
+    SPILL_DIRECTORIO,
+    SPILL_SEGUNDOS_INACTIVIDAD,
+    SPILL_SEGUNDOS_BORRADO,
+    SPILL_INTERVALO_REVISION
+)
+from utils.cache_datasets import obtener_dataset, estimar_memoria, memoria_cacheada
+from utils.metricas import observar, registrar_recolector
+
+# id de sesión -> contenedor {'dataset', 'volcado', 'ultimo_uso', 'tiempos', 'bloqueo'}
+_SESIONES = {}
+_BLOQUEO = threading.Lock()
+_VIGILANTE = None
+
+
+def registrar_sesion(id_sesion):
+    """
+    Devuelve el contenedor de la sesión, creándolo si no existe, y marca
+    la sesión como activa
+
+    Args:
+        id_sesion: Identificador de la sesión de Streamlit
+
+    Returns:
+        dict: Contenedor de la sesión
+    """
+    _iniciar_vigilante()
+
+    with _BLOQUEO:
+        contenedor = _SESIONES.get(id_sesion)
+        if contenedor is None:
+            contenedor = {
+                'id': id_sesion,
+                'dataset': None,
+                'volcado': None,
+                'ultimo_uso': time.monotonic(),
+                'tiempos': {},
+                'bloqueo': threading.Lock()
+            }
+            _SESIONES[id_sesion] = contenedor
+
+    contenedor['ultimo_uso'] = time.monotonic()
+    return contenedor
+
+
+def obtener_dataset_sesion(contenedor):
+    """
+    Devuelve el dataset de la sesión, recargándolo de disco si se volcó
+
+    Args:
+        contenedor: Contenedor devuelto por registrar_sesion
+
+    Returns:
+        dict: Dataset o None si la sesión no tiene datos
+    """
+    with contenedor['bloqueo']:
+        contenedor['ultimo_uso'] = time.monotonic()
+
+        if contenedor['dataset'] is None and contenedor['volcado'] is not None:
+            inicio = time.perf_counter()
+            # Si el dataset sigue en la caché compartida no hace falta leer el disco
+            dataset = obtener_dataset(contenedor['volcado']['resto'].get('origen'))
+            contenedor['dataset'] = dataset if dataset is not None else _recargar(contenedor['volcado'])
+            contenedor['tiempos']['recarga_s'] = time.perf_counter() - inicio
+            observar('dashboard_etapa_segundos', contenedor['tiempos']['recarga_s'], etapa='recarga')
+            _borrar_volcado(contenedor['volcado'])
+            contenedor['volcado'] = None
+
+        return contenedor['dataset']
+
+
+def guardar_dataset_sesion(contenedor, dataset):
+    """
+    Asigna el dataset de la sesión
+
+    Args:
+        contenedor: Contenedor devuelto por registrar_sesion
+        dataset: Dataset creado con utils.dataset.crear_dataset
+    """
+    with contenedor['bloqueo']:
+        if contenedor['volcado'] is not None:
+            _borrar_volcado(contenedor['volcado'])
+            contenedor['volcado'] = None
+        contenedor['dataset'] = dataset
+        contenedor['ultimo_uso'] = time.monotonic()
+
+
+def volcar_sesion(contenedor):
+    """
+    Vuelca a disco el dataset de la sesión y libera la referencia en memoria
+
+    Args:
+        contenedor: Contenedor devuelto por registrar_sesion
+
+    Returns:
+        bool: True si se volcó algo
+    """
+    with contenedor['bloqueo']:
+        dataset = contenedor['dataset']
+        if dataset is None:
+            return False
+
+        inicio = time.perf_counter()
+        directorio = os.path.join(SPILL_DIRECTORIO, f"{contenedor['id']}-{time.time_ns()}")
+        contenedor['volcado'] = _volcar(dataset, directorio)
+        contenedor['dataset'] = None
+        contenedor['tiempos'] = {'volcado_s': time.perf_counter() - inicio}
+        observar('dashboard_etapa_segundos', contenedor['tiempos']['volcado_s'], etapa='volcado')
+        return True
+
+
+def revisar_sesiones(ahora=None):
+    """
+    Vuelca las sesiones inactivas y olvida las abandonadas
+
+    Args:
+        ahora: Instante de referencia (time.monotonic), para pruebas
+
+    Returns:
+        int: Número de sesiones volcadas
+    """
+    ahora = ahora if ahora is not None else time.monotonic()
+
+    with _BLOQUEO:
+        contenedores = list(_SESIONES.values())
+
+    volcadas = 0
+    for contenedor in contenedores:
+        inactividad = ahora - contenedor['ultimo_uso']
+
+        if inactividad > SPILL_SEGUNDOS_BORRADO:
+            with contenedor['bloqueo']:
+                if contenedor['volcado'] is not None:
+                    _borrar_volcado(contenedor['volcado'])
+                contenedor['volcado'] = None
+                contenedor['dataset'] = None
+            with _BLOQUEO:
+                _SESIONES.pop(contenedor['id'], None)
+        elif inactividad > SPILL_SEGUNDOS_INACTIVIDAD and contenedor['dataset'] is not None:
+            try:
+                volcadas += volcar_sesion(contenedor)
+            except Exception as e:
+                print(f"Error al volcar la sesión {contenedor['id']}: {str(e)}")
+
+    return volcadas
+
+
+def _volcar(dataset, directorio):
+    """Escribe los DataFrames, particiones, cubo e índice de comentarios del dataset; devuelve el resto en memoria"""
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    os.makedirs(directorio, exist_ok=True)
+    volcado = {'directorio': directorio, 'tablas': [], 'resto': {}}
+
+    for clave, valor in dataset.items():
+        if isinstance(valor, pd.DataFrame):
+            # Arrow IPC sin comprimir para poder mapearlo en memoria al recargar
+            tabla = pa.Table.from_pandas(valor, preserve_index=False)
+            feather.write_feather(tabla, os.path.join(directorio, f"{clave}.arrow"), compression='uncompressed')
+            volcado['tablas'].append(clave)
+        elif clave == 'particiones':
+            periodos = list(valor)
+            posiciones = list(valor.values())
+            np.save(os.path.join(directorio, 'particiones.npy'),
+                    np.concatenate(posiciones) if posiciones else np.empty(0, dtype=np.intp))
+            volcado['resto']['_periodos'] = periodos
+            volcado['resto']['_longitudes'] = [len(p) for p in posiciones]
+        elif clave == 'comentarios':
+            volcado['resto']['_comentarios'] = _volcar_comentarios(valor, directorio)
+        elif clave == 'cubo':
+            volcado['resto']['_cubo'] = _volcar_cubo(valor, directorio)
+        elif clave == 'tokens':
+            # Se reconstruyen a partir de la columna Token del DataFrame
+            continue
+        else:
+            volcado['resto'][clave] = valor
+
+    return volcado
+
+
+def _recargar(volcado):
+    """Reconstruye el dataset a partir del volcado"""
+    import numpy as np
+    import pyarrow as pa
+    from config.settings import COLUMNAS
+
+    directorio = volcado['directorio']
+    dataset = {
+        clave: valor for clave, valor in volcado['resto'].items()
+        if clave not in ('_periodos', '_longitudes', '_comentarios', '_cubo')
+    }
+
+    for clave in volcado['tablas']:
+        # Las columnas sin nulos se leen directamente del archivo mapeado
+        origen = pa.memory_map(os.path.join(directorio, f"{clave}.arrow"))
+        tabla = pa.ipc.open_file(origen).read_all()
+        dataset[clave] = tabla.to_pandas(split_blocks=True)
+
+    if '_periodos' in volcado['resto']:
+        posiciones = np.load(os.path.join(directorio, 'particiones.npy'), mmap_mode='r')
+        cortes = np.cumsum([0] + volcado['resto']['_longitudes'])
+        dataset['particiones'] = {
+            periodo: np.asarray(posiciones[inicio:fin])
+            for periodo, inicio, fin in zip(volcado['resto']['_periodos'], cortes[:-1], cortes[1:])
+        }
+
+    if '_comentarios' in volcado['resto']:
+        dataset['comentarios'] = _recargar_comentarios(volcado['resto']['_comentarios'], directorio)
+
+    if '_cubo' in volcado['resto']:
+        dataset['cubo'] = _recargar_cubo(volcado['resto']['_cubo'], directorio)
+
+    columna_token = COLUMNAS['token']
+    df = dataset.get('df')
+    dataset['tokens'] = (
+        set(df[columna_token].dropna()) if df is not None and columna_token in df.columns else set()
+    )
+
+    return dataset
+
+
+def _volcar_cubo(cubo, directorio):
+    """Escribe las tablas del cubo (con sus claves como columnas); devuelve lo necesario para leerlas"""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    tablas = {'tamanos': cubo['tamanos'], 'sumas': cubo['sumas'], 'conteos': cubo['conteos']}
+    tablas.update({f"respuestas-{numero}": conteo for numero, conteo in enumerate(cubo['respuestas'].values())})
+    for nombre, tabla in tablas.items():
+        # Las series (tamaños y respuestas) se guardan en la columna '_valor'
+        marco = tabla.to_frame('_valor') if tabla.ndim == 1 else tabla
+        feather.write_feather(pa.Table.from_pandas(marco.reset_index(), preserve_index=False),
+                              os.path.join(directorio, f"cubo-{nombre}.arrow"), compression='uncompressed')
+    return {'claves': cubo['claves'], 'preguntas': list(cubo['respuestas'])}
+
+
+def _recargar_cubo(guardado, directorio):
+    """Reconstruye el cubo escrito por _volcar_cubo"""
+    import pyarrow.feather as feather
+
+    def _leer(nombre, niveles):
+        tabla = feather.read_feather(os.path.join(directorio, f"cubo-{nombre}.arrow")).set_index(niveles)
+        return tabla['_valor'].rename(None) if '_valor' in tabla.columns else tabla
+
+    claves = guardado['claves']
+    return {
+        'claves': claves,
+        'tamanos': _leer('tamanos', claves),
+        'sumas': _leer('sumas', claves),
+        'conteos': _leer('conteos', claves),
+        'respuestas': {
+            pregunta: _leer(f"respuestas-{numero}", claves + [pregunta])
+            for numero, pregunta in enumerate(guardado['preguntas'])
+        }
+    }
+
+
+def _volcar_comentarios(indices, directorio):
+    """Escribe las máscaras, matrices CSR y vocabularios de cada índice; devuelve las columnas"""
+    import numpy as np
+
+    for numero, indice in enumerate(indices.values()):
+        np.save(os.path.join(directorio, f"comentarios-{numero}-con_texto.npy"), indice['con_texto'])
+        for tipo in ('palabras', 'bigramas'):
+            matriz = indice[tipo]['matriz']
+            for parte in ('data', 'indices', 'indptr'):
+                np.save(os.path.join(directorio, f"comentarios-{numero}-{tipo}-{parte}.npy"), getattr(matriz, parte))
+            np.save(os.path.join(directorio, f"comentarios-{numero}-{tipo}-forma.npy"), np.array(matriz.shape))
+            # Como texto de ancho fijo: sin pickle de objetos
+            np.save(os.path.join(directorio, f"comentarios-{numero}-{tipo}-terminos.npy"),
+                    np.asarray(indice[tipo]['terminos'], dtype=str))
+    return list(indices)
+
+
+def _recargar_comentarios(columnas, directorio):
+    """Reconstruye los índices de comentarios escritos por _volcar_comentarios"""
+    import numpy as np
+    from scipy import sparse
+
+    def _leer(nombre):
+        return np.load(os.path.join(directorio, f"{nombre}.npy"))
+
+    indices = {}
+    for numero, columna in enumerate(columnas):
+        indice = {'con_texto': _leer(f"comentarios-{numero}-con_texto")}
+        for tipo in ('palabras', 'bigramas'):
+            prefijo = f"comentarios-{numero}-{tipo}"
+            indice[tipo] = {
+                'matriz': sparse.csr_matrix(
+                    (_leer(f"{prefijo}-data"), _leer(f"{prefijo}-indices"), _leer(f"{prefijo}-indptr")),
+                    shape=tuple(_leer(f"{prefijo}-forma"))
+                ),
+                'terminos': _leer(f"{prefijo}-terminos").astype(object)
+            }
+        indices[columna] = indice
+    return indices
+
+
+def _borrar_volcado(volcado):
+    shutil.rmtree(volcado['directorio'], ignore_errors=True)
+
+
+def _iniciar_vigilante():
+    """Arranca (una vez por proceso) el hilo que revisa las sesiones"""
+    global _VIGILANTE
+
+    with _BLOQUEO:
+        if _VIGILANTE is not None and _VIGILANTE.is_alive():
+            return
+
+        def _bucle():
+            while True:
+                time.sleep(SPILL_INTERVALO_REVISION)
+                revisar_sesiones()
+
+        _VIGILANTE = threading.Thread(target=_bucle, name='volcado-sesiones', daemon=True)
+        _VIGILANTE.start()
+
+
+def _metricas():
+    """
+    Sesiones por estado y memoria total de sus datasets para utils.metricas.
+    Sin etiquetas por sesión: cada id de sesión crearía una serie nueva
+    """
+    with _BLOQUEO:
+        contenedores = list(_SESIONES.values())
+
+    estados = {'memoria': 0, 'volcada': 0, 'sin_datos': 0}
+    tamanos = {}
+    for contenedor in contenedores:
+        dataset = contenedor['dataset']
+        if dataset is not None:
+            estados['memoria'] += 1
+            # Un dataset compartido por varias sesiones se cuenta una vez; los
+            # de la caché ya tienen su tamaño calculado
+            if id(dataset) not in tamanos:
+                tamano = memoria_cacheada(dataset.get('origen'))
+                tamanos[id(dataset)] = tamano if tamano is not None else estimar_memoria(dataset)
+        elif contenedor['volcado'] is not None:
+            estados['volcada'] += 1
+        else:
+            estados['sin_datos'] += 1
+
+    return [('dashboard_sesiones', {'estado': estado}, total) for estado, total in estados.items()] + [
+        ('dashboard_sesiones_memoria_bytes', {}, sum(tamanos.values()))
+    ]
+
+
+registrar_recolector(_metricas)